@@ -1,12 +1,11 @@
 import os
 
-import rollbar
-import rollbar.contrib.flask
 from flask import Flask, got_request_exception
 from flask_alembic import Alembic
 from flask_sqlalchemy_lite import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 
+from app.lib.password import PasswordHasherBusy
 from app.lib.util.lenient import lenient_wrap
 from app.lib.util.security import MissingCSRFToken
 
@@ -28,7 +27,11 @@ db = SQLAlchemy()
 alembic = Alembic(metadatas=Model.metadata)
 
 
-def create_app(test_mode: bool = False):
+def create_app(test_mode: bool = False, warm: bool = False):
+    """
+    `test_mode`: Use the test database
+    `warm`: Do the slow setup up front rather than on the first request, for the gunicorn master process
+    """
     app = Flask(__name__)
     app.config.from_pyfile("../config/app_config.py")
 
@@ -43,21 +46,26 @@ def create_app(test_mode: bool = False):
 
     if test_mode or os.getenv("TEST_MODE") == "yes":
         app.testing = True
-        app.config["SQLALCHEMY_ENGINES"] = {"default": "sqlite:////home/app/log-my-time/db/time.test.db"}
+        app.config["SQLALCHEMY_ENGINES"] = {
+            "default": os.getenv("TEST_DATABASE_URL", "sqlite:////home/app/log-my-time/db/time.test.db")
+        }
 
     db.init_app(app)
     alembic.init_app(app)
 
-    app.jinja_env.add_extension("jinja2.ext.do")
-    app.jinja_env.add_extension("jinja2.ext.loopcontrols")
-    app.jinja_env.add_extension("jinja2.ext.debug")
-    app.jinja_env.globals["lenient_wrap"] = lenient_wrap
+    with app.app_context():
+        from app.lib import timing
+        from app.lib.sqlite import apply_pragmas
+
+        apply_pragmas(db.engine, app.config.get("SQLITE_PRAGMAS"))
+        timing.init_app(app, db.engine)
+
+    init_jinja(app)
 
     with app.app_context():
-        from app.cli import data
+        from app.cli import data, events, sessions, slack, startup
         from app.lib.util.security import enable_csrf_protection
-        from app.views import (callback, core, holidays, leave, settings, time,
-                               user)
+        from app.views import api, callback, core, holidays, leave, settings, time, user
 
         init_rollbar(app)
         enable_csrf_protection(app)
@@ -68,17 +76,63 @@ def create_app(test_mode: bool = False):
         app.register_blueprint(user.v)
         app.register_blueprint(core.v)
         app.register_blueprint(data.v)
+        app.register_blueprint(slack.v)
+        app.register_blueprint(sessions.v)
+        app.register_blueprint(events.v)
+        app.register_blueprint(startup.v)
         app.register_blueprint(callback.v)
 
         app.register_blueprint(holidays.v)
+        app.register_blueprint(api.v)
 
         add_error_handlers(app)
         add_globals(app)
         add_jinja_filters(app)
 
+        # Build the holiday calendars and compile the templates up front
+        # With --preload this is done once before forking and then shared by all the workers
+        if warm:
+            from app.controllers.holidays import warm_cache
+
+            warm_cache()
+            precompile_templates(app)
+
     return app
 
 
+def init_jinja(app):
+    import tempfile
+
+    from jinja2 import FileSystemBytecodeCache
+
+    app.jinja_env.add_extension("jinja2.ext.do")
+    app.jinja_env.add_extension("jinja2.ext.loopcontrols")
+    app.jinja_env.globals["lenient_wrap"] = lenient_wrap
+
+    # Only check for changed templates while developing
+    app.jinja_env.auto_reload = app.debug
+    if app.debug:
+        app.jinja_env.add_extension("jinja2.ext.debug")
+
+    # Keep the compiled templates between restarts, jinja checks the source still matches before using them
+    # /dev/shm is memory backed and is also where gunicorn keeps its worker files
+    cache_dir = app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    if not cache_dir:
+        tmp = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        cache_dir = os.path.join(tmp, "log-my-time-jinja")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+
+def precompile_templates(app):
+    """
+    Loads every template into the jinja environment so they are not compiled on the first request
+    """
+    for name in app.jinja_env.list_templates(extensions=["j2"]):
+        app.jinja_env.get_template(name)
+
+
 def init_rollbar(app):
     if not app.config.get("ROLLBAR_SERVER_TOKEN"):
         return
@@ -89,6 +143,9 @@ def init_rollbar(app):
     if os.getenv("ENVIRONMENT") == "local":
         return
 
+    import rollbar
+    import rollbar.contrib.flask
+
     rollbar.init(
         app.config["ROLLBAR_SERVER_TOKEN"],
         os.getenv("ENVIRONMENT", "local"),
@@ -122,6 +179,15 @@ def add_error_handlers(app):
         response.headers["X-Dynamic-Frame-Page-Redirect"] = "/login"
         return response
 
+    @app.errorhandler(PasswordHasherBusy)
+    def handle_password_hasher_busy(e):
+        from flask import flash, redirect, request
+
+        flash("We're a bit busy right now, please try again in a moment.", "warning")
+        response = redirect(request.referrer or request.path)
+        response.headers["Retry-After"] = "5"
+        return response
+
 
 def add_globals(app):
     # Inject some values into ALL templates
@@ -132,8 +198,7 @@ def add_globals(app):
         from flask import session as flask_session
 
         from app.controllers.settings import fetch
-        from app.controllers.user.util import (get_user, is_admin,
-                                               is_logged_in, unseen_whats_new)
+        from app.controllers.user.util import get_user, is_admin, is_logged_in, unseen_whats_new
         from app.lib.util.date import humanize_seconds
         from app.lib.util.security import get_csrf_token
 
@@ -7,7 +7,7 @@ v = Blueprint("data", __name__)
 @v.cli.command("seed-test-db")
 def seed_test_db():
     from app import Model, db
-    from app.models import User
+    from app.models import Settings, User
 
     click.echo("Seeding test database...")
 
@@ -19,4 +19,71 @@ def seed_test_db():
     test_user.set_password("test")
     test_user.verify()
 
+    db.session.add(Settings.default(test_user.id))
+    db.session.commit()
+
+    # The database is new so anything cached for the user is stale
+    from app.controllers import core, settings
+
+    settings.clear_cache(test_user.id)
+    core.clear_first_record(test_user.id)
+
     click.echo("Completed database seeding.")
+
+
+@v.cli.command("optimize")
+@click.option("--interval", type=int, default=0, help="Keep running every N seconds")
+def optimize(interval: int):
+    """
+    Checkpoints the WAL and updates the query planner statistics
+    """
+    import time
+
+    from app import db
+    from app.lib import sqlite
+
+    while True:
+        sqlite.optimize(db.engine)
+        click.echo("Database optimized.")
+
+        if not interval:
+            break
+
+        time.sleep(interval)
+
+
+@v.cli.command("import")
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option("--user", "email", required=True, help="The email of the user to import for")
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "csv"]), help="Defaults to the file extension")
+def import_data(file, email: str, fmt: str | None):
+    """
+    Imports time and leave records from a CSV or newline delimited JSON file, use - for stdin
+    """
+    import time
+
+    import sqlalchemy as sa
+
+    from app import db
+    from app.controllers import data_import
+    from app.models import User
+
+    user_id = db.session.scalar(sa.select(User.id).filter_by(email=email))
+    if user_id is None:
+        raise click.ClickException(f"No user with the email {email}")
+
+    fmt = fmt or ("csv" if file.name.endswith(".csv") else "ndjson")
+    parse = data_import.parse_csv if fmt == "csv" else data_import.parse_ndjson
+
+    started = time.perf_counter()
+    result = data_import.import_data(user_id, parse(file))
+    seconds = time.perf_counter() - started
+
+    for error in result.errors:
+        click.echo(error, err=True)
+
+    rows = result.time + result.breaks + result.leave
+    click.echo(
+        f"Imported {result.time} time, {result.breaks} break and {result.leave} leave records"
+        f" ({rows / seconds:.0f} rows/s), skipped {result.skipped}."
+    )
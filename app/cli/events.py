@@ -0,0 +1,29 @@
+import click
+from flask import Blueprint
+
+v = Blueprint("events", __name__)
+
+
+@v.cli.command("serve")
+@click.option("--host", default="0.0.0.0")
+@click.option("--port", type=int, default=5001)
+def serve(host: str, port: int):
+    """
+    Serves the dashboard event stream with asyncio
+    """
+    import asyncio
+
+    import redis.asyncio as aioredis
+    from flask import current_app as app
+
+    from app.controllers import data_version
+    from app.lib.events_server import EventServer
+    from app.lib.redis import RedisDatabase
+
+    cache = aioredis.Redis(app.config["CACHE_HOST"], db=RedisDatabase.CACHE.value)
+    session = aioredis.Redis(app.config["CACHE_HOST"], db=RedisDatabase.SESSION.value)
+    server = EventServer(
+        app.config["SECRET_KEY"], cache, session, running_key=data_version.cache_key, origin=app.config["HOST"]
+    )
+
+    asyncio.run(server.serve(host, port))
@@ -0,0 +1,33 @@
+import click
+from flask import Blueprint
+from flask import current_app as app
+
+v = Blueprint("sessions", __name__)
+
+
+@v.cli.command("purge")
+@click.option("--batch-size", type=int, help="How many sessions to delete in each transaction")
+@click.option("--interval", type=int, help="Keep running every N seconds")
+def purge(batch_size: int | None, interval: int | None):
+    """
+    Deletes the expired login sessions
+
+    The defaults can be set with `SESSION_PURGE_BATCH_SIZE` and `SESSION_PURGE_INTERVAL` in the app config
+    """
+    import time
+
+    from app import db
+    from app.controllers.user import SESSION_PURGE_BATCH_SIZE, purge_expired_sessions
+
+    batch_size = batch_size or app.config.get("SESSION_PURGE_BATCH_SIZE", SESSION_PURGE_BATCH_SIZE)
+    interval = interval if interval is not None else app.config.get("SESSION_PURGE_INTERVAL", 0)
+
+    while True:
+        purged = purge_expired_sessions(batch_size)
+        db.session.close()
+        click.echo(f"Purged {purged} expired sessions.")
+
+        if not interval:
+            break
+
+        time.sleep(interval)
@@ -0,0 +1,27 @@
+import click
+from flask import Blueprint
+
+v = Blueprint("slack", __name__)
+
+
+@v.cli.command("worker")
+@click.option("--once", is_flag=True, help="Exit once the queue is empty")
+def worker(once: bool):
+    """
+    Sends the queued slack status updates
+    """
+    from app import db
+    from app.controllers import slack
+
+    click.echo("Waiting for slack status updates...")
+
+    while True:
+        user_id = slack.process_queue()
+
+        # Don't keep a transaction open between jobs
+        db.session.close()
+
+        if user_id is None and once:
+            break
+
+    click.echo("Slack queue empty.")
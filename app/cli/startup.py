@@ -0,0 +1,28 @@
+import click
+from flask import Blueprint
+
+# Not grouped, so this is `flask startup-report`
+v = Blueprint("startup", __name__, cli_group=None)
+
+
+@v.cli.command("startup-report")
+@click.option("--top", type=int, default=20, help="How many imports to list")
+@click.option("--depth", type=int, default=0, help="How deep into nested imports to go")
+@click.option("--warm", is_flag=True, help="Include the warm up done by the gunicorn master")
+def startup_report(top: int, depth: int, warm: bool):
+    """
+    Reports how long the app takes to start and the slowest imports
+    """
+    from app.lib import startup
+
+    report = startup.measure(warm=warm)
+
+    click.echo(f"Imports:    {report.import_seconds * 1000:>8.1f}ms")
+    click.echo(f"create_app: {report.create_app_seconds * 1000:>8.1f}ms")
+    click.echo(f"Total:      {report.total_seconds * 1000:>8.1f}ms")
+    click.echo()
+    click.echo(f"{'Module':<60} {'Self':>10} {'Cumulative':>12}")
+
+    for i in report.slowest(top, max_depth=depth):
+        name = "  " * i.depth + i.module
+        click.echo(f"{name:<60} {i.self_seconds * 1000:>8.1f}ms {i.cumulative_seconds * 1000:>10.1f}ms")
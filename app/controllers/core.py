@@ -4,29 +4,73 @@ import arrow
 import sqlalchemy as sa
 
 from app import db
-from app.controllers import settings
+from app.controllers import overtime, settings
 from app.controllers.user.util import get_user
 from app.models import Leave, Time, WhatsNew
 from app.viewmodels import TimeStats
 
 
-def _get_first_record_time() -> int | None:
+# How many weeks `week_list` returns at a time
+WEEK_WINDOW = 12
+
+# How long the first record time is cached for in seconds
+# Writes before the first record clear the cache, this just stops unused keys hanging around
+FIRST_RECORD_CACHE_TIMEOUT = 86400
+
+
+def first_record_time() -> int | None:
     """
     Returns the timestamp of the first time or leave record
+    This is cached until `invalidate_first_record()` is called with an earlier time
+    """
+    from app.lib.redis import cache
+
+    user = get_user()
+    key = _first_record_key(user.id)
+
+    if (cached := cache.get(key)) is not None:
+        return int(cached) if cached else None
+
+    first_time = db.session.scalar(sa.select(sa.func.min(Time.start)).filter(Time.user_id == user.id))
+    first_leave = db.session.scalar(sa.select(sa.func.min(Leave.start)).filter(Leave.user_id == user.id))
+
+    to_check = [start for start in (first_time, first_leave) if start is not None]
+    first = min(to_check) if to_check else None
+
+    cache.set(key, "" if first is None else str(first), ex=FIRST_RECORD_CACHE_TIMEOUT)
+    return first
+
+
+def invalidate_first_record(since: Optional[int] = None, user_id: Optional[int] = None):
+    """
+    Clears the cached first record time if a record starting at `since` could change it
+    That is when `since` is at or before the cached time, or there were no records
+    If `since` is not passed then the cache is always cleared
+    `user_id` defaults to the logged in user
+    """
+    from app.lib.redis import cache
+
+    user_id = user_id or get_user().id
+
+    if since is not None:
+        cached = cache.get(_first_record_key(user_id))
+        if cached is None or (cached and since > int(cached)):
+            return
+
+    clear_first_record(user_id)
+
+
+def clear_first_record(user_id: int):
     """
-    first_time = db.session.scalars(sa.select(Time).filter(Time.user == get_user()).order_by(Time.start)).first()
-    first_leave = db.session.scalars(sa.select(Leave).filter(Leave.user == get_user()).order_by(Leave.start)).first()
+    Removes the cached first record time for a user
+    """
+    from app.lib.redis import cache
 
-    to_check = []
-    if first_time:
-        to_check.append(first_time.start)
-    if first_leave:
-        to_check.append(first_leave.start)
+    cache.delete(_first_record_key(user_id))
 
-    if not to_check:
-        return None
 
-    return min(to_check)
+def _first_record_key(user_id: int) -> str:
+    return f"first_record:{user_id}"
 
 
 def stats() -> TimeStats:
@@ -46,14 +90,8 @@ def stats() -> TimeStats:
         week_start = today
 
     # Time logged
-    entries_today = [
-        *Time.between(today.int_timestamp, today.int_timestamp + 86400),
-        *Leave.between(today.int_timestamp, today.int_timestamp + 86400),
-    ]
-    logged_today = sum([rec.logged() for rec in entries_today])
-
-    entries_this_week = [*Time.since(week_start.int_timestamp), *Leave.since(week_start.int_timestamp)]
-    logged_this_week = sum([rec.logged() for rec in entries_this_week])
+    logged_today = logged_between(today.int_timestamp, today.shift(days=1).int_timestamp, now=now.int_timestamp)
+    logged_this_week = logged_between(week_start.int_timestamp, now=now.int_timestamp)
 
     # Time to do
     current_day = now.format("dddd")
@@ -76,12 +114,10 @@ def stats() -> TimeStats:
         remaining_this_week = 0
 
     # Overtime (all time)
-    # TODO: This is a little inefficient as it must go through all records from the beginning
-    # It would probably be better to save the overtime each week in a background task
-    # Though this is nice and simple
-    overtime = 0
+    # The time logged before this week is kept in a checkpoint, so we only need to add up the records since then
+    _overtime = 0
 
-    if first_time := _get_first_record_time():
+    if first_time := first_record_time():
         from app.lib.util.date import calculate_expected_hours
 
         first_day = arrow.get(first_time).to(_tz)
@@ -93,47 +129,128 @@ def stats() -> TimeStats:
         )
 
         # First take off the time we _should_ have worked
-        overtime = -(expected_hours * 60 * 60)  # Convert to seconds
+        _overtime = -(expected_hours * 60 * 60)  # Convert to seconds
 
         # Now add on what we have worked/taken as leave
-        overtime += sum([rec.logged() for rec in Time.between(0, now.int_timestamp)])
-        overtime += sum([rec.logged() for rec in Leave.between(0, now.int_timestamp)])
+        checkpoint, logged_before_checkpoint = overtime.logged_before(week_start.int_timestamp)
+        _overtime += logged_before_checkpoint
+        _overtime += logged_between(checkpoint, now.int_timestamp + 1, now=now.int_timestamp)
 
     return TimeStats(
         logged_this_week=humanize_seconds(logged_this_week, short=True),
         logged_today=humanize_seconds(logged_today, short=True),
         remaining_this_week=humanize_seconds(remaining_this_week, short=True),
         remaining_today=humanize_seconds(remaining_today, short=True),
-        overtime=humanize_seconds(overtime, short=True),
+        overtime=humanize_seconds(_overtime, short=True),
     )
 
 
-def week_list() -> list[str]:
+def logged_between(start: int, end: Optional[int] = None, now: Optional[int] = None) -> int:
     """
-    Returns a list of weeks since the first record in the format ${year}-W${week}, eg. 2022-W25
+    Returns the total seconds logged by the time and leave records that started on or after `start` and before `end`
+    If `end` is not passed then there is no upper limit
+
+    Breaks are taken off, any time records or breaks that are still open are treated as ending at `now`
+    Leave is converted to seconds using `hours_per_day`
+
+    This is worked out by the database in a single query
     """
-    _settings = settings.fetch()
-    _tz = _settings.timezone
+    if now is None:
+        now = arrow.utcnow().int_timestamp
+
+    statement = _logged_between_statement(
+        user_id=get_user().id,
+        start=start,
+        end=end,
+        now=now,
+        hours_per_day=settings.fetch().hours_per_day,
+    )
+
+    return int(db.session.scalar(statement) or 0)
+
+
+def _logged_between_statement(
+    user_id: int, start: int, end: Optional[int], now: int, hours_per_day: float
+) -> sa.Select:
+    """
+    Builds the query for `logged_between()`
+    """
+    from app.models import Break
+
+    def in_range(column):
+        if end is None:
+            return column >= start
+        return sa.and_(column >= start, column < end)
+
+    worked = (
+        sa.select(sa.func.coalesce(sa.func.sum(sa.func.coalesce(Time.end, now) - Time.start), 0))
+        .filter(Time.user_id == user_id, in_range(Time.start))
+        .scalar_subquery()
+    )
+
+    breaks = (
+        sa.select(sa.func.coalesce(sa.func.sum(sa.func.coalesce(Break.end, now) - Break.start), 0))
+        .join(Time, Break.time_id == Time.id)
+        .filter(Time.user_id == user_id, in_range(Time.start))
+        .scalar_subquery()
+    )
+
+    leave_days = (
+        sa.select(sa.func.coalesce(sa.func.sum(Leave.duration), 0))
+        .filter(Leave.user_id == user_id, in_range(Leave.start))
+        .scalar_subquery()
+    )
+
+    return sa.select(worked - breaks + leave_days * hours_per_day * 60 * 60)
+
+
+def week_count() -> int:
+    """
+    Returns the number of weeks from the week of the first record to this week
+    """
+    if (first_time := first_record_time()) is None:
+        return 0
+
+    _tz = settings.fetch().timezone
+
+    first = arrow.get(first_time).to(_tz).date()
+    today = arrow.now(tz=_tz).date()
 
     # TODO: How do we view future logs?
-    first_time = _get_first_record_time()
-    if not first_time:
-        return []
+    if first > today:
+        return 0
+
+    return (_monday(today) - _monday(first)).days // 7 + 1
 
-    first = arrow.get(first_time)
-    now = arrow.now(tz=_tz)
 
-    # Adjust the starting day to the first working day of the week
-    while first.weekday() > _settings.week_start_0:
-        first = first.shift(days=-1)
+def week_list(offset: int = 0, limit: int = WEEK_WINDOW) -> list[str]:
+    """
+    Returns a list of weeks since the first record in the format ${year}-W${week}, eg. 2022-W25
+    Starts with this week and goes back in time, `offset` and `limit` select a window of the list
+    """
+    from datetime import timedelta
+
+    count = week_count()
+    if offset >= count:
+        return []
+
+    this_week = _monday(arrow.now(tz=settings.fetch().timezone).date())
 
-    # Go through each week since the first time record until now
     weeks = []
-    while first <= now:
-        weeks.append(first.format("W").rsplit("-", 1)[0])
-        first = first.shift(weeks=1)
+    for weeks_ago in range(offset, min(offset + limit, count)):
+        year, week, _ = (this_week - timedelta(weeks=weeks_ago)).isocalendar()
+        weeks.append(f"{year}-W{week:02d}")
+
+    return weeks
+
+
+def _monday(day):
+    """
+    Returns the Monday of the ISO week that `day` is in
+    """
+    from datetime import timedelta
 
-    return list(reversed(weeks))
+    return day - timedelta(days=day.weekday())
 
 
 def whats_new(limit: Optional[int] = None) -> list[WhatsNew]:
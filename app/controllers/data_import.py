@@ -0,0 +1,337 @@
+"""
+Imports time and leave records in bulk, eg. when moving from another tracker
+
+Records are read from a stream of newline delimited JSON or CSV, see `parse_ndjson()` and `parse_csv()`,
+and inserted `CHUNK_SIZE` at a time with one executemany per table and one commit per chunk.
+
+Timestamps can be unix timestamps or ISO 8601 strings, strings without an offset are in the user's timezone.
+Time records that overlap an existing record (or an earlier one in the import) are skipped,
+as are breaks outside of their time record and leave that starts at the same time as other leave.
+Skipped records are reported in `ImportResult.errors`.
+"""
+
+import csv
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+from typing import IO, Iterable, Iterator, Optional
+
+import sqlalchemy as sa
+
+from app import db
+from app.lib.logger import get_logger
+from app.models import Break, Leave, Settings, Time
+
+logger = get_logger(__name__)
+
+# The number of records inserted in each transaction
+CHUNK_SIZE = 5000
+
+# Stop listing errors after this many, the rest are only counted
+MAX_ERRORS = 100
+
+LEAVE_TYPES = ("annual", "sick")
+
+# Inserts use the tables rather than the models so they are a plain executemany without the ORM's bookkeeping
+TIME, BREAK, LEAVE = Time.__table__, Break.__table__, Leave.__table__
+
+CSV_COLUMNS = ["type", "start", "end", "note", "leave_type", "duration", "public_holiday"]
+
+
+class InvalidRecord(Exception):
+    pass
+
+
+@dataclass
+class ImportResult:
+    time: int = 0
+    breaks: int = 0
+    leave: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def error(self, line: int, message: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+
+def import_data(user_id: int, records: Iterable[tuple[int, dict]]) -> ImportResult:
+    """
+    Imports records for `user_id` and returns what was imported
+    `records` is an iterable of (line number, record), from `parse_ndjson()` or `parse_csv()`
+
+    Each chunk is committed as it goes, so if a later chunk fails the caches are still invalidated
+    for the chunks that were imported before the error is raised
+    """
+    from app.controllers import core, data_version, overtime
+
+    importer = Importer(user_id)
+    try:
+        return importer.run(records)
+    finally:
+        if importer.earliest is not None:
+            # Anything left from a failed chunk
+            db.session.rollback()
+
+            overtime.invalidate(importer.earliest, user_id=user_id)
+            db.session.commit()
+
+            core.invalidate_first_record(importer.earliest, user_id=user_id)
+            data_version.bump(user_id=user_id)
+
+
+def parse_ndjson(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    """
+    Reads one record per line
+
+    ```json
+    {"type": "time", "start": "2024-01-01T09:00", "end": "2024-01-01T17:00", "note": "Planning"}
+    {"type": "time", "start": 1704186000, "end": 1704214800, "breaks": [{"start": 1704196800, "end": 1704198600}]}
+    {"type": "leave", "leave_type": "annual", "start": "2024-01-03", "duration": 1}
+    ```
+    """
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield number, {"error": "invalid JSON"}
+            continue
+
+        if not isinstance(record, dict):
+            record = {"error": "expected a JSON object"}
+
+        yield number, record
+
+
+def parse_csv(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    """
+    Reads a CSV with a header row of `CSV_COLUMNS`
+    A row with a `type` of "break" is a break in the time record above it
+    """
+    record = None
+
+    for number, row in enumerate(csv.DictReader(stream), start=2):
+        if row.get("type") == "break":
+            if record is None or record[1].get("type") != "time":
+                yield number, {"type": "break"}
+            else:
+                record[1]["breaks"].append({"start": row.get("start"), "end": row.get("end"), "note": row.get("note")})
+            continue
+
+        if record:
+            yield record
+
+        record = (number, {**row, "breaks": []})
+
+    if record:
+        yield record
+
+
+class Importer:
+    def __init__(self, user_id: int):
+        from zoneinfo import ZoneInfo
+
+        self.user_id = user_id
+        self.result = ImportResult()
+
+        # The earliest record imported, used to invalidate anything cached from that point
+        self.earliest: Optional[int] = None
+
+        timezone = db.session.scalar(sa.select(Settings.timezone).filter(Settings.user_id == user_id))
+        self.tz: tzinfo = ZoneInfo(timezone or "Europe/London")
+
+    def run(self, records: Iterable[tuple[int, dict]]) -> ImportResult:
+        times: list[tuple[int, dict, list[dict]]] = []
+        leave: list[tuple[int, dict]] = []
+
+        for number, record in records:
+            try:
+                match record.get("type"):
+                    case "time":
+                        times.append((number, *self.time(record)))
+                    case "leave":
+                        leave.append((number, self.leave(record)))
+                    case "break":
+                        raise InvalidRecord("break without a time record")
+                    case _:
+                        raise InvalidRecord(record.get("error", "unknown record type"))
+            except KeyError as e:
+                self.result.error(number, f"missing {e}")
+            except (InvalidRecord, ValueError, TypeError) as e:
+                self.result.error(number, str(e))
+
+            if len(times) + len(leave) >= CHUNK_SIZE:
+                self.insert(times, leave)
+                times, leave = [], []
+
+        if times or leave:
+            self.insert(times, leave)
+
+        return self.result
+
+    def timestamp(self, value) -> int:
+        """
+        Converts a unix timestamp or an ISO 8601 string to a unix timestamp
+        """
+        if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+            return int(value)
+
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=self.tz)
+
+        return int(parsed.timestamp())
+
+    def time(self, record: dict) -> tuple[dict, list[dict]]:
+        start = self.timestamp(record["start"])
+        end = self.timestamp(record["end"]) if record.get("end") else None
+
+        if end is not None and end < start:
+            raise InvalidRecord("ends before it starts")
+
+        breaks = []
+        for brk in record.get("breaks") or []:
+            break_start = self.timestamp(brk["start"])
+            break_end = self.timestamp(brk["end"]) if brk.get("end") else None
+
+            if break_start < start or (end is not None and (break_end or break_start) > end):
+                raise InvalidRecord("break outside of its time record")
+            if break_end is not None and break_end < break_start:
+                raise InvalidRecord("break ends before it starts")
+
+            breaks.append({"start": break_start, "end": break_end, "note": brk.get("note") or None})
+
+        row = {"start": start, "end": end, "note": record.get("note") or "", "user_id": self.user_id}
+        return row, breaks
+
+    def leave(self, record: dict) -> dict:
+        if record.get("leave_type") not in LEAVE_TYPES:
+            raise InvalidRecord(f"leave_type must be one of {', '.join(LEAVE_TYPES)}")
+
+        duration = float(record["duration"])
+        if duration <= 0:
+            raise InvalidRecord("duration must be more than 0")
+
+        public_holiday = record.get("public_holiday")
+        if isinstance(public_holiday, str):
+            public_holiday = public_holiday.lower() in ("1", "true", "yes")
+
+        return {
+            "leave_type": record["leave_type"],
+            "start": self.timestamp(record["start"]),
+            "duration": duration,
+            "note": record.get("note") or None,
+            "public_holiday": bool(public_holiday),
+            "user_id": self.user_id,
+        }
+
+    def without_overlaps(self, times: list[tuple[int, dict, list[dict]]]) -> list[tuple[dict, list[dict]]]:
+        """
+        Drops the time records that overlap an existing record or an earlier record in `times`
+        The existing records are loaded with one query for the range covered by `times`
+        """
+        from bisect import bisect_left
+        from itertools import accumulate
+
+        # Open records have no end yet
+        forever = sys.maxsize
+
+        times = sorted(times, key=lambda t: t[1]["start"])
+        first = times[0][1]["start"]
+        last = max(row["end"] or forever for _, row, _ in times)
+
+        existing = db.session.execute(
+            sa.select(Time.start, Time.end)
+            .filter(
+                Time.user_id == self.user_id,
+                Time.start < last,
+                sa.or_(Time.end > first, Time.end == None),
+            )
+            .order_by(Time.start)
+        ).all()
+
+        starts = [row.start for row in existing]
+        max_ends = list(accumulate((row.end or forever for row in existing), max))
+
+        accepted = []
+        accepted_end = None
+        for number, row, breaks in times:
+            end = row["end"] or forever
+
+            # Any existing record that starts before this one ends and ends after it starts
+            before = bisect_left(starts, end)
+            if before and max_ends[before - 1] > row["start"]:
+                self.result.error(number, "overlaps an existing time record")
+                continue
+
+            if accepted_end is not None and row["start"] < accepted_end:
+                self.result.error(number, "overlaps another time record in the import")
+                continue
+
+            accepted.append((row, breaks))
+            accepted_end = end
+
+        return accepted
+
+    def without_duplicates(self, leave: list[tuple[int, dict]]) -> list[dict]:
+        """
+        Drops the leave that starts at the same time as existing leave or earlier leave in `leave`
+        The existing leave is loaded with one query for the range covered by `leave`
+        """
+        starts = [row["start"] for _, row in leave]
+
+        taken = set(
+            db.session.scalars(
+                sa.select(Leave.start).filter(
+                    Leave.user_id == self.user_id,
+                    Leave.start >= min(starts),
+                    Leave.start <= max(starts),
+                )
+            )
+        )
+
+        accepted = []
+        for number, row in leave:
+            if row["start"] in taken:
+                self.result.error(number, "leave already starts at this time")
+                continue
+
+            accepted.append(row)
+            taken.add(row["start"])
+
+        return accepted
+
+    def insert(self, times: list[tuple[int, dict, list[dict]]], leave: list[tuple[int, dict]]):
+        accepted = self.without_overlaps(times) if times else []
+        leave = self.without_duplicates(leave) if leave else []
+
+        if accepted:
+            # RETURNING with `sort_by_parameter_order` gives the IDs in the same order as the rows
+            ids = db.session.scalars(
+                sa.insert(TIME).returning(TIME.c.id, sort_by_parameter_order=True),
+                [row for row, _ in accepted],
+            ).all()
+
+            breaks = [{**brk, "time_id": time_id} for time_id, (_, brks) in zip(ids, accepted) for brk in brks]
+            if breaks:
+                db.session.execute(sa.insert(BREAK), breaks)
+
+            self.result.time += len(accepted)
+            self.result.breaks += len(breaks)
+
+        if leave:
+            db.session.execute(sa.insert(LEAVE), leave)
+            self.result.leave += len(leave)
+
+        db.session.commit()
+
+        starts = [row["start"] for row, _ in accepted] + [row["start"] for row in leave]
+        if starts:
+            self.earliest = min(starts + ([self.earliest] if self.earliest is not None else []))
+
+        logger.info(f"Imported {len(accepted)} time and {len(leave)} leave records for user {self.user_id}")
@@ -0,0 +1,140 @@
+"""
+Keeps a version for each user's data so frames can be revalidated with an ETag
+
+The version is changed by `bump()` after every write to a user's time, leave or settings.
+Frames decorated with `@conditional_frame` send an ETag built from the version,
+so a conditional GET for a frame returns a 304 without running its queries or rendering its template.
+
+```python
+@v.get("/frames/stats")
+@login_required
+@conditional_frame("frames/time_stats.html.j2")
+def stats():
+    ...
+```
+"""
+
+import functools
+from typing import Callable, Optional
+
+import sqlalchemy as sa
+
+from app import db
+from app.controllers.user.util import get_user
+from app.models import Time
+
+# How long a version is kept for in seconds
+# An expired version is replaced by a new one so this only means a few more full responses
+CACHE_TIMEOUT = 86400
+
+# Frames that show a running clock change every minute, otherwise they only need refreshing for the date changing
+RUNNING_BUCKET = 60
+IDLE_BUCKET = 900
+
+
+def get(user_id: int) -> tuple[int, bool]:
+    """
+    Returns a tuple of (version, running) for the user
+    `running` is True when the user has an open time record
+    """
+    from app.lib.redis import cache
+
+    cached = cache.hmget(cache_key(user_id), "version", "running")
+    if cached[0] is not None:
+        return int(cached[0]), cached[1] == b"1"
+
+    return _set(user_id)
+
+
+def bump(user_id: Optional[int] = None):
+    """
+    Changes the data version for the user and tells any open dashboards, see `app.lib.events`
+    `user_id` defaults to the logged in user
+    Must be called after the write has been committed,
+    otherwise a request could cache the old data against the new version
+    """
+    from app.lib import events
+
+    user_id = user_id or get_user().id
+    version, running = _set(user_id)
+
+    events.publish(user_id, "changed", {"version": version, "running": running})
+
+
+def _set(user_id: int) -> tuple[int, bool]:
+    """
+    Stores a new version for the user
+    The current time is used rather than incrementing so versions are not reused if the cache is cleared
+    """
+    import time
+
+    from app.lib.redis import cache
+
+    running = db.session.scalar(sa.select(sa.exists().where(Time.user_id == user_id, Time.end == None)))
+    version = time.time_ns()
+
+    key = cache_key(user_id)
+    pipeline = cache.pipeline()
+    pipeline.hset(key, mapping={"version": version, "running": int(bool(running))})
+    pipeline.expire(key, CACHE_TIMEOUT)
+    pipeline.execute()
+
+    return version, bool(running)
+
+
+def cache_key(user_id: int) -> str:
+    return f"data_version:{user_id}"
+
+
+def conditional_frame(template: str) -> Callable:
+    """
+    Adds an ETag to the frame response and returns a 304 if the browser already has it
+    The ETag covers the data version, the template, the query string (eg. `block` or `week`)
+    and the login session, since frames can include a CSRF token
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            from flask import make_response, request
+
+            etag = frame_etag(template)
+
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(func(*args, **kwargs))
+
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def frame_etag(template: str, now: Optional[float] = None) -> str:
+    """
+    Returns the ETag for a frame rendered from `template` for the current request
+    """
+    import hashlib
+    import time
+
+    from flask import request
+    from flask import session as flask_session
+
+    version, running = get(get_user().id)
+
+    now = time.time() if now is None else now
+    bucket = int(now // (RUNNING_BUCKET if running else IDLE_BUCKET))
+
+    parts = (
+        version,
+        template,
+        request.query_string.decode(),
+        bucket,
+        flask_session.get("login_session_key", ""),
+    )
+    return hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
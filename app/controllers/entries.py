@@ -0,0 +1,195 @@
+"""
+Pages through a user's time and leave records, used by `/api/v1/entries`
+
+Pages use keyset pagination on (start, type, id) rather than an offset, so every page is an index range scan
+on `ix_time_user_id_start_end` and `ix_leave_user_id_start` no matter how far back it is.
+The cursor for the next page is the position of the last entry on this page, see `encode_cursor()`.
+"""
+
+import base64
+import heapq
+from typing import NamedTuple, Optional, Sequence
+
+import sqlalchemy as sa
+
+from app import db
+from app.controllers.user.util import get_user
+from app.models import Break, Leave, Time
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Entries that start at the same time are ordered by type then ID, so leave comes before time
+TYPES = ("leave", "time")
+
+
+class Cursor(NamedTuple):
+    start: int
+    type: str
+    id: int
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    return base64.urlsafe_b64encode(f"{cursor.start}:{cursor.type}:{cursor.id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        start, type, id = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode().split(":")
+        if type not in TYPES:
+            raise ValueError(type)
+        return Cursor(int(start), type, int(id))
+    except ValueError as e:
+        raise InvalidCursor(value) from e
+
+
+def page(
+    after: Optional[Cursor] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    types: Sequence[str] = TYPES,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> tuple[list[dict], Optional[Cursor]]:
+    """
+    Returns a page of entries and the cursor for the next page, which is None on the last page
+
+    `after`: The cursor returned with the previous page
+    `since`/`until`: Only entries starting in this range, `until` is exclusive
+    `types`: "time" and/or "leave"
+    `descending`: Newest first
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    # One more than needed so we know if there is another page
+    sources = []
+    if "time" in types:
+        sources.append(_times(after, since, until, limit + 1, descending))
+    if "leave" in types:
+        sources.append(_leave(after, since, until, limit + 1, descending))
+
+    entries = list(heapq.merge(*sources, key=_position, reverse=descending))[: limit + 1]
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    _add_breaks([entry for entry in entries if entry["type"] == "time"])
+
+    return entries, Cursor(*_position(entries[-1])) if has_more else None
+
+
+def _position(entry: dict) -> tuple[int, str, int]:
+    return entry["start"], entry["type"], entry["id"]
+
+
+def _keyset(model, type: str, after: Optional[Cursor], descending: bool):
+    """
+    The filter for the rows of `model` that come after `after`
+    """
+    if after.type == type:
+        position, cursor = sa.tuple_(model.start, model.id), (after.start, after.id)
+        return position < cursor if descending else position > cursor
+
+    # At the same start a different type is either all before or all after the cursor
+    if (type > after.type) != descending:
+        return model.start <= after.start if descending else model.start >= after.start
+
+    return model.start < after.start if descending else model.start > after.start
+
+
+def _filtered(query, model, type: str, user_id: int, after, since, until, limit: int, descending: bool) -> sa.Select:
+    query = query.filter(model.user_id == user_id)
+
+    if after:
+        query = query.filter(_keyset(model, type, after, descending))
+    if since is not None:
+        query = query.filter(model.start >= since)
+    if until is not None:
+        query = query.filter(model.start < until)
+
+    order = (model.start.desc(), model.id.desc()) if descending else (model.start, model.id)
+    return query.order_by(*order).limit(limit)
+
+
+def _times_statement(user_id: int, after, since, until, limit: int, descending: bool) -> sa.Select:
+    """
+    Builds the query for a page of time records
+    """
+    return _filtered(
+        sa.select(Time.id, Time.start, Time.end, Time.note),
+        Time,
+        "time",
+        user_id,
+        after,
+        since,
+        until,
+        limit,
+        descending,
+    )
+
+
+def _times(after, since, until, limit: int, descending: bool) -> list[dict]:
+    query = _times_statement(get_user().id, after, since, until, limit, descending)
+
+    return [
+        {"type": "time", "id": row.id, "start": row.start, "end": row.end, "note": row.note}
+        for row in db.session.execute(query)
+    ]
+
+
+def _leave_statement(user_id: int, after, since, until, limit: int, descending: bool) -> sa.Select:
+    """
+    Builds the query for a page of leave
+    """
+    return _filtered(
+        sa.select(Leave.id, Leave.start, Leave.leave_type, Leave.duration, Leave.public_holiday, Leave.note),
+        Leave,
+        "leave",
+        user_id,
+        after,
+        since,
+        until,
+        limit,
+        descending,
+    )
+
+
+def _leave(after, since, until, limit: int, descending: bool) -> list[dict]:
+    query = _leave_statement(get_user().id, after, since, until, limit, descending)
+
+    return [
+        {
+            "type": "leave",
+            "id": row.id,
+            "start": row.start,
+            "leave_type": row.leave_type,
+            "duration": row.duration,
+            "public_holiday": bool(row.public_holiday),
+            "note": row.note,
+        }
+        for row in db.session.execute(query)
+    ]
+
+
+def _add_breaks(times: list[dict]):
+    """
+    Loads the breaks for all the time entries in one query
+    """
+    by_id = {entry["id"]: entry for entry in times}
+    for entry in times:
+        entry["breaks"] = []
+
+    if not by_id:
+        return
+
+    breaks = db.session.execute(
+        sa.select(Break.time_id, Break.start, Break.end, Break.note)
+        .filter(Break.time_id.in_(by_id.keys()))
+        .order_by(Break.start, Break.id)
+    )
+
+    for row in breaks:
+        by_id[row.time_id]["breaks"].append({"start": row.start, "end": row.end, "note": row.note})
@@ -1,7 +1,27 @@
+"""
+Public holidays
+
+Building a calendar with the `holidays` package is slow so each (country, region, year) is only built once per process,
+then stored as sorted tuples of dates and names so lookups are a binary search.
+"""
+
+from bisect import bisect_left, bisect_right
 from datetime import date
+from functools import lru_cache
 from typing import Optional
 
 from app.controllers import settings
+from app.lib.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The locations users can pick in their settings, as {"country/region": label}
+HOLIDAY_LOCATIONS = {
+    "GB/ENG": "England",
+    "GB/NIR": "Northern Ireland",
+    "GB/SCT": "Scotland",
+    "GB/WLS": "Wales",
+}
 
 
 def get_holiday_location() -> tuple[str, str]:
@@ -15,63 +35,82 @@ def get_next_public_holiday() -> Optional[dict]:
     """
     Get the next public holiday
     """
-    import datetime
-
-    import holidays
-
-    today = datetime.date.today()
-    current_year = today.year
-    next_year = current_year + 1
-
-    country, region = get_holiday_location()
-    for year in (current_year, next_year):
-        h = holidays.country_holidays(country, subdiv=region, years=[year])
-        for dt, name in h.items():
-            if dt > today:
-                return {"name": name, "date": dt}
+    return next_holiday(*get_holiday_location(), date.today())
 
 
-def get_upcoming_holidays() -> dict[str, date]:
+def get_upcoming_holidays() -> dict[date, str]:
     """
     Get all holidays for the current year and the next year
     Returned as a dict of {date: name}
     """
-    import holidays
+    today = date.today()
+    return holidays_between(*get_holiday_location(), today, date(today.year + 1, 12, 31))
 
+
+def get_previous_holidays() -> dict[date, str]:
+    """
+    Get all passed holidays for the current year and the previous year
+    Returned as a dict of {date: name}
+    """
     today = date.today()
-    current_year = today.year
-    next_year = current_year + 1
+    return holidays_between(*get_holiday_location(), date(today.year - 1, 1, 1), today, include_end=False)
 
-    next_holidays = {}
 
-    country, region = get_holiday_location()
-    for year in (current_year, next_year):
-        h = holidays.country_holidays(country, subdiv=region, years=[year])
-        for dt, name in h.items():
-            if dt >= today:
-                next_holidays.update({dt: name})
+def next_holiday(country: str, region: str, after: date) -> Optional[dict]:
+    """
+    Get the first holiday after `after`, looking up to the end of next year
+    """
+    for year in (after.year, after.year + 1):
+        dates, names = calendar(country, region, year)
+        i = bisect_right(dates, after)
+        if i < len(dates):
+            return {"name": names[i], "date": dates[i]}
 
-    return dict(sorted(next_holidays.items()))
+    return None
 
 
-def get_previous_holidays() -> dict[str, date]:
+def holidays_between(country: str, region: str, start: date, end: date, include_end: bool = True) -> dict[date, str]:
     """
-    Get all passed holidays for the current year and the previous year
+    Get the holidays from `start` to `end`, in date order
     Returned as a dict of {date: name}
     """
+    found = {}
+
+    for year in range(start.year, end.year + 1):
+        dates, names = calendar(country, region, year)
+        lo = bisect_left(dates, start)
+        hi = bisect_right(dates, end) if include_end else bisect_left(dates, end)
+        found.update(zip(dates[lo:hi], names[lo:hi]))
+
+    return found
+
+
+@lru_cache(maxsize=256)
+def calendar(country: str, region: str, year: int) -> tuple[tuple[date, ...], tuple[str, ...]]:
+    """
+    Get the holidays for a single year as a tuple of (dates, names), sorted by date
+    Built once per process and then cached
+    """
     import holidays
 
-    today = date.today()
-    current_year = today.year
-    last_year = current_year - 1
+    h = holidays.country_holidays(country, subdiv=region, years=[year])
+    entries = sorted(h.items())
+
+    return tuple(dt for dt, _ in entries), tuple(name for _, name in entries)
 
-    previous_holidays = {}
 
-    country, region = get_holiday_location()
-    for year in (current_year, last_year):
-        h = holidays.country_holidays(country, subdiv=region, years=[year])
-        for dt, name in h.items():
-            if dt < today:
-                previous_holidays.update({dt: name})
+def warm_cache(years: Optional[range] = None):
+    """
+    Builds the calendars for all `HOLIDAY_LOCATIONS` so the first requests don't have to
+    Defaults to last year to next year, which covers all the holiday pages
+    """
+    if years is None:
+        this_year = date.today().year
+        years = range(this_year - 1, this_year + 2)
+
+    for location in HOLIDAY_LOCATIONS:
+        country, region = location.split("/", 2)
+        for year in years:
+            calendar(country, region, year)
 
-    return dict(sorted(previous_holidays.items()))
+    logger.debug(f"Warmed holiday calendars for {len(HOLIDAY_LOCATIONS)} locations")
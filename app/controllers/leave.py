@@ -5,7 +5,7 @@ import sqlalchemy as sa
 from flask import abort
 
 from app import db
-from app.controllers import settings
+from app.controllers import core, data_version, overtime, settings
 from app.controllers.user.util import get_user
 from app.models import Leave
 
@@ -20,8 +20,13 @@ def delete(row_id: int) -> bool:
     Returns True if deleted and False if not
     """
     if record := db.session.scalars(sa.select(Leave).filter(Leave.id == row_id, Leave.user == get_user())).first():
+        start = record.start
+        overtime.invalidate(start)
         db.session.delete(record)
         db.session.commit()
+
+        core.invalidate_first_record(start)
+        data_version.bump()
         return True
     return False
 
@@ -39,9 +44,13 @@ def create(leave_type: str, start: int, duration: float, note: str = "", public_
         user_id=get_user().id,
         public_holiday=public_holiday,
     )
+    overtime.invalidate(start_dt)
     db.session.add(leave)
     db.session.commit()
 
+    core.invalidate_first_record(start_dt)
+    data_version.bump()
+
     return leave
 
 
@@ -56,6 +65,8 @@ def update(
     _tz = _settings.timezone
     start_dt = arrow.get(start, tzinfo=_tz).int_timestamp
 
+    moved_from = min(leave.start, start_dt)
+    overtime.invalidate(moved_from)
     leave.leave_type = leave_type
     leave.start = start_dt
     leave.duration = duration
@@ -63,6 +74,9 @@ def update(
     leave.public_holiday = public_holiday
     db.session.commit()
 
+    core.invalidate_first_record(moved_from)
+    data_version.bump()
+
     return leave
 
 
@@ -100,11 +114,18 @@ def all_for_week(week: Optional[str] = None) -> Sequence[Leave]:
     week_end = week_start.shift(days=7)
 
     return db.session.scalars(
+        _all_for_week_statement(get_user().id, week_start.int_timestamp, week_end.int_timestamp)
+    ).all()
+
+
+def _all_for_week_statement(user_id: int, start: int, end: int) -> sa.Select:
+    return (
         sa.select(Leave)
+        .options(*Leave.eager_load())
         .filter(
-            Leave.user == get_user(),
-            Leave.start >= week_start.int_timestamp,
-            Leave.start < week_end.int_timestamp,
+            Leave.user_id == user_id,
+            Leave.start >= start,
+            Leave.start < end,
         )
         .order_by(Leave.start.desc(), Leave.id.desc())
-    ).all()
+    )
@@ -0,0 +1,130 @@
+"""
+Keeps a per-user checkpoint of the time logged before the start of the current week
+
+Working out the all time overtime needs the total time logged since the first record.
+Rather than summing every record on each request we store the total for all records that
+started before a point in time and only sum the records since then.
+
+Any write to a time, break or leave record that starts before the checkpoint must call `invalidate()`
+so the checkpoint is rebuilt on the next read.
+
+Every invalidation bumps the checkpoint's `version` and a checkpoint is only saved if the version is the same
+as when it was read, so a total worked out while another request was writing is never saved.
+"""
+
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.controllers.user.util import get_user
+from app.lib.logger import get_logger
+from app.models import OvertimeCheckpoint, Time
+
+logger = get_logger(__name__)
+
+
+def invalidate(since: Optional[int] = None, user_id: Optional[int] = None):
+    """
+    Resets the checkpoint if it covers a record starting at `since`
+    If `since` is not passed then the checkpoint is always reset
+    `user_id` defaults to the logged in user
+
+    The version is always bumped, so a checkpoint being worked out at the same time isn't saved
+
+    This does not commit, it should be called before the write it relates to is committed
+    """
+    # A checkpoint at 0 has nothing before it, so is rebuilt from the start
+    reset = sa.true() if since is None else OvertimeCheckpoint.until > since
+    query = (
+        insert(OvertimeCheckpoint)
+        .values(user_id=user_id or get_user().id, until=0, logged=0, version=1)
+        .on_conflict_do_update(
+            index_elements=[OvertimeCheckpoint.user_id],
+            set_={
+                "until": sa.case((reset, 0), else_=OvertimeCheckpoint.until),
+                "logged": sa.case((reset, 0), else_=OvertimeCheckpoint.logged),
+                "version": OvertimeCheckpoint.version + 1,
+            },
+        )
+    )
+
+    db.session.execute(query)
+
+
+def logged_before(until: int) -> tuple[int, int]:
+    """
+    Returns a tuple of (checkpoint, logged)
+    `logged` is the total seconds logged by all records that started before `checkpoint`
+
+    The checkpoint will be `until` unless there is an open time record before it,
+    open records are still growing so the checkpoint is never moved past them
+    The caller is expected to add on anything logged from `checkpoint` onwards
+    """
+    user = get_user()
+
+    first_open = db.session.scalar(_first_open_statement(user.id))
+    if first_open is not None and first_open < until:
+        until = first_open
+
+    # Read before the records are summed, so any write after this changes the version
+    checkpoint = db.session.execute(
+        sa.select(OvertimeCheckpoint.until, OvertimeCheckpoint.logged, OvertimeCheckpoint.version).filter(
+            OvertimeCheckpoint.user_id == user.id
+        )
+    ).first()
+
+    if checkpoint and checkpoint.until == until:
+        return checkpoint.until, checkpoint.logged
+
+    # If the checkpoint is behind then we only need to add on the records since then
+    # Otherwise start again from the beginning
+    if checkpoint and checkpoint.until < until:
+        logged = checkpoint.logged + _logged_between(checkpoint.until, until)
+    else:
+        logged = _logged_between(0, until)
+
+    _save(user.id, until, logged, read_version=checkpoint.version if checkpoint else 0)
+    return until, logged
+
+
+def _save(user_id: int, until: int, logged: int, read_version: int):
+    """
+    Saves the checkpoint unless it has been invalidated or saved by another request since `read_version` was read
+    Either way the total is still right for this request, the next read works it out again if needed
+    """
+    query = (
+        insert(OvertimeCheckpoint)
+        .values(user_id=user_id, until=until, logged=logged, version=read_version + 1)
+        .on_conflict_do_update(
+            index_elements=[OvertimeCheckpoint.user_id],
+            set_={"until": until, "logged": logged, "version": OvertimeCheckpoint.version + 1},
+            where=OvertimeCheckpoint.version == read_version,
+        )
+    )
+
+    # This runs on GET requests, so if the database is busy just skip saving rather than fail the request
+    try:
+        db.session.execute(query)
+        db.session.commit()
+    except OperationalError:
+        logger.info(f"Overtime checkpoint for user {user_id} not saved, the database is busy")
+        db.session.rollback()
+
+
+def _logged_between(start: int, end: int) -> int:
+    """
+    Returns the total seconds logged by records that started on or after `start` and before `end`
+    """
+    from app.controllers.core import logged_between
+
+    return logged_between(start, end)
+
+
+def _first_open_statement(user_id: int) -> sa.Select:
+    return sa.select(sa.func.min(Time.start)).filter(
+        Time.user_id == user_id,
+        Time.end == None,
+    )
@@ -1,5 +1,7 @@
+from typing import Optional
+
 import sqlalchemy as sa
-from flask import abort
+from flask import g
 
 from app import db
 from app.lib.logger import get_logger
@@ -7,24 +9,39 @@ from app.models import Settings
 
 logger = get_logger(__name__)
 
+# How long settings are cached for in seconds
+# Changes always clear the cache, this just stops unused settings hanging around
+CACHE_TIMEOUT = 86400
+
 
 def fetch() -> Settings:
+    """
+    Returns the settings for the current user
+
+    Settings are needed on almost every request so they are cached
+    - On `flask.g` for the rest of the request
+    - In the redis cache between requests, until `update()` is called
+
+    NOTE: The returned settings may not be attached to the database session so should be treated as read only
+    """
     from app.controllers.user.util import get_user
 
+    if "settings" in g:
+        return g.settings
+
     user = get_user()
-    settings = db.session.scalars(sa.select(Settings).filter(Settings.user == user)).first()
 
+    settings = _get_cached(user.id)
     if not settings:
-        # These are the default settings
-        settings = Settings(
-            timezone="Europe/London",
-            week_start=1,  # Monday
-            hours_per_day=7.5,
-            work_days="MTWTF--",
-            user_id=user.id,
-        )
-        db.session.add(settings)
-        db.session.commit()
+        settings = db.session.scalars(_fetch_statement(user.id)).first()
+
+        if settings:
+            _set_cached(settings)
+        else:
+            # Settings are created on registration, this is only for accounts older than that
+            settings = Settings.default(user.id)
+
+    g.settings = settings
     return settings
 
 
@@ -33,10 +50,11 @@ def update(**values):
     from app.controllers.user.util import get_user
 
     user = get_user()
-    settings = db.session.scalars(sa.select(Settings).filter(Settings.user == user)).first()
+    settings = db.session.scalars(_fetch_statement(user.id)).first()
 
     if not settings:
-        abort(403)
+        settings = Settings.default(user.id)
+        db.session.add(settings)
 
     work_days = []
     has_work_days = False
@@ -52,9 +70,64 @@ def update(**values):
     if has_work_days:
         values["work_days"] = "".join(work_days)
 
+    # Leave is converted to time using `hours_per_day` so the overtime checkpoint needs rebuilding
+    if "hours_per_day" in values and float(values["hours_per_day"]) != settings.hours_per_day:
+        from app.controllers import overtime
+
+        overtime.invalidate()
+
     settings.update(**values)
     db.session.commit()
 
+    clear_cache(user.id)
+    g.settings = settings
+
+    # The frames are rendered using the settings so they need refreshing too
+    from app.controllers import data_version
+
+    data_version.bump()
+
+
+def clear_cache(user_id: int):
+    """
+    Removes the cached settings for a user
+    Must be called after anything changes the settings row
+    """
+    from app.lib.redis import cache
+
+    cache.delete(_cache_key(user_id))
+    g.pop("settings", None)
+
+
+def _cache_key(user_id: int) -> str:
+    return f"settings:{user_id}"
+
+
+def _get_cached(user_id: int) -> Optional[Settings]:
+    """
+    Returns the settings from the redis cache if they are there
+    These are not attached to the database session
+    """
+    import json
+
+    from app.lib.redis import cache
+
+    if cached := cache.get(_cache_key(user_id)):
+        return Settings(**json.loads(cached))  # type: ignore
+    return None
+
+
+def _set_cached(settings: Settings):
+    import json
+
+    from app.lib.redis import cache
+
+    cache.set(_cache_key(settings.user_id), json.dumps(settings.asdict()), ex=CACHE_TIMEOUT)
+
+
+def _fetch_statement(user_id: int) -> sa.Select:
+    return sa.select(Settings).filter(Settings.user_id == user_id)
+
 
 def add_whats_new(title: str, content: str):
     import arrow
@@ -1,32 +1,111 @@
-import requests
+"""
+Updates a user's slack status when they start and end breaks
 
+Updates are not sent during the request, they are queued in redis and sent by a worker (`flask slack worker`)
+Only the latest status for each user is kept so if a user toggles their break quickly only the last status is sent
+"""
+
+import json
+from typing import Optional
+
+import sqlalchemy as sa
+
+from app import db
 from app.controllers import settings
 from app.controllers.user.util import get_user
+from app.lib.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUE_KEY = "slack:queue"
+
+# A user is marked as pending while they are in the queue so they are only queued once
+# The mark expires in case the worker dies before clearing it, otherwise the user's updates would never be queued again
+PENDING_TTL = 300
 
 
 def update_status(on_break: bool):
+    """
+    Queues an update of the current user's status in all connected slack workspaces
+    """
+    from app.lib.redis import queue
+
     user = get_user()
     _settings = settings.fetch()
     if not _settings.auto_update_slack_status:
         return
 
+    queue.set(_status_key(user.id), json.dumps({"on_break": on_break}))
+
+    # The user is only queued once, the worker will send whatever the latest status is
+    if queue.set(_pending_key(user.id), 1, nx=True, ex=PENDING_TTL):
+        queue.lpush(QUEUE_KEY, user.id)
+
+
+def process_queue(timeout: int = 5) -> Optional[int]:
+    """
+    Waits up to `timeout` seconds for a queued update and sends it
+    Returns the ID of the user that was updated or None if nothing was queued
+    """
+    from app.lib.redis import queue
+
+    item = queue.brpop([QUEUE_KEY], timeout=timeout)
+    if not item:
+        return None
+
+    user_id = int(item[1])
+
+    # Remove from pending before reading the status so any newer status will queue the user again
+    queue.delete(_pending_key(user_id))
+
+    if status := queue.get(_status_key(user_id)):
+        send_status(user_id, on_break=json.loads(status)["on_break"])
+
+    return user_id
+
+
+def send_status(user_id: int, on_break: bool):
+    """
+    Sends the status to every slack workspace the user has connected
+    """
+    from app.lib.http import DEFAULT_TIMEOUT, get_session
+    from app.models import UserToSlackToken
+
     message, emoji = ("Away", ":running:")
     if not on_break:
         message, emoji = ("", "")
 
-    # Update all connected accounts
-    for token in user.slack_tokens:
-        requests.post(
-            "https://slack.com/api/users.profile.set",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": "Bearer " + token.slack_token,
-            },
-            json={
-                "profile": {
-                    "status_text": message,
-                    "status_emoji": emoji,
-                    "status_expiration": 0,
+    tokens = db.session.scalars(sa.select(UserToSlackToken).filter(UserToSlackToken.user_id == user_id)).all()
+
+    for token in tokens:
+        try:
+            response = get_session().post(
+                "https://slack.com/api/users.profile.set",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": "Bearer " + token.slack_token,
                 },
-            },
-        )
+                json={
+                    "profile": {
+                        "status_text": message,
+                        "status_emoji": emoji,
+                        "status_expiration": 0,
+                    },
+                },
+                timeout=DEFAULT_TIMEOUT,
+            )
+
+            if not response.json().get("ok"):
+                logger.warning(
+                    f"Failed to update slack status for user {user_id} in {token.team_name}: {response.text}"
+                )
+        except Exception as e:
+            logger.exception(e)
+
+
+def _status_key(user_id: int) -> str:
+    return f"slack:status:{user_id}"
+
+
+def _pending_key(user_id: int) -> str:
+    return f"slack:pending:{user_id}"
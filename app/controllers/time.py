@@ -5,7 +5,7 @@ import sqlalchemy as sa
 from flask import abort
 
 from app import db
-from app.controllers import settings, slack
+from app.controllers import core, data_version, overtime, settings, slack
 from app.controllers.user.util import get_user
 from app.lib.logger import get_logger
 from app.models import Break, Time
@@ -23,41 +23,21 @@ def get(row_id: str) -> Time:
 def all() -> Sequence[Time]:
     """Return all time records sorted by start date"""
 
-    return db.session.scalars(
-        sa.select(Time)
-        .filter(
-            Time.user == get_user(),
-        )
-        .order_by(Time.start.desc(), Time.id.desc())
-    ).all()
+    return db.session.scalars(_all_statement(get_user().id)).all()
 
 
 def current() -> Optional[Time]:
     """
     Return the current clocked in time record (if there is one)
     """
-    return db.session.scalars(
-        sa.select(Time)
-        .filter(
-            Time.user == get_user(),
-            Time.end == None,
-        )
-        .order_by(Time.start.desc())
-    ).first()
+    return db.session.scalars(_current_statement(get_user().id)).first()
 
 
 def current_break() -> Optional[Break]:
     """
     Return the current clocked in break record (if there is one)
     """
-    return db.session.scalars(
-        sa.select(Break)
-        .filter(
-            Break.time.has(user=get_user()),
-            Break.end == None,
-        )
-        .order_by(Break.start.desc())
-    ).first()
+    return db.session.scalars(_current_break_statement(get_user().id)).first()
 
 
 def all_for_week(week: Optional[str] = None) -> Sequence[Time]:
@@ -91,13 +71,7 @@ def all_for_week(week: Optional[str] = None) -> Sequence[Time]:
 
     week_end = week_start.shift(days=7)
     return db.session.scalars(
-        sa.select(Time)
-        .filter(
-            Time.user == get_user(),
-            Time.start >= week_start.int_timestamp,
-            Time.start < week_end.int_timestamp,
-        )
-        .order_by(Time.start.desc(), Time.id.desc())
+        _all_for_week_statement(get_user().id, week_start.int_timestamp, week_end.int_timestamp)
     ).all()
 
 
@@ -119,11 +93,38 @@ def create(start: str, end: Optional[str] = None, note: str = "") -> Time:
         user_id=get_user().id,
     )
 
+    overtime.invalidate(start_dt)
     db.session.add(new_record)
     db.session.commit()
+
+    core.invalidate_first_record(start_dt)
+    data_version.bump()
     return new_record
 
 
+def check_owner(time_id: str, break_ids: Sequence[str] = ()):
+    """
+    Aborts with a 403 unless the time record and all of the breaks belong to the current user
+    Used to check a whole edit with one query before any of it is written
+    """
+    user_id = get_user().id
+    break_ids = {int(break_id) for break_id in break_ids}
+
+    owned_time, owned_breaks = db.session.execute(
+        sa.select(
+            sa.select(sa.func.count()).where(Time.id == time_id, Time.user_id == user_id).scalar_subquery(),
+            sa.select(sa.func.count())
+            .select_from(Break)
+            .join(Time, Break.time_id == Time.id)
+            .where(Break.id.in_(break_ids), Time.user_id == user_id)
+            .scalar_subquery(),
+        )
+    ).one()
+
+    if not owned_time or owned_breaks != len(break_ids):
+        abort(403)
+
+
 def update(row_id: str, start: str, end: Optional[str] = None, note: str = "") -> Time:
     _settings = settings.fetch()
     _tz = _settings.timezone
@@ -138,11 +139,16 @@ def update(row_id: str, start: str, end: Optional[str] = None, note: str = "") -
     if not t:
         abort(403)
 
+    moved_from = min(t.start, start_dt)
+    overtime.invalidate(moved_from)
     t.start = start_dt
     t.end = end_dt
     t.note = note
 
     db.session.commit()
+
+    core.invalidate_first_record(moved_from)
+    data_version.bump()
     return t
 
 
@@ -152,8 +158,13 @@ def delete(row_id: int) -> bool:
     Returns True if deleted and False if not
     """
     if record := db.session.scalars(sa.select(Time).filter(Time.id == row_id, Time.user == get_user())).first():
+        start = record.start
+        overtime.invalidate(start)
         db.session.delete(record)
         db.session.commit()
+
+        core.invalidate_first_record(start)
+        data_version.bump()
         return True
     return False
 
@@ -165,19 +176,14 @@ def clock_out(end: str):
 
     end_dt = arrow.get(end, tzinfo=_tz)
 
-    current_record = db.session.scalars(
-        sa.select(Time)
-        .filter(
-            Time.user == get_user(),
-            Time.end == None,
-        )
-        .order_by(Time.start.desc())
-    ).first()
+    current_record = db.session.scalars(_current_statement(get_user().id)).first()
 
     if current_record:
         break_end(end)  # If clocking out, call end break function
+        overtime.invalidate(current_record.start)
         current_record.end = end_dt.int_timestamp
         db.session.commit()
+        data_version.bump()
 
 
 def break_start(start: str):
@@ -187,18 +193,12 @@ def break_start(start: str):
 
     start_dt = arrow.get(start, tzinfo=_tz)
 
-    current_record = db.session.scalars(
-        sa.select(Time)
-        .filter(
-            Time.user == get_user(),
-            Time.end == None,
-        )
-        .order_by(Time.start.desc())
-    ).first()
+    current_record = db.session.scalars(_current_statement(get_user().id)).first()
 
     if not current_record:
         return
 
+    overtime.invalidate(current_record.start)
     db.session.add(
         Break(
             time_id=current_record.id,
@@ -207,6 +207,7 @@ def break_start(start: str):
     )
 
     db.session.commit()
+    data_version.bump()
     slack.update_status(on_break=True)
 
 
@@ -217,52 +218,59 @@ def break_end(end: str):
 
     end_dt = arrow.get(end, tzinfo=_tz)
 
-    current_record = db.session.scalars(
-        sa.select(Time)
-        .filter(
-            Time.user == get_user(),
-            Time.end == None,
-        )
-        .order_by(Time.start.desc())
-    ).first()
+    current_record = db.session.scalars(_current_statement(get_user().id)).first()
 
     if not current_record:
         return
 
-    current_break = db.session.scalars(
-        sa.select(Break).filter(
-            Break.time_id == current_record.id,
-            Break.end == None,
-        )
-    )
-
-    if brk := current_break.first():
+    if brk := db.session.scalars(_break_end_statement(current_record.id)).first():
+        overtime.invalidate(current_record.start)
         brk.end = end_dt.int_timestamp
 
     db.session.commit()
+    data_version.bump()
     slack.update_status(on_break=False)
 
 
 def add_break(time_id: str, break_start: str, break_end: str | None):
-    time_record = db.session.scalars(sa.select(Time).filter(Time.id == time_id, Time.user == get_user())).first()
-    if not time_record:
-        abort(403)
+    add_breaks(time_id, [(break_start, break_end)])
 
-    _settings = settings.fetch()
-    _tz = _settings.timezone
 
-    start_dt = arrow.get(break_start, tzinfo=_tz)
-    end_dt = arrow.get(break_end, tzinfo=_tz) if break_end else None
+def add_breaks(time_id: str, breaks: Sequence[tuple[str, str | None]]):
+    """
+    Adds breaks to a time record with a single insert
 
-    db.session.add(
-        Break(
-            time_id=time_record.id,
-            start=start_dt.int_timestamp,
-            end=end_dt.int_timestamp if end_dt else None,
+    `breaks`: A list of (start, end) tuples, end can be None for a break that has not finished
+    """
+    if not breaks:
+        return
+
+    time_start = db.session.scalar(sa.select(Time.start).filter(Time.id == time_id, Time.user_id == get_user().id))
+    if time_start is None:
+        abort(403)
+
+    tz = _tzinfo()
+
+    overtime.invalidate(time_start)
+    db.session.execute(
+        sa.insert(Break).values(
+            [
+                {
+                    "time_id": int(time_id),
+                    "start": arrow.get(start, tzinfo=tz).int_timestamp,
+                    "end": arrow.get(end, tzinfo=tz).int_timestamp if end else None,
+                }
+                for start, end in breaks
+            ]
         )
     )
 
     db.session.commit()
+    data_version.bump()
+
+
+# The columns that can be changed by `bulk_update()`
+BULK_UPDATE_COLUMNS = ("start", "end", "note")
 
 
 def bulk_update(table, data: dict[int, dict]):
@@ -271,18 +279,117 @@ def bulk_update(table, data: dict[int, dict]):
 
     `table`: "time" or "break"
     `data`: A dict of {row_id: {column1: value1, column2: value2}}
+
+    The rows are checked in one query and updated in one executemany, so this runs the same number of statements
+    however many rows there are. Aborts with a 403 if any of the rows don't belong to the current user.
     """
-    _settings = settings.fetch()
-    _tz = _settings.timezone
+    if not data:
+        return
 
     model = Time if table == "time" else Break
+    tz = _tzinfo()
+
+    # The start of each row's time record, which is the row itself for times
+    if model is Time:
+        query = sa.select(Time.id, Time.start).filter(Time.id.in_(data.keys()), Time.user_id == get_user().id)
+    else:
+        query = (
+            sa.select(Break.id, Time.start)
+            .join(Time, Break.time_id == Time.id)
+            .filter(Break.id.in_(data.keys()), Time.user_id == get_user().id)
+        )
 
+    time_starts = {row_id: start for row_id, start in db.session.execute(query)}
+    if len(time_starts) != len({int(row_id) for row_id in data}):
+        abort(403)
+
+    rows = []
     for row_id, values in data.items():
-        row = db.session.scalars(sa.select(model).filter_by(id=row_id)).one()
+        row = {"id": int(row_id)}
+
         for key, value in values.items():
+            if key not in BULK_UPDATE_COLUMNS:
+                continue
+
             # Convert string dates to int timestamps
             if key in ("start", "end") and value:
-                value = arrow.get(value, tzinfo=_tz).int_timestamp
-            setattr(row, key, value if value else None)
+                value = arrow.get(value, tzinfo=tz).int_timestamp
+            row[key] = value if value else None
+
+        rows.append(row)
+
+    earliest = min(time_starts.values())
+    if model is Time:
+        earliest = min([earliest, *(row["start"] for row in rows if row.get("start"))])
+
+    overtime.invalidate(earliest)
 
+    # Rows with the same columns are sent as one executemany
+    db.session.execute(sa.update(model), rows)
     db.session.commit()
+
+    if model is Time:
+        core.invalidate_first_record(earliest)
+
+    data_version.bump()
+
+
+def _tzinfo():
+    """
+    The user's timezone, looked up once so it isn't parsed for every value converted with arrow
+    """
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo(settings.fetch().timezone)
+
+
+def _all_statement(user_id: int) -> sa.Select:
+    return (
+        sa.select(Time)
+        .options(*Time.eager_load())
+        .filter(Time.user_id == user_id)
+        .order_by(Time.start.desc(), Time.id.desc())
+    )
+
+
+def _all_for_week_statement(user_id: int, start: int, end: int) -> sa.Select:
+    return (
+        sa.select(Time)
+        .options(*Time.eager_load())
+        .filter(
+            Time.user_id == user_id,
+            Time.start >= start,
+            Time.start < end,
+        )
+        .order_by(Time.start.desc(), Time.id.desc())
+    )
+
+
+def _current_statement(user_id: int) -> sa.Select:
+    return (
+        sa.select(Time)
+        .filter(
+            Time.user_id == user_id,
+            Time.end == None,
+        )
+        .order_by(Time.start.desc())
+    )
+
+
+def _current_break_statement(user_id: int) -> sa.Select:
+    return (
+        sa.select(Break)
+        .join(Time, Break.time_id == Time.id)
+        .filter(
+            Time.user_id == user_id,
+            Break.end == None,
+        )
+        .order_by(Break.start.desc())
+    )
+
+
+def _break_end_statement(time_id: int) -> sa.Select:
+    return sa.select(Break).filter(
+        Break.time_id == time_id,
+        Break.end == None,
+    )
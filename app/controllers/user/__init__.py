@@ -1,3 +1,5 @@
+from typing import Iterator, Optional
+
 import sqlalchemy as sa
 from flask import current_app as app
 from flask import render_template
@@ -5,8 +7,15 @@ from flask import render_template
 from app import db
 from app.controllers.user.exceptions import UserAlreadyExistsError, UserAuthFailed, UserNotVerifiedError
 from app.controllers.user.token import create_token
+from app.controllers.user.util import forget_user
 from app.lib.email import send_email
-from app.models import LoginSession, User
+from app.models import LoginSession, Settings, User
+
+# The number of records loaded at a time when exporting data
+EXPORT_CHUNK_SIZE = 500
+
+# The number of expired login sessions deleted in each transaction
+SESSION_PURGE_BATCH_SIZE = 500
 
 
 def register(email: str, password: str) -> User:
@@ -34,9 +43,12 @@ def register(email: str, password: str) -> User:
         )
         raise UserAlreadyExistsError(email)
 
-    # Otherwise create the new user
+    # Otherwise create the new user along with their default settings
     new_user = User(email=email).set_password(password)
     db.session.add(new_user)
+    db.session.flush()
+
+    db.session.add(Settings.default(new_user.id))
     db.session.commit()
 
     verify_token = create_token(
@@ -69,8 +81,6 @@ def login(email: str, password: str) -> LoginSession:
 
     import arrow
 
-    from app.lib.util.security import generate_csrf_token
-
     user = db.session.scalars(sa.select(User).filter_by(email=email)).one_or_none()
 
     if not user:
@@ -83,9 +93,6 @@ def login(email: str, password: str) -> LoginSession:
     if not ok:
         raise UserAuthFailed("Password mismatch")
 
-    # Generate a new CSRF token for this session
-    generate_csrf_token(user.id)
-
     # Log in
     session = LoginSession(
         key=secrets.token_hex(),
@@ -96,24 +103,78 @@ def login(email: str, password: str) -> LoginSession:
     # Set the last login time
     user.last_login_at = arrow.utcnow().int_timestamp
 
-    # Clean up any expired sessions
-    now = arrow.utcnow().int_timestamp
-    db.session.execute(sa.delete(LoginSession).where(LoginSession.expires < now))
-
     db.session.add(session)
     db.session.commit()
+
+    forget_user()
     return session
 
 
 def logout():
     from flask import session as flask_session
 
+    from app.controllers.user import session_cache
+
     if login_session_key := flask_session.get("login_session_key"):
         if login_session := db.session.scalars(sa.select(LoginSession).filter_by(key=login_session_key)).first():
             db.session.delete(login_session)
             db.session.commit()
+        session_cache.invalidate(login_session_key)
         flask_session.pop("login_session_key")
 
+    forget_user()
+
+
+def purge_expired_sessions(batch_size: int = SESSION_PURGE_BATCH_SIZE) -> int:
+    """
+    Deletes the expired login sessions and returns how many were deleted
+
+    This is run by `flask sessions purge` rather than on login.
+    Each batch is its own transaction so the write lock is only held briefly.
+    """
+    import arrow
+
+    now = arrow.utcnow().int_timestamp
+    purged = 0
+
+    while True:
+        deleted = db.session.execute(_purge_batch_statement(now, batch_size)).rowcount
+        db.session.commit()
+
+        purged += deleted
+        if deleted < batch_size:
+            return purged
+
+
+def _purge_batch_statement(now: int, batch_size: int) -> sa.Delete:
+    """
+    Builds the delete for one batch of `purge_expired_sessions()`
+    Uses `ix_login_session_expires` so only the expired rows are read
+    """
+    batch = (
+        sa.select(LoginSession.id).where(LoginSession.expires < now).order_by(LoginSession.expires).limit(batch_size)
+    )
+    return sa.delete(LoginSession).where(LoginSession.id.in_(batch))
+
+
+def change_password(user: User, password: str, keep_session: Optional[str] = None):
+    """
+    Changes a user's password and logs out all of their login sessions, except `keep_session` if passed
+    """
+    from app.controllers.user import session_cache
+
+    query = sa.select(LoginSession.key).filter(LoginSession.user_id == user.id)
+    if keep_session:
+        query = query.filter(LoginSession.key != keep_session)
+
+    revoked = list(db.session.scalars(query))
+    db.session.execute(sa.delete(LoginSession).where(LoginSession.key.in_(revoked)))
+
+    # Commits
+    user.set_password(password)
+
+    session_cache.invalidate(*revoked)
+
 
 def send_password_reset(email: str):
     """
@@ -186,30 +247,78 @@ def delete_account(user: User):
     """
     from app.models import User
 
+    from app.controllers import core, settings
+    from app.controllers.user import session_cache
+
+    # The cascade deletes the login sessions, so get their keys first to log out everywhere once it's committed
+    revoked = list(db.session.scalars(sa.select(LoginSession.key).filter(LoginSession.user_id == user.id)))
+
     # We have cascading deletes :)
     user = db.session.scalars(sa.select(User).where(User.id == user.id)).one()
     db.session.delete(user)
     db.session.commit()
 
+    session_cache.invalidate(*revoked)
+    settings.clear_cache(user.id)
+    core.clear_first_record(user.id)
+
 
-def export_data(user: User) -> str:
+def export_data(user: User) -> Iterator[str]:
+    """
+    Exports all of a user's data as JSON
+
+    This is a generator that yields the JSON a piece at a time, records are loaded from the database
+    in chunks of `EXPORT_CHUNK_SIZE` so memory use stays the same no matter how much history there is
+    """
     import json
 
-    from app.controllers import settings, time
+    from sqlalchemy.orm import selectinload
 
-    time_records = []
-    for t in time.all():
-        rec = t.asdict(exclude=["id", "user"])
-        rec["breaks"] = []
-        for brk in t.breaks:
-            rec["breaks"].append(brk.asdict(exclude=["id", "time"]))
+    from app.controllers import settings
+    from app.models import Leave, Time
+
+    def records(query, to_dict) -> Iterator[str]:
+        chunk = []
+        for rec in db.session.scalars(query.execution_options(yield_per=EXPORT_CHUNK_SIZE)):
+            chunk.append(json.dumps(to_dict(rec)))
+
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                yield ",".join(chunk)
+                chunk = []
 
-        time_records.append(rec)
+        if chunk:
+            yield ",".join(chunk)
 
-    export = {
-        "time": time_records,
-        "settings": settings.fetch().asdict(exclude=["id", "user"]),
-        "user": user.asdict(exclude=["id", "password", "settings"]),
-    }
+    def time_to_dict(t: Time) -> dict:
+        rec = t.asdict(exclude=["id", "user"])
+        rec["breaks"] = [brk.asdict(exclude=["id", "time"]) for brk in t.breaks]
+        return rec
+
+    def with_separators(chunks: Iterator[str]) -> Iterator[str]:
+        for i, chunk in enumerate(chunks):
+            yield chunk if i == 0 else "," + chunk
+
+    yield '{"time": ['
+    yield from with_separators(
+        records(
+            sa.select(Time)
+            .options(selectinload(Time.breaks))
+            .filter(Time.user_id == user.id)
+            .order_by(Time.start.desc(), Time.id.desc()),
+            time_to_dict,
+        )
+    )
+
+    yield '], "leave": ['
+    yield from with_separators(
+        records(
+            sa.select(Leave).filter(Leave.user_id == user.id).order_by(Leave.start.desc(), Leave.id.desc()),
+            lambda leave: leave.asdict(exclude=["id", "user"]),
+        )
+    )
 
-    return json.dumps(export)
+    yield '], "settings": '
+    yield json.dumps(settings.fetch().asdict(exclude=["id", "user"]))
+    yield ', "user": '
+    yield json.dumps(user.asdict(exclude=["id", "password", "settings"]))
+    yield "}"
@@ -0,0 +1,141 @@
+"""
+Caches login session lookups so authenticating a request doesn't need the database
+
+Each login session key maps to a `CachedSession` of (user_id, expires, is_admin), held in the redis session db
+for up to `REDIS_TTL` seconds. The cache is shared by all the gunicorn workers and there is no copy in each worker,
+so a login session that is revoked in one worker is revoked in all of them straight away.
+
+Anything that ends a login session must call `invalidate()` after committing.
+That also leaves a short lived revocation marker, so a request that loaded the login session from the database
+just before it was deleted can't put it back in the cache.
+"""
+
+import time
+from typing import NamedTuple, Optional
+
+import sqlalchemy as sa
+from redis.exceptions import WatchError
+
+from app import db
+from app.models import LoginSession, User
+
+# How long an entry stays in redis, changes to `User.is_admin` are picked up after this
+REDIS_TTL = 3600
+
+# How long a revoked login session can't be cached for, this only needs to cover loading it from the database
+REVOKED_TTL = 60
+
+
+class CachedSession(NamedTuple):
+    user_id: int
+    expires: int
+    is_admin: bool
+
+
+def _redis_key(login_session_key: str) -> str:
+    return f"login_session:{login_session_key}"
+
+
+def _revoked_key(login_session_key: str) -> str:
+    return f"login_session_revoked:{login_session_key}"
+
+
+def get(login_session_key: str) -> Optional[CachedSession]:
+    """
+    Returns the login session for `login_session_key` or None if it does not exist or has expired
+    """
+    now = time.time()
+
+    cached = _get_redis(login_session_key)
+    if not cached:
+        cached = _load(login_session_key)
+        if cached:
+            _set_redis(login_session_key, cached, now)
+
+    if not cached:
+        return None
+
+    if cached.expires < now:
+        invalidate(login_session_key)
+        return None
+
+    return cached
+
+
+def invalidate(*login_session_keys: str):
+    """
+    Removes login sessions from the cache and revokes their event stream tokens
+    """
+    from app.lib import events
+    from app.lib.redis import session
+
+    if not login_session_keys:
+        return
+
+    with session.pipeline() as pipe:
+        for key in login_session_keys:
+            pipe.set(_revoked_key(key), 1, ex=REVOKED_TTL)
+        pipe.delete(*(_redis_key(key) for key in login_session_keys))
+        pipe.execute()
+
+    events.revoke(*login_session_keys)
+
+
+def _load(login_session_key: str) -> Optional[CachedSession]:
+    row = db.session.execute(_load_statement(login_session_key)).first()
+
+    if not row:
+        return None
+
+    return CachedSession(user_id=row.user_id, expires=row.expires, is_admin=bool(row.is_admin))
+
+
+def _load_statement(login_session_key: str) -> sa.Select:
+    """
+    Builds the query for `_load()`
+    """
+    return (
+        sa.select(LoginSession.user_id, LoginSession.expires, User.is_admin)
+        .join(User, User.id == LoginSession.user_id)
+        .filter(LoginSession.key == login_session_key)
+    )
+
+
+def _get_redis(login_session_key: str) -> Optional[CachedSession]:
+    from app.lib.redis import session
+
+    values = session.hgetall(_redis_key(login_session_key))
+    if not values:
+        return None
+
+    return CachedSession(
+        user_id=int(values[b"user_id"]),
+        expires=int(values[b"expires"]),
+        is_admin=values[b"is_admin"] == b"1",
+    )
+
+
+def _set_redis(login_session_key: str, cached: CachedSession, now: float):
+    from app.lib.redis import session
+
+    key = _redis_key(login_session_key)
+    revoked = _revoked_key(login_session_key)
+    ttl = max(1, min(REDIS_TTL, int(cached.expires - now)))
+
+    # Only written if the login session hasn't been revoked since it was loaded, the WATCH makes the check and
+    # the write atomic so a revocation in between fails the transaction
+    with session.pipeline() as pipe:
+        try:
+            pipe.watch(revoked)
+            if pipe.exists(revoked):
+                return
+
+            pipe.multi()
+            pipe.hset(
+                key,
+                mapping={"user_id": cached.user_id, "expires": cached.expires, "is_admin": int(cached.is_admin)},
+            )
+            pipe.expire(key, ttl)
+            pipe.execute()
+        except WatchError:
+            pass
@@ -1,48 +1,77 @@
 import typing
 from functools import wraps
+from typing import Optional
 
-import sqlalchemy as sa
-from flask import flash, redirect
+from flask import flash, g, redirect
 from flask import session as flask_session
 
 from app import db
 from app.controllers.user.exceptions import UserNotLoggedIn
-from app.models import LoginSession, User
+from app.models import User
 
 
 def get_user() -> User:
     """
     Fetch the user ID from the login session and return the User
-    """
-    import arrow
+    The login session is only looked up once per request, see `_current_user()`
 
-    if login_session_key := flask_session.get("login_session_key"):
-        if login_session := db.session.scalars(sa.select(LoginSession).filter_by(key=login_session_key)).first():
-            if login_session.expires < arrow.utcnow().int_timestamp:
-                flask_session.pop("login_session_key")
-            else:
-                return login_session.user
+    The User is only loaded from the database when an attribute other than `id` is used
+    """
+    if user := _current_user():
+        return user
     raise UserNotLoggedIn()
 
 
 def is_logged_in() -> bool:
     """Returns True if the user is logged in"""
-    from contextlib import suppress
-
-    with suppress(UserNotLoggedIn):
-        get_user()
-        return True
-    return False
+    return _current_user() is not None
 
 
 def is_admin() -> bool:
     """Returns True if the user is an admin"""
-    from contextlib import suppress
+    return _current_user() is not None and g.is_admin
 
-    with suppress(UserNotLoggedIn):
-        u = get_user()
-        return bool(u.is_admin)
-    return False
+
+def forget_user():
+    """
+    Clears the user cached for this request
+    This must be called whenever the login session key changes, eg. on login and logout
+    """
+    g.pop("user", None)
+    g.pop("is_admin", None)
+
+
+def _current_user() -> Optional[User]:
+    """
+    Returns the current User or None if not logged in
+
+    The result is cached on `flask.g` so the many calls to `get_user()`, `is_logged_in()` and `is_admin()`
+    during a request only look up the login session once
+    """
+    if "user" not in g:
+        g.user, g.is_admin = _load_user()
+    return g.user
+
+
+def _load_user() -> tuple[Optional[User], bool]:
+    """
+    Looks up the login session for the `login_session_key` in the browser session, see `session_cache`
+    If it does not exist or has expired then the key is removed from the browser session
+    """
+    from sqlalchemy.orm import make_transient_to_detached
+
+    from app.controllers.user import session_cache
+
+    if login_session_key := flask_session.get("login_session_key"):
+        if cached := session_cache.get(login_session_key):
+            # A User with just the ID set, the rest is loaded if it is used
+            user = User(id=cached.user_id)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False), cached.is_admin
+
+        flask_session.pop("login_session_key")
+
+    return None, False
 
 
 def unseen_whats_new() -> int:
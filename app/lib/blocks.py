@@ -12,9 +12,24 @@ def some_route():
 ```
 
 Calling `/greeter?block=greeting` will render only the `greeting` block within `hello.html`.
+
+Blocks that rarely change can be cached by passing a `cache_key`, which should change whenever the block would.
+Anything expensive to work out can be passed in `lazy_replacers` so it is only done when the block is rendered.
+
+```python3
+@v.get("/greeter")
+def some_route():
+    return render("hello.html", cache_key=f"{user.id}:{version}", lazy_replacers=lambda: {"name": slow_lookup()})
+```
+
+Cached blocks are kept in the redis cache and a small in-process LRU, see `FragmentCache`.
+Only blocks are cached, full pages include per-request state like flashed messages.
 """
 
+import threading
+import time
 import typing
+from collections import OrderedDict
 
 from blinker import Namespace
 from flask import current_app, render_template
@@ -56,21 +71,134 @@ def _render_block(
 jinja2_fragments_signals = Namespace()
 before_render_template_block = jinja2_fragments_signals.signal("before-render-template-block")
 template_block_rendered = jinja2_fragments_signals.signal("template-block-rendered")
+fragment_cache_hit = jinja2_fragments_signals.signal("fragment-cache-hit")
+fragment_cache_miss = jinja2_fragments_signals.signal("fragment-cache-miss")
+
+# How long cached blocks are kept for in seconds, unless `cache_timeout` is passed
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+# How many blocks each process keeps in memory
+FRAGMENT_CACHE_SIZE = 256
+
+
+class FragmentCache:
+    """
+    Rendered blocks, kept in an in-process LRU in front of the redis cache
+    Entries are never invalidated, the cache key passed by the caller should change instead
+    """
+
+    def __init__(self, maxsize: int = FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._local: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(template_name: str, block_name: str, cache_key: str) -> str:
+        import hashlib
+
+        # Hashed so whatever the caller uses in the key is not readable in redis
+        digest = hashlib.sha1(f"{template_name}:{block_name}:{cache_key}".encode()).hexdigest()
+        return f"fragment:{digest}"
+
+    def get(self, key: str) -> tuple[typing.Optional[str], typing.Optional[str]]:
+        """
+        Returns a tuple of (rendered, source) where source is "local" or "redis"
+        or (None, None) if the block is not cached
+        """
+        from app.lib.redis import cache
+
+        with self._lock:
+            if entry := self._local.get(key):
+                expires, rendered = entry
+                if expires > time.monotonic():
+                    self._local.move_to_end(key)
+                    return rendered, "local"
+
+                del self._local[key]
+
+        pipeline = cache.pipeline()
+        pipeline.get(key)
+        pipeline.ttl(key)
+        cached, ttl = pipeline.execute()
+
+        if cached is None:
+            return None, None
 
+        rendered = cached.decode()
+        self._set_local(key, rendered, ttl)
+        return rendered, "redis"
 
-def render_block(template_name: str, block_name: str, **replacers) -> str:
+    def set(self, key: str, rendered: str, timeout: int):
+        from app.lib.redis import cache
+
+        cache.set(key, rendered, ex=timeout)
+        self._set_local(key, rendered, timeout)
+
+    def clear(self):
+        """
+        Clears the in-process cache, the redis cache is left to expire
+        """
+        with self._lock:
+            self._local.clear()
+
+    def _set_local(self, key: str, rendered: str, timeout: int):
+        with self._lock:
+            self._local[key] = (time.monotonic() + max(timeout, 0), rendered)
+            self._local.move_to_end(key)
+
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+
+fragment_cache = FragmentCache()
+
+
+def render_block(
+    template_name: str,
+    block_name: str,
+    cache_key: typing.Optional[str] = None,
+    cache_timeout: int = FRAGMENT_CACHE_TIMEOUT,
+    lazy_replacers: typing.Optional[typing.Callable[[], dict]] = None,
+    **replacers,
+) -> str:
     """
     Like `flask.templating.render_template` but renders only a single block within the template.
 
     `template_name`: The name of the template to render
     `block_name`: The name of the jinja block within that template to render
+    `cache_key`: If passed the rendered block is cached, this must change whenever the block would
+                 and be different for each way the block is rendered, eg. pages that share a template
+    `cache_timeout`: How long the block is cached for in seconds
+    `lazy_replacers`: A function returning more values to replace into the template,
+                      only called if the block is rendered
     `replacers`: Any values to replace into the template
     """
     app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+    key = None
+    if cache_key is not None:
+        key = fragment_cache.key(template_name, block_name, cache_key)
+        rendered, source = fragment_cache.get(key)
+
+        if rendered is not None:
+            fragment_cache_hit.send(
+                app, template_name=template_name, block_name=block_name, cache_key=cache_key, source=source
+            )
+            return rendered
+
+        fragment_cache_miss.send(app, template_name=template_name, block_name=block_name, cache_key=cache_key)
+
+    if lazy_replacers:
+        replacers.update(lazy_replacers())
+
     app.update_template_context(replacers)
     before_render_template_block.send(app, template_name=template_name, block_name=block_name, context=replacers)
     rendered = _render_block(app.jinja_env, template_name, block_name, **replacers)
     template_block_rendered.send(app, template_name=template_name, block_name=block_name, context=replacers)
+
+    if key is not None:
+        fragment_cache.set(key, rendered, cache_timeout)
+
     return rendered
 
 
@@ -79,26 +207,58 @@ class RenderIntent:
     A RenderIntent is a simple object that contains the information needed to render a view.
     """
 
-    def __init__(self, template: str, block: typing.Optional[str] = None, **replacers):
+    def __init__(
+        self,
+        template: str,
+        block: typing.Optional[str] = None,
+        cache_key: typing.Optional[str] = None,
+        cache_timeout: int = FRAGMENT_CACHE_TIMEOUT,
+        lazy_replacers: typing.Optional[typing.Callable[[], dict]] = None,
+        **replacers,
+    ):
         self.template = template
         self.block = block
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+        self.lazy_replacers = lazy_replacers
         self.replacers = replacers
 
     def execute(self) -> str:
         if self.block:
-            return render_block(self.template, self.block, **self.replacers)
+            return render_block(
+                self.template,
+                self.block,
+                cache_key=self.cache_key,
+                cache_timeout=self.cache_timeout,
+                lazy_replacers=self.lazy_replacers,
+                **self.replacers,
+            )
+
+        if self.lazy_replacers:
+            self.replacers.update(self.lazy_replacers())
 
         return render_template(self.template, **self.replacers)
 
 
-def render(template: str, block: typing.Optional[str] = None, **replacers) -> str:
+def render(
+    template: str,
+    block: typing.Optional[str] = None,
+    cache_key: typing.Optional[str] = None,
+    cache_timeout: int = FRAGMENT_CACHE_TIMEOUT,
+    lazy_replacers: typing.Optional[typing.Callable[[], dict]] = None,
+    **replacers,
+) -> str:
     """
     Drop in replacement for `flask.templating.render_template` but supports returning a block within the template if the `?block=` querystring is passed.
     Your decorated view function should use `render()` instead of `render_template()`.
+
+    Pass `cache_key` to cache the rendered block, see `render_block()`.
     """
     from flask import request
 
-    intent = RenderIntent(template, block, **replacers)
+    intent = RenderIntent(
+        template, block, cache_key=cache_key, cache_timeout=cache_timeout, lazy_replacers=lazy_replacers, **replacers
+    )
 
     if block := request.args.get("block"):
         intent.block = block
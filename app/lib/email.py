@@ -1,4 +1,3 @@
-import sendgrid
 from flask import current_app as app
 
 from app.lib.logger import get_logger
@@ -14,6 +13,8 @@ def send_email(to_email: str, subject: str, html: str):
     `subject`: The mail subject line
     `html`: The HTML mail body
     """
+    import sendgrid
+
     message = sendgrid.Mail(
         from_email=app.config["FROM_EMAIL"],
         to_emails=to_email,
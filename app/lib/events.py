@@ -0,0 +1,233 @@
+"""
+Live updates for the dashboard with Server-Sent Events
+
+Writes publish a `changed` event to the user's redis channel (see `data_version.bump()`),
+which is passed on to any open dashboards so they refresh their frames.
+While the user is clocked in a `stats` event is also sent every `STATS_INTERVAL` so the stats stay up to date.
+
+There are two ways of serving the stream
+- `flask events serve`: an asyncio server that holds every connection on a single thread, used in production
+  by setting `EVENTS_URL` in the app config
+- `/events`: a plain Flask view, which holds a worker thread for each connection so is only served in debug mode
+
+Without either the dashboard polls instead.
+
+Both authenticate with a signed token from `make_token()` so the stream does not need the database.
+The token is tied to the login session, logging out revokes it, see `revoke()`.
+"""
+
+import hashlib
+import json
+from typing import Iterator, NamedTuple, Optional
+
+# Send a comment this often so proxies don't close idle connections
+HEARTBEAT_INTERVAL = 15
+
+# How often to send a `stats` event while clocked in
+STATS_INTERVAL = 60
+
+# How long a token is valid for, the dashboard falls back to polling once it expires
+TOKEN_MAX_AGE = 86400
+
+# How long the browser should wait before reconnecting, in milliseconds
+RETRY = 5000
+
+TOKEN_SALT = "events"
+
+# Matches the channels of all users
+CHANNEL_PATTERN = "events:*"
+
+# The digests of revoked login sessions are published here so their open streams are closed, see `revoke()`
+REVOKED_CHANNEL = "events_revoked"
+
+
+def channel(user_id: int) -> str:
+    return f"events:{user_id}"
+
+
+def publish(user_id: int, event: str, data: dict):
+    """
+    Publishes an event to anyone listening for the user
+    """
+    from app.lib.redis import cache
+
+    cache.publish(channel(user_id), json.dumps({"event": event, **data}))
+
+
+class Token(NamedTuple):
+    user_id: int
+
+    # Identifies the login session without putting its key in the URL, see `session_digest()`
+    session: str
+
+
+def session_digest(login_session_key: str) -> str:
+    return hashlib.sha256(login_session_key.encode()).hexdigest()
+
+
+def revoked_key(session: str) -> str:
+    return f"events_revoked:{session}"
+
+
+def make_token(user_id: int, login_session_key: str, secret_key: str) -> str:
+    """
+    Returns a token for the event stream of `user_id`, which is valid until `login_session_key` is revoked
+    """
+    from itsdangerous import URLSafeTimedSerializer
+
+    return URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT).dumps([user_id, session_digest(login_session_key)])
+
+
+def read_token(token: str, secret_key: str) -> Optional[Token]:
+    """
+    Returns the user ID and login session from a token or None if it is invalid or has expired
+    This doesn't check if it has been revoked
+    """
+    from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+    try:
+        user_id, session = URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT).loads(token, max_age=TOKEN_MAX_AGE)
+        return Token(int(user_id), str(session))
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+
+def revoke(*login_session_keys: str):
+    """
+    Stops the tokens for these login sessions from opening any more streams and closes any that are open
+    Called by `session_cache.invalidate()`, so whenever a login session ends
+    """
+    from app.lib.redis import cache, session
+
+    if not login_session_keys:
+        return
+
+    # Tokens expire on their own after `TOKEN_MAX_AGE` so there is no need to keep them any longer than that
+    with session.pipeline() as pipe:
+        for key in login_session_keys:
+            pipe.set(revoked_key(session_digest(key)), 1, ex=TOKEN_MAX_AGE)
+        pipe.execute()
+
+    for key in login_session_keys:
+        cache.publish(REVOKED_CHANNEL, session_digest(key))
+
+
+def is_revoked(token: Token) -> bool:
+    from app.lib.redis import session
+
+    return bool(session.exists(revoked_key(token.session)))
+
+
+def url(user_id: int, login_session_key: str) -> Optional[str]:
+    """
+    Returns the URL of the event stream for `user_id`, or None if there isn't one and the dashboard should poll
+    This is `EVENTS_URL` from the config when the asyncio server is used, or the Flask view in debug mode
+    """
+    from urllib.parse import urlencode
+
+    from flask import current_app as app
+    from flask import url_for
+
+    if app.config.get("EVENTS_URL"):
+        base = app.config["EVENTS_URL"]
+    elif app.debug:
+        base = url_for("core.events")
+    else:
+        return None
+
+    token = make_token(user_id, login_session_key, app.config["SECRET_KEY"])
+    return f"{base}?{urlencode({'token': token})}"
+
+
+def format_event(event: str, data: str = "") -> bytes:
+    """
+    Formats an event in the `text/event-stream` format
+    """
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+class Stream:
+    """
+    The state of a single event stream, shared by both servers
+
+    Call `on_message()` for each message from the user's channel and `on_tick()` at least every `HEARTBEAT_INTERVAL`,
+    they return the bytes to send to the browser
+    """
+
+    def __init__(self, running: bool, now: float):
+        self.running = running
+        self.last_sent = now
+        self.last_stats = now
+
+    def start(self) -> bytes:
+        return f"retry: {RETRY}\n\n".encode() + format_event("connected")
+
+    def on_message(self, message: bytes | str, now: float) -> bytes:
+        data = json.loads(message)
+        self.running = data.get("running", self.running)
+        self.last_sent = now
+
+        # Every frame is refreshed after a change so there is no need for a separate stats event
+        self.last_stats = now
+
+        return format_event(data.pop("event", "changed"), json.dumps(data))
+
+    def on_tick(self, now: float) -> bytes:
+        if self.running and now - self.last_stats >= STATS_INTERVAL:
+            self.last_stats = self.last_sent = now
+            return format_event("stats")
+
+        if now - self.last_sent >= HEARTBEAT_INTERVAL:
+            self.last_sent = now
+            return b": ping\n\n"
+
+        return b""
+
+    def timeout(self, now: float) -> float:
+        """
+        Returns how long to wait for a message before `on_tick()` needs calling
+        """
+        next_tick = self.last_sent + HEARTBEAT_INTERVAL
+        if self.running:
+            next_tick = min(next_tick, self.last_stats + STATS_INTERVAL)
+
+        return max(next_tick - now, 0)
+
+
+def stream(token: Token) -> Iterator[bytes]:
+    """
+    The event stream for the Flask view, which ends when the token's login session is revoked
+    This blocks the worker thread for as long as the browser is connected
+    """
+    import time
+
+    from app.controllers import data_version
+    from app.lib.redis import cache
+
+    pubsub = cache.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(channel(token.user_id), REVOKED_CHANNEL)
+
+    running = cache.hget(data_version.cache_key(token.user_id), "running") == b"1"
+    state = Stream(running=running, now=time.time())
+
+    try:
+        # The session may have been revoked after the token was checked but before subscribing
+        if is_revoked(token):
+            return
+
+        yield state.start()
+
+        while True:
+            message = pubsub.get_message(timeout=state.timeout(time.time()))
+            if message and message["type"] == "message":
+                if message["channel"] == REVOKED_CHANNEL.encode():
+                    if message["data"].decode() == token.session:
+                        return
+                    continue
+
+                yield state.on_message(message["data"], time.time())
+
+            if chunk := state.on_tick(time.time()):
+                yield chunk
+    finally:
+        pubsub.close()
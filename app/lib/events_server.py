@@ -0,0 +1,196 @@
+"""
+An asyncio server for the dashboard event stream, see `app.lib.events`
+
+Every connection is a coroutine on one event loop and all users share a single redis subscription,
+so idle dashboards cost a few KB of memory each rather than a worker thread.
+
+Run with `flask events serve`.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+import redis.asyncio as aioredis
+
+from app.lib import events
+from app.lib.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Requests are only a GET with a token so anything bigger than this is not for us
+MAX_REQUEST_SIZE = 8192
+
+# How many messages can wait for a connection before it is closed
+# A client this far behind is not reading, if it is still there it will reconnect and refresh everything anyway
+MAX_QUEUED_MESSAGES = 100
+
+
+class Connection(NamedTuple):
+    # The login session of the token, so the connection can be closed when it is revoked
+    session: str
+    queue: asyncio.Queue
+    writer: asyncio.StreamWriter
+
+
+class EventServer:
+    def __init__(self, secret_key: str, cache: aioredis.Redis, session: aioredis.Redis, running_key, origin: str):
+        """
+        `secret_key`: Used to check the tokens
+        `cache`: The redis cache db, used for the pub/sub and to check if a user is clocked in
+        `session`: The redis session db, used to check if a token has been revoked
+        `running_key`: A function returning the redis hash that has the `running` flag for a user ID
+        `origin`: The origin of the app, the only one allowed to read the stream
+        """
+        self.secret_key = secret_key
+        self.cache = cache
+        self.session = session
+        self.running_key = running_key
+        self.origin = origin.rstrip("/")
+        self.subscribers: dict[int, set[Connection]] = defaultdict(set)
+
+    async def serve(self, host: str, port: int):
+        dispatcher = asyncio.create_task(self.dispatch())
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024, limit=MAX_REQUEST_SIZE)
+
+        logger.info(f"Serving events on {host}:{port}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            dispatcher.cancel()
+
+    @property
+    def connections(self) -> int:
+        return sum(len(connections) for connections in self.subscribers.values())
+
+    async def dispatch(self):
+        """
+        Passes messages from redis to the queues of the connected users
+        and closes the connections of revoked login sessions
+        """
+        while True:
+            try:
+                async with self.cache.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.psubscribe(events.CHANNEL_PATTERN)
+                    await pubsub.subscribe(events.REVOKED_CHANNEL)
+
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.revoke(message["data"].decode())
+                            continue
+
+                        if message["type"] != "pmessage":
+                            continue
+
+                        user_id = int(message["channel"].rsplit(b":", 1)[1])
+                        for connection in self.subscribers.get(user_id, ()):
+                            try:
+                                connection.queue.put_nowait(message["data"])
+                            except asyncio.QueueFull:
+                                logger.warning(f"Closing an event stream for user {user_id} that is not reading")
+                                connection.writer.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lost the redis subscription, reconnecting")
+                await asyncio.sleep(1)
+
+    def revoke(self, session: str):
+        """
+        Closes the connections of a login session, the stream notices once the socket has closed
+        """
+        for connections in self.subscribers.values():
+            for connection in connections:
+                if connection.session == session:
+                    connection.writer.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            token = await self.authenticate(reader, writer)
+            if token is not None:
+                await self.stream(token, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> events.Token | None:
+        """
+        Reads the request and returns the token
+        Writes an error response and returns None if it is not a valid event stream request
+        Revoked tokens are checked by `stream()`
+        """
+        head = await reader.readuntil(b"\r\n\r\n")
+        method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+        url = urlsplit(target)
+
+        if method != "GET" or url.path != "/events":
+            await self.respond(writer, "404 Not Found")
+            return None
+
+        token = events.read_token(parse_qs(url.query).get("token", [""])[0], self.secret_key)
+        if token is None:
+            await self.respond(writer, "401 Unauthorized")
+            return None
+
+        return token
+
+    async def respond(self, writer: asyncio.StreamWriter, status: str):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+
+    async def stream(self, token: events.Token, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        user_id = token.user_id
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_MESSAGES)
+        connection = Connection(token.session, queue, writer)
+        self.subscribers[user_id].add(connection)
+
+        # Browsers don't send anything after the request so this only finishes when they disconnect
+        # or the connection is closed by `dispatch()`
+        closed = asyncio.ensure_future(reader.read())
+
+        try:
+            # Checked once the connection is registered so a revoke in between can't be missed
+            if await self.session.exists(events.revoked_key(token.session)):
+                await self.respond(writer, "401 Unauthorized")
+                return
+
+            running = await self.cache.hget(self.running_key(user_id), "running") == b"1"
+            state = events.Stream(running=running, now=time.time())
+
+            headers = (
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream\r\n"
+                "Cache-Control: no-cache\r\n"
+                f"Access-Control-Allow-Origin: {self.origin}\r\n"
+                "X-Accel-Buffering: no\r\n"
+                "Connection: keep-alive\r\n"
+                "\r\n"
+            )
+            writer.write(headers.encode("latin-1") + state.start())
+            await writer.drain()
+
+            while not closed.done():
+                message = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    (message, closed), timeout=state.timeout(time.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if message.done():
+                    writer.write(state.on_message(message.result(), time.time()))
+                else:
+                    message.cancel()
+
+                if chunk := state.on_tick(time.time()):
+                    writer.write(chunk)
+
+                await writer.drain()
+        finally:
+            closed.cancel()
+            self.subscribers[user_id].discard(connection)
+            if not self.subscribers[user_id]:
+                del self.subscribers[user_id]
@@ -0,0 +1,49 @@
+"""
+A shared HTTP session for calls to external APIs (eg. Slack)
+
+Connections are pooled and kept alive between requests, requests that fail with a connection error
+or a 429/5xx response are retried with an exponential backoff.
+
+Always pass a timeout, `DEFAULT_TIMEOUT` is a sensible choice.
+"""
+
+import threading
+
+import requests
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+
+_session: requests.Session | None = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared `requests.Session`, creating it on first use
+    """
+    global _session
+
+    with _lock:
+        if _session is None:
+            _session = _create_session()
+
+    return _session
+
+
+def _create_session() -> requests.Session:
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,  # 0.5s, 1s, 2s
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # Also retry POSTs, the APIs we call are safe to repeat
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
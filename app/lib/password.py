@@ -0,0 +1,127 @@
+"""
+Password hashing with Argon2
+
+Argon2 is deliberately slow and memory hard, so the hashing runs on a small dedicated pool of threads
+rather than on whichever request thread needs it.
+At most `PASSWORD_HASH_WORKERS` hashes run at once and at most `PASSWORD_HASH_MAX_PENDING` requests wait for one,
+any more raise `PasswordHasherBusy` straight away so a burst of logins can't take every worker thread.
+
+The Argon2 parameters can be changed with `ARGON2_PARAMS` in the app config,
+these are passed to `argon2.PasswordHasher`.
+Existing hashes are upgraded to the new parameters the next time the user logs in, see `User.check_password()`.
+
+```python
+ARGON2_PARAMS = {"time_cost": 3, "memory_cost": 65536, "parallelism": 4}
+```
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+if TYPE_CHECKING:
+    from argon2 import PasswordHasher
+
+T = TypeVar("T")
+
+# Each gthread worker has 4 threads (see `entrypoint.sh`), one hashing and one waiting leaves half of them
+# free for other requests. Keep `PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_PENDING` below `--threads`
+DEFAULT_WORKERS = 1
+DEFAULT_MAX_PENDING = 1
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when too many passwords are already waiting to be hashed
+    """
+
+    pass
+
+
+class Hasher:
+    """
+    A shared `PasswordHasher` with a bounded pool of threads to run it on
+    """
+
+    def __init__(
+        self, params: dict | None = None, workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        from argon2 import PasswordHasher
+
+        self.hasher: "PasswordHasher" = PasswordHasher(**(params or {}))
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+
+        self._executor: ThreadPoolExecutor | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Threads don't survive a fork, so start a new pool if this is a new gunicorn worker
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+                self._pid = os.getpid()
+
+            return self._executor
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Runs `func(*args)` on the hashing pool and waits for the result
+        Raises `PasswordHasherBusy` if there are already too many waiting
+        """
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password: str) -> str:
+        return self.run(self.hasher.hash, password)
+
+    def verify(self, hash: str, password: str) -> bool:
+        """
+        Returns True if `password` matches `hash`
+        """
+        from argon2.exceptions import InvalidHashError, VerifyMismatchError
+
+        try:
+            return self.run(self.hasher.verify, hash, password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, hash: str) -> bool:
+        """
+        Returns True if `hash` was made with different parameters to the current ones
+        """
+        return self.hasher.check_needs_rehash(hash)
+
+
+_hasher: Hasher | None = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher() -> Hasher:
+    """
+    Returns the shared `Hasher`, created from the app config on first use
+    """
+    global _hasher
+
+    if _hasher is None:
+        from flask import current_app, has_app_context
+
+        config = current_app.config if has_app_context() else {}
+
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = Hasher(
+                    params=config.get("ARGON2_PARAMS"),
+                    workers=config.get("PASSWORD_HASH_WORKERS", DEFAULT_WORKERS),
+                    max_pending=config.get("PASSWORD_HASH_MAX_PENDING", DEFAULT_MAX_PENDING),
+                )
+
+    return _hasher
@@ -3,6 +3,7 @@ Contains instances for our redis caches
 
 We have a db for the session storage and a separate db for caching
 This means we can clear app cache without invalidating sessions
+Background jobs are queued in their own db so they are not lost if the cache is cleared
 """
 
 from enum import Enum
@@ -15,7 +16,22 @@ import redis
 class RedisDatabase(Enum):
     SESSION = 0
     CACHE = 1
+    QUEUE = 2
 
 
-session = redis.Redis(app.config["CACHE_HOST"], db=RedisDatabase.SESSION.value)
-cache = redis.Redis(app.config["CACHE_HOST"], db=RedisDatabase.CACHE.value)
+class Redis(redis.Redis):
+    """
+    Adds the time taken by each command to the request's `Server-Timing`, see `app.lib.timing`
+    Commands run in a pipeline are not included
+    """
+
+    def execute_command(self, *args, **options):
+        from app.lib import timing
+
+        with timing.measure("redis"):
+            return super().execute_command(*args, **options)
+
+
+session = Redis(app.config["CACHE_HOST"], db=RedisDatabase.SESSION.value)
+cache = Redis(app.config["CACHE_HOST"], db=RedisDatabase.CACHE.value)
+queue = Redis(app.config["CACHE_HOST"], db=RedisDatabase.QUEUE.value)
@@ -0,0 +1,58 @@
+"""
+SQLite tuning
+
+The PRAGMAs in `DEFAULT_PRAGMAS` are applied to every new database connection.
+These can be changed with `SQLITE_PRAGMAS` in the app config, set a PRAGMA to `None` to leave SQLite's default.
+
+```python
+SQLITE_PRAGMAS = {"mmap_size": None, "busy_timeout": 10000}
+```
+"""
+
+import sqlalchemy as sa
+
+from app.lib.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PRAGMAS = {
+    # Readers don't block writers and writers don't block readers
+    "journal_mode": "WAL",
+    # Safe with WAL, only the last transactions can be lost on power failure (never corruption)
+    "synchronous": "NORMAL",
+    # Wait for locks instead of failing with "database is locked"
+    "busy_timeout": 5000,
+    # In KiB when negative, so 20MB of page cache per connection
+    "cache_size": -20000,
+    # 256MB of the database file memory mapped, shared between connections by the OS
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+
+
+def apply_pragmas(engine: sa.Engine, pragmas: dict | None = None):
+    """
+    Runs the PRAGMAs on every new connection to `engine`
+    """
+    pragmas = {key: value for key, value in {**DEFAULT_PRAGMAS, **(pragmas or {})}.items() if value is not None}
+
+    @sa.event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f"PRAGMA {key} = {value}")
+        cursor.close()
+
+
+def optimize(engine: sa.Engine):
+    """
+    Periodic maintenance
+    - Copies the WAL back into the database and truncates it so it does not grow forever
+    - Runs `PRAGMA optimize` so the query planner has up to date statistics
+    """
+    with engine.connect() as conn:
+        busy, log_pages, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+        if busy:
+            logger.warning(f"WAL checkpoint could not complete, {checkpointed}/{log_pages} pages checkpointed")
+
+        conn.exec_driver_sql("PRAGMA optimize")
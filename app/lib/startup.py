@@ -0,0 +1,103 @@
+"""
+Measures how long the app takes to start
+
+The app is started in a new python process with `-X importtime` so nothing already imported by this process is hidden.
+Used by `flask startup-report` and the startup budget test.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+# Run in the child process, prints the timings as JSON on the last line of stdout
+_SCRIPT = """
+import json, sys, time
+
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app(test_mode={test_mode}, warm={warm})
+created = time.perf_counter()
+
+print(json.dumps({{"import": imported - start, "create_app": created - imported, "modules": sorted(sys.modules)}}))
+"""
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+
+@dataclass
+class StartupReport:
+    import_seconds: float
+    create_app_seconds: float
+    modules: list[str]
+    imports: list[ImportTime] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return self.import_seconds + self.create_app_seconds
+
+    def slowest(self, count: int, max_depth: int = 0) -> list[ImportTime]:
+        """
+        Returns the slowest imports by cumulative time, only including imports up to `max_depth` levels deep
+        """
+        imports = [i for i in self.imports if i.depth <= max_depth]
+        return sorted(imports, key=lambda i: i.cumulative_seconds, reverse=True)[:count]
+
+
+def measure(test_mode: bool = False, warm: bool = False) -> StartupReport:
+    """
+    Starts the app in a new process and returns how long it took
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT.format(test_mode=test_mode, warm=warm)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return StartupReport(
+        import_seconds=timings["import"],
+        create_app_seconds=timings["create_app"],
+        modules=timings["modules"],
+        imports=_parse_importtime(result.stderr),
+    )
+
+
+def _parse_importtime(output: str) -> list[ImportTime]:
+    """
+    Parses the `-X importtime` output, which looks like
+    `import time:       219 |     356961 |   flask_alembic`
+    where the times are in microseconds and the module is indented by two spaces for each level
+    """
+    imports = []
+
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # The header line
+
+        imports.append(
+            ImportTime(
+                module=name.strip(),
+                self_seconds=int(self_us) / 1_000_000,
+                cumulative_seconds=int(cumulative_us) / 1_000_000,
+                depth=(len(name) - len(name.lstrip()) - 1) // 2,
+            )
+        )
+
+    return imports
@@ -0,0 +1,159 @@
+"""
+Measures the database, template and redis work done by each request
+
+The totals are sent in a `Server-Timing` header, which shows up in the network tab of the browser dev tools,
+and logged as one JSON line per request at INFO (use `LOG_LEVEL=info:app.lib.timing` to see them).
+
+```
+Server-Timing: db;dur=4.1;desc="6 queries", tpl;dur=2.3, redis;dur=0.8;desc="3 calls", total;dur=9.7
+```
+
+Requests that run more than `QUERY_BUDGET` SQL statements log a warning.
+The budget can be changed for each endpoint with `QUERY_BUDGETS` in the app config,
+set `SERVER_TIMING = False` to stop sending the header.
+
+```python
+QUERY_BUDGET = 20
+QUERY_BUDGETS = {"core.dash": 30}
+```
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from flask import Flask, g, has_request_context
+
+from app.lib.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The most SQL statements a request should run, unless set for the endpoint in `QUERY_BUDGETS`
+DEFAULT_QUERY_BUDGET = 20
+
+
+@dataclass
+class Timing:
+    started: float
+    durations: dict[str, float] = field(default_factory=lambda: {"db": 0.0, "tpl": 0.0, "redis": 0.0})
+    counts: dict[str, int] = field(default_factory=lambda: {"db": 0, "tpl": 0, "redis": 0})
+
+    # Start times of templates being rendered, templates can render other templates
+    rendering: list[float] = field(default_factory=list)
+
+    def add(self, kind: str, seconds: float):
+        self.durations[kind] += seconds
+        self.counts[kind] += 1
+
+    def header(self, total: float) -> str:
+        ms = {kind: f"{seconds * 1000:.1f}" for kind, seconds in self.durations.items()}
+
+        return ", ".join(
+            [
+                f'db;dur={ms["db"]};desc="{self.counts["db"]} queries"',
+                f"tpl;dur={ms['tpl']}",
+                f'redis;dur={ms["redis"]};desc="{self.counts["redis"]} calls"',
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+def current() -> Optional[Timing]:
+    """
+    Returns the timing for the current request or None if outside of a request
+    """
+    if has_request_context():
+        return g.get("timing")
+    return None
+
+
+@contextmanager
+def measure(kind: str) -> Iterator[None]:
+    """
+    Adds the time taken by the block to the current request, if there is one
+    """
+    timing = current()
+    if timing is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(kind, time.perf_counter() - started)
+
+
+def init_app(app: Flask, engine):
+    """
+    Starts timing requests to `app` and the SQL run on `engine`
+    """
+    import sqlalchemy as sa
+    from flask import before_render_template, request, template_rendered
+
+    from app.lib.blocks import before_render_template_block, template_block_rendered
+
+    # The start time is kept on the execution context, which is new for each statement
+    @sa.event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._timing_started = time.perf_counter()
+
+    @sa.event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if timing := current():
+            timing.add("db", time.perf_counter() - context._timing_started)
+
+    def template_started(sender, **kwargs):
+        if timing := current():
+            timing.rendering.append(time.perf_counter())
+
+    def template_finished(sender, **kwargs):
+        if (timing := current()) and timing.rendering:
+            timing.add("tpl", time.perf_counter() - timing.rendering.pop())
+
+    # Signals only hold weak references by default, which would let these be garbage collected
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
+    before_render_template_block.connect(template_started, app, weak=False)
+    template_block_rendered.connect(template_finished, app, weak=False)
+
+    @app.before_request
+    def start_timing():
+        g.timing = Timing(started=time.perf_counter())
+
+    @app.after_request
+    def send_timing(response):
+        timing = g.pop("timing", None)
+        if timing is None:
+            return response
+
+        total = time.perf_counter() - timing.started
+        endpoint = request.endpoint or request.path
+
+        if app.config.get("SERVER_TIMING", True):
+            response.headers["Server-Timing"] = timing.header(total)
+
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "endpoint": endpoint,
+                    "status": response.status_code,
+                    "total_ms": round(total * 1000, 1),
+                    "db_ms": round(timing.durations["db"] * 1000, 1),
+                    "queries": timing.counts["db"],
+                    "tpl_ms": round(timing.durations["tpl"] * 1000, 1),
+                    "redis_ms": round(timing.durations["redis"] * 1000, 1),
+                    "redis_calls": timing.counts["redis"],
+                }
+            )
+        )
+
+        budget = app.config.get("QUERY_BUDGET", DEFAULT_QUERY_BUDGET)
+        budget = app.config.get("QUERY_BUDGETS", {}).get(endpoint, budget)
+        if timing.counts["db"] > budget:
+            logger.warning(f"{request.method} {endpoint} ran {timing.counts['db']} queries, the budget is {budget}")
+
+        return response
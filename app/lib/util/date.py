@@ -1,3 +1,6 @@
+from datetime import date, datetime
+from typing import Iterable, Optional, Sequence
+
 import arrow
 
 
@@ -38,7 +41,13 @@ def humanize_seconds(seconds: int | float, short: bool = False):
     return base.humanize(end, only_distance=True, granularity=["hour", "minute"])
 
 
-def calculate_expected_hours(start: arrow.Arrow, end: arrow.Arrow, hours_per_day: float, days_worked: str) -> float:
+def calculate_expected_hours(
+    start: arrow.Arrow,
+    end: arrow.Arrow,
+    hours_per_day: float,
+    days_worked: str,
+    holidays: Optional[Sequence[date]] = None,
+) -> float:
     """
     Calculates the expected work hours between two dates
     Date range is inclusive of both the start and end
@@ -47,35 +56,63 @@ def calculate_expected_hours(start: arrow.Arrow, end: arrow.Arrow, hours_per_day
     `end`: Arrow object of end date
     `hours_per_day`: The number of hours per day
     `days_worked`: A string of work days, e.g. "MTWTF--" with "-" for non-work days
+    `holidays`: An optional sorted list of public holiday dates,
+                any that fall on a work day are not expected to be worked
+    """
+    return calculate_expected_hours_batch([(start, end)], hours_per_day, days_worked, holidays)[0]
+
+
+def calculate_expected_hours_batch(
+    ranges: Iterable[tuple[arrow.Arrow | date, arrow.Arrow | date]],
+    hours_per_day: float,
+    days_worked: str,
+    holidays: Optional[Sequence[date]] = None,
+) -> list[float]:
     """
-    # Adjust our dates to be midnight
-    start = start.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    Like `calculate_expected_hours` but for many (start, end) ranges at once
+    Returns a list of expected hours in the same order as `ranges`
+
+    Each range is worked out in constant time from the number of full weeks and the leftover days,
+    public holidays are then removed with a binary search so the cost does not grow with the length of the range
+    """
+    from bisect import bisect_left, bisect_right
 
     # Monday = 0, Sunday = 6
-    working_days = [False] * 7
-    for i, day in enumerate(days_worked):
-        if day != "-":
-            working_days[i] = True
+    working_days = [day != "-" for day in days_worked]
+    work_days_per_week = sum(working_days)
+
+    # Only holidays that fall on a work day make a difference
+    work_day_holidays = sorted(dt for dt in holidays or [] if working_days[dt.weekday()])
 
-    days_to_check = (end - start).days
+    expected_hours = []
+    for start, end in ranges:
+        start_date = _as_date(start)
+        end_date = _as_date(end)
 
-    # No days, no time expected
-    if days_to_check < 0:
-        return 0
+        days = (end_date - start_date).days + 1
 
-    # If a single day check it's a work day, else 0 hours expected
-    if days_to_check == 0:
-        return hours_per_day if working_days[start.weekday()] else 0
+        # No days, no time expected
+        if days <= 0:
+            expected_hours.append(0)
+            continue
 
-    # Count the number of work days between the two dates
-    work_days = 0
-    while start <= end:
-        if working_days[start.weekday()]:
-            work_days += 1
-        start = start.shift(days=1)
+        full_weeks, leftover_days = divmod(days, 7)
 
-    # Calculate the expected hours
-    expected_hours = work_days * hours_per_day
+        work_days = full_weeks * work_days_per_week
+        work_days += sum(working_days[(start_date.weekday() + i) % 7] for i in range(leftover_days))
+
+        if work_day_holidays:
+            work_days -= bisect_right(work_day_holidays, end_date) - bisect_left(work_day_holidays, start_date)
+
+        expected_hours.append(work_days * hours_per_day)
 
     return expected_hours
+
+
+def _as_date(value: arrow.Arrow | date) -> date:
+    """
+    Returns the calendar date of an Arrow, datetime or date
+    """
+    if isinstance(value, (arrow.Arrow, datetime)):
+        return value.date()
+    return value
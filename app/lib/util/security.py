@@ -8,67 +8,65 @@ class InvalidCSRFToken(Exception):
 
 class MissingCSRFToken(Exception):
     """
-    Raised when a CSRF token is not found in redis for the user.
+    Raised when a CSRF token can't be made because there is no login session.
     """
 
     pass
 
 
-def generate_csrf_token(user_id: int):
+def _csrf_token_for(login_session_key: str) -> str:
     """
-    Generates a new CSRF token for the specified user and stores it in redis under `csrf:{user.id}`
-    The token should be generated upon log in persists for the duration of the login session.
+    Returns the CSRF token for a login session
+    This is an HMAC of the login session key so it needs no storage and changes every time the user logs in
     """
-    import secrets
+    import hashlib
+    import hmac
 
-    from app.lib.redis import session
+    from flask import current_app as app
 
-    token = secrets.token_hex()
-    csrf_key = f"csrf:{user_id}"
-    session.set(csrf_key, token)
+    return hmac.new(
+        app.config["SECRET_KEY"].encode("utf-8"),
+        f"csrf:{login_session_key}".encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
 
 
 def get_csrf_token() -> str:
     """
-    Get the generated CSRF token for the current user from redis.
-    If no token is found then an `InvalidCSRFToken` exception is raised.
+    Get the CSRF token for the current login session.
+    If there is no login session then a `MissingCSRFToken` exception is raised.
     """
+    from flask import session as flask_session
 
-    from app.controllers.user.util import get_user
-    from app.lib.redis import session
+    login_session_key = flask_session.get("login_session_key")
+    if not login_session_key:
+        raise MissingCSRFToken("No login session")
 
-    user = get_user()
-    csrf_key = f"csrf:{user.id}"
-
-    token = session.get(csrf_key)
-    if not token:
-        raise MissingCSRFToken("No CSRF token generated")
-
-    return token.decode("utf-8")
+    return _csrf_token_for(login_session_key)
 
 
 def validate_csrf_token(token: str):
     """
-    Validate a provided CSRF token against the one stored in redis for this user.
+    Validate a provided CSRF token against the one for the current login session.
     If invalid an `InvalidCSRFToken` exception is raised.
     """
-    from app.controllers.user.util import get_user
-    from app.lib.redis import session
+    import hmac
 
-    user = get_user()
-    expected_token = session.get(f"csrf:{user.id}")
+    from flask import session as flask_session
 
-    if not expected_token:
+    login_session_key = flask_session.get("login_session_key")
+    if not login_session_key:
         raise InvalidCSRFToken("Invalid CSRF token")
 
-    if expected_token.decode("utf-8") != token:
+    # Compared as bytes, `compare_digest()` raises a `TypeError` for strings that aren't ASCII
+    if not hmac.compare_digest(_csrf_token_for(login_session_key).encode(), token.encode()):
         raise InvalidCSRFToken("Invalid CSRF token")
 
 
 def enable_csrf_protection(app):
     """
     Enables CSRF token protection by checking all form submissions for a CSRF token
-    and validating it against the one stored in redis.
+    and validating it against the one for the login session.
 
     If the form does not contain a CSRF token then no checks are done, so it is important
     that any route we want to protect with CSRF tokens has a CSRF token in the form.
@@ -0,0 +1,21 @@
+from typing import Iterable, Iterator
+
+
+def gzip_stream(chunks: Iterable[str | bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Gzip compresses a stream of chunks as they are produced
+    For use with streamed responses, set `Content-Encoding: gzip` on the response
+    """
+    import zlib
+
+    # wbits=31 writes the gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+
+        if compressed := compressor.compress(chunk):
+            yield compressed
+
+    yield compressor.flush()
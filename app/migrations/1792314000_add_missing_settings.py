@@ -0,0 +1,36 @@
+"""Add default settings for users without any
+
+Settings are now created on registration instead of the first time they are read
+
+Revision ID: 1792314000
+Revises: 1792310400
+Create Date: 2026-10-18 10:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1792314000"
+down_revision: Union[str, None] = "1792310400"
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # These match `Settings.default()`
+    op.execute(
+        """
+        INSERT INTO settings (timezone, week_start, hours_per_day, work_days, user_id)
+        SELECT 'Europe/London', 1, 7.5, 'MTWTF--', "user".id
+        FROM "user"
+        WHERE NOT EXISTS (SELECT 1 FROM settings WHERE settings.user_id = "user".id)
+        """
+    )
+
+
+def downgrade() -> None:
+    # Nothing to do, the settings rows are still valid
+    pass
@@ -0,0 +1,38 @@
+"""Add indexes for the per-user time range queries
+
+Revision ID: 1792317600
+Revises: 1792314000
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1792317600"
+down_revision: Union[str, None] = "1792314000"
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_time_user_id_start_end", "time", ["user_id", "start", "end"])
+    op.create_index("ix_time_user_id_start_open", "time", ["user_id", "start"], sqlite_where=sa.text('"end" IS NULL'))
+    op.create_index("ix_break_time_id_end_start", "break", ["time_id", "end", "start"])
+    op.create_index("ix_leave_user_id_start", "leave", ["user_id", "start"])
+    op.create_index("ix_login_session_expires", "login_session", ["expires"])
+    op.create_index("ix_settings_user_id", "settings", ["user_id"])
+    op.create_index("ix_user_to_slack_token_user_id", "user_to_slack_token", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_to_slack_token_user_id", "user_to_slack_token")
+    op.drop_index("ix_settings_user_id", "settings")
+    op.drop_index("ix_login_session_expires", "login_session")
+    op.drop_index("ix_leave_user_id_start", "leave")
+    op.drop_index("ix_break_time_id_end_start", "break")
+    op.drop_index("ix_time_user_id_start_open", "time")
+    op.drop_index("ix_time_user_id_start_end", "time")
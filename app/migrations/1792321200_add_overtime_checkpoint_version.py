@@ -0,0 +1,28 @@
+"""Add OvertimeCheckpoint.version
+
+Bumped by every invalidation so a checkpoint worked out at the same time as a write isn't saved
+
+Revision ID: 1792321200
+Revises: 1792317600
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1792321200"
+down_revision: Union[str, None] = "1792317600"
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("overtime_checkpoint", sa.Column("version", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("overtime_checkpoint", "version")
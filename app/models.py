@@ -2,9 +2,7 @@ from typing import Literal, Optional, Self
 
 import arrow
 import sqlalchemy as sa
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
-from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship, selectinload
 
 from app import Model, db
 
@@ -76,8 +74,7 @@ class TimeHelperMixin:
         """
         from app.controllers.user.util import get_user
 
-        user = get_user()
-        return db.session.scalars(sa.select(cls).filter(cls.start >= timestamp, cls.user_id == user.id)).all()
+        return db.session.scalars(cls._since_statement(get_user().id, timestamp)).all()
 
     @classmethod
     def between(cls, start: int, end: int):
@@ -86,10 +83,27 @@ class TimeHelperMixin:
         """
         from app.controllers.user.util import get_user
 
-        user = get_user()
-        return db.session.scalars(
-            sa.select(cls).filter(cls.start >= start, cls.start <= end, cls.user_id == user.id)
-        ).all()
+        return db.session.scalars(cls._between_statement(get_user().id, start, end)).all()
+
+    @classmethod
+    def _since_statement(cls, user_id: int, timestamp: int) -> sa.Select:
+        return sa.select(cls).options(*cls.eager_load()).filter(cls.start >= timestamp, cls.user_id == user_id)
+
+    @classmethod
+    def _between_statement(cls, user_id: int, start: int, end: int) -> sa.Select:
+        return (
+            sa.select(cls)
+            .options(*cls.eager_load())
+            .filter(cls.start >= start, cls.start <= end, cls.user_id == user_id)
+        )
+
+    @classmethod
+    def eager_load(cls) -> list:
+        """
+        Loader options for the relationships needed by `logged()`
+        Pass these to any query that loads many records so they are fetched in one go instead of one query per record
+        """
+        return []
 
 
 class User(BaseModel):
@@ -109,6 +123,9 @@ class User(BaseModel):
     slack_tokens: Mapped[list["UserToSlackToken"]] = relationship(
         "UserToSlackToken", back_populates="user", cascade="all, delete-orphan"
     )
+    overtime_checkpoint: Mapped[Optional["OvertimeCheckpoint"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan", uselist=False
+    )
 
     def verify(self):
         """
@@ -121,25 +138,39 @@ class User(BaseModel):
         """
         Update the given users password
         """
-        self.password = PasswordHasher().hash(password)
+        from app.lib.password import get_hasher
+
+        self.password = get_hasher().hash(password)
         db.session.commit()
         return self
 
     def check_password(self, password: str) -> bool:
         """
         Check if the provided password is correct for a given account
+        If the hash was made with old parameters it is replaced, this is committed with the login
         """
+        from app.lib.password import PasswordHasherBusy, get_hasher
+
         if not self.password:
             return False
 
-        try:
-            PasswordHasher().verify(self.password, password)
-        except VerifyMismatchError:
+        hasher = get_hasher()
+        if not hasher.verify(self.password, password):
             return False
+
+        # The password is correct so don't fail the login if the pool is busy, it will be rehashed next time
+        if hasher.needs_rehash(self.password):
+            try:
+                self.password = hasher.hash(password)
+            except PasswordHasherBusy:
+                pass
+
         return True
 
 
 class UserToSlackToken(BaseModel):
+    __table_args__ = (sa.Index("ix_user_to_slack_token_user_id", "user_id"),)
+
     user_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("user.id"), nullable=False)
     slack_token: Mapped[str] = mapped_column(sa.String(255), nullable=False)
     team_name: Mapped[str] = mapped_column(sa.String(255), nullable=False)
@@ -148,6 +179,8 @@ class UserToSlackToken(BaseModel):
 
 
 class LoginSession(BaseModel):
+    __table_args__ = (sa.Index("ix_login_session_expires", "expires"),)
+
     # Unique session ID, stored in user cookies
     key: Mapped[str] = mapped_column(sa.String(255), unique=True, nullable=False)
     expires: Mapped[UnixTimestamp] = mapped_column(sa.Integer, nullable=False)
@@ -162,6 +195,12 @@ class LoginSession(BaseModel):
 
 
 class Time(TimeHelperMixin, BaseModel):
+    __table_args__ = (
+        sa.Index("ix_time_user_id_start_end", "user_id", "start", "end"),
+        # Only the open records, used to find the current clocked in record
+        sa.Index("ix_time_user_id_start_open", "user_id", "start", sqlite_where=sa.text('"end" IS NULL')),
+    )
+
     start: Mapped[UnixTimestamp] = mapped_column(sa.Integer, nullable=False)
     end: Mapped[Optional[UnixTimestamp]] = mapped_column(sa.Integer, nullable=True)
     note: Mapped[Optional[str]] = mapped_column(sa.String(255), nullable=True)
@@ -172,6 +211,10 @@ class Time(TimeHelperMixin, BaseModel):
     )
     user: Mapped[User] = relationship("User", viewonly=True, back_populates="times")
 
+    @classmethod
+    def eager_load(cls) -> list:
+        return [selectinload(cls.breaks)]
+
     def logged(self):
         """
         Return the total duration of a time entry in seconds
@@ -186,6 +229,8 @@ class Time(TimeHelperMixin, BaseModel):
 
 
 class Break(BaseModel):
+    __table_args__ = (sa.Index("ix_break_time_id_end_start", "time_id", "end", "start"),)
+
     time_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("time.id"))
     start: Mapped[UnixTimestamp] = mapped_column(sa.Integer)
     end: Mapped[Optional[UnixTimestamp]] = mapped_column(sa.Integer, nullable=True)
@@ -205,6 +250,8 @@ class Break(BaseModel):
 
 
 class Leave(TimeHelperMixin, BaseModel):
+    __table_args__ = (sa.Index("ix_leave_user_id_start", "user_id", "start"),)
+
     leave_type: Mapped[str] = mapped_column(sa.String(255), nullable=False)  # sick / annual
     start: Mapped[UnixTimestamp] = mapped_column(sa.Integer, nullable=False)
     duration: Mapped[DurationDays] = mapped_column(sa.Float, nullable=False)
@@ -219,7 +266,13 @@ class Leave(TimeHelperMixin, BaseModel):
         from app.controllers.user.util import get_user
 
         user = get_user()
-        return db.session.scalars(sa.select(Leave).filter(Leave.start >= timestamp, Leave.user == user)).all()
+        return db.session.scalars(
+            sa.select(Leave).options(*cls.eager_load()).filter(Leave.start >= timestamp, Leave.user == user)
+        ).all()
+
+    @classmethod
+    def eager_load(cls) -> list:
+        return [selectinload(cls.user).selectinload(User.settings)]
 
     def logged(self) -> int:
         """
@@ -230,6 +283,8 @@ class Leave(TimeHelperMixin, BaseModel):
 
 
 class Settings(BaseModel):
+    __table_args__ = (sa.Index("ix_settings_user_id", "user_id"),)
+
     timezone: Mapped[str] = mapped_column(sa.String(255), nullable=False)
     holiday_location: Mapped[Optional[str]] = mapped_column(sa.String(255), nullable=True)
 
@@ -272,6 +327,23 @@ class Settings(BaseModel):
         return sum([1 if day != "-" else 0 for day in self.work_days])
 
 
+class OvertimeCheckpoint(BaseModel):
+    """
+    The total time logged by a user for all records that started before `until`
+    This is used to work out the all time overtime without going through every record each time
+    See `app.controllers.overtime`
+    """
+
+    user_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("user.id"), unique=True, nullable=False)
+    until: Mapped[UnixTimestamp] = mapped_column(sa.Integer, nullable=False)
+    logged: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+
+    # Bumped by every invalidation and save, a checkpoint is only saved if this hasn't changed since it was read
+    version: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0, server_default="0")
+
+    user: Mapped[User] = relationship("User", viewonly=True, back_populates="overtime_checkpoint")
+
+
 class WhatsNew(BaseModel):
     title: Mapped[str] = mapped_column(sa.String(255), nullable=False)
     content: Mapped[str] = mapped_column(sa.Text, nullable=False)
@@ -0,0 +1,73 @@
+import json
+from typing import Optional
+
+from flask import Blueprint, Response, abort, request
+
+from app.controllers import entries
+from app.controllers.user.util import login_required
+from app.lib.logger import get_logger
+
+v = Blueprint("api", __name__, url_prefix="/api/v1")
+logger = get_logger(__name__)
+
+
+@v.get("/entries")
+@login_required
+def list_entries():
+    """
+    Returns a page of time and leave entries, oldest first
+
+    Query parameters, all optional
+    - `from`/`to`: Only entries starting in this range, as a unix timestamp or a date/time in the user's timezone
+    - `type`: `time` or `leave`, can be repeated
+    - `limit`: Entries per page, at most `entries.MAX_PAGE_SIZE`
+    - `order`: `asc` or `desc`
+    - `cursor`: The `next` cursor from the previous page
+
+    ```json
+    {
+        "entries": [{"type": "time", "id": 1, "start": 1704099600, "end": 1704128400, "note": "", "breaks": []}],
+        "next": "..."
+    }
+    ```
+    """
+    types = request.args.getlist("type") or entries.TYPES
+    if any(t not in entries.TYPES for t in types):
+        abort(400, "type must be time or leave")
+
+    try:
+        after = entries.decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except entries.InvalidCursor:
+        abort(400, "Invalid cursor")
+
+    page, next_cursor = entries.page(
+        after=after,
+        since=_timestamp(request.args.get("from")),
+        until=_timestamp(request.args.get("to")),
+        types=types,
+        limit=request.args.get("limit", entries.DEFAULT_PAGE_SIZE, type=int),
+        descending=request.args.get("order") == "desc",
+    )
+
+    body = {"entries": page, "next": entries.encode_cursor(next_cursor) if next_cursor else None}
+    return Response(json.dumps(body, separators=(",", ":")), mimetype="application/json")
+
+
+def _timestamp(value: Optional[str]) -> Optional[int]:
+    """
+    Converts a unix timestamp or a date/time in the user's timezone to a unix timestamp
+    """
+    import arrow
+
+    from app.controllers import settings
+
+    if not value:
+        return None
+
+    if value.isdigit():
+        return int(value)
+
+    try:
+        return arrow.get(value, tzinfo=settings.fetch().timezone).int_timestamp
+    except (arrow.parser.ParserError, ValueError):
+        abort(400, f"Invalid date {value}")
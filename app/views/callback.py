@@ -8,13 +8,13 @@ logger = get_logger(__name__)
 
 @v.route("/callback/slack", methods=["GET"])
 def slack_oauth_callback():
-    import requests
     from flask import current_app as app
     from flask import flash, redirect, request
 
     from app import db
     from app.controllers import settings
     from app.controllers.user.util import get_user
+    from app.lib.http import DEFAULT_TIMEOUT, get_session
     from app.models import UserToSlackToken
 
     current_user = get_user()
@@ -24,7 +24,7 @@ def slack_oauth_callback():
 
     code = request.args.get("code")
 
-    resp = requests.post(
+    resp = get_session().post(
         "https://slack.com/api/oauth.v2.access",
         data={
             "client_id": app.config["SLACK_CLIENT_ID"],
@@ -35,6 +35,7 @@ def slack_oauth_callback():
         headers={
             "Content-Type": "application/x-www-form-urlencoded",
         },
+        timeout=DEFAULT_TIMEOUT,
     )
 
     parsed = resp.json()
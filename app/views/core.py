@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request
 
 from app.controllers import core, leave, time
+from app.controllers.data_version import conditional_frame
 from app.controllers.user.util import login_required
 from app.lib.logger import get_logger
 
@@ -18,9 +19,43 @@ def home():
 @v.get("/dash")
 @login_required
 def dash():
+    from flask import session as flask_session
+
+    from app.controllers.user.util import get_user
+    from app.lib import events
+
     return render_template(
         "pages/dash.html.j2",
         week_list=core.week_list(),
+        offset=0,
+        has_more=core.week_count() > core.WEEK_WINDOW,
+        events_url=events.url(get_user().id, flask_session["login_session_key"]),
+    )
+
+
+@v.get("/events")
+def events():
+    """
+    The dashboard event stream, for local development
+    This holds a worker thread per open dashboard so is only served in debug mode,
+    in production this is served by `flask events serve` instead, see `app.lib.events`
+    """
+    from flask import Response, abort, stream_with_context
+    from flask import current_app as app
+
+    from app.lib import events
+
+    if not app.debug:
+        abort(404)
+
+    token = events.read_token(request.args.get("token", ""), app.config["SECRET_KEY"])
+    if token is None or events.is_revoked(token):
+        abort(401)
+
+    return Response(
+        stream_with_context(events.stream(token)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -46,6 +81,7 @@ def privacy_page():
 # FRAMES
 @v.get("/frames/entries")
 @login_required
+@conditional_frame("frames/entries_table.html.j2")
 def time_log_table():
     week_number = request.args.get("week")
 
@@ -57,8 +93,22 @@ def time_log_table():
     return render_template("frames/entries_table.html.j2", records=records, type_of=lambda thing: type(thing).__name__)
 
 
+@v.get("/frames/week_options")
+@login_required
+def week_options():
+    offset = request.args.get("offset", 0, type=int)
+
+    return render_template(
+        "frames/week_options.html.j2",
+        week_list=core.week_list(offset=offset),
+        offset=offset,
+        has_more=core.week_count() > offset + core.WEEK_WINDOW,
+    )
+
+
 @v.get("/frames/stats")
 @login_required
+@conditional_frame("frames/time_stats.html.j2")
 def stats():
     time_stats = core.stats()
     return render_template("frames/time_stats.html.j2", stats=time_stats)
@@ -1,4 +1,6 @@
-from flask import Blueprint, flash, redirect, url_for
+from datetime import date
+
+from flask import Blueprint, flash, redirect, request, url_for
 
 from app.controllers import holidays, settings
 from app.controllers.user.util import login_required
@@ -19,10 +21,15 @@ def upcoming_holidays():
         flash("Please set a holiday location to view the holidays list.", "warning")
         return redirect(url_for("settings.general_settings"))
 
-    return render(
-        "pages/holidays.html.j2",
-        page="upcoming",
-        upcoming_holidays=holidays.get_upcoming_holidays(),
+    return _cached_frame(
+        "upcoming",
+        _settings.holiday_location,
+        lambda: render(
+            "pages/holidays.html.j2",
+            page="upcoming",
+            cache_key=f"upcoming:{_settings.holiday_location}:{date.today()}",
+            lazy_replacers=lambda: {"upcoming_holidays": holidays.get_upcoming_holidays()},
+        ),
     )
 
 
@@ -35,8 +42,42 @@ def previous_holidays():
         flash("Please set a holiday location to view the holidays list.", "warning")
         return redirect(url_for("settings.general_settings"))
 
-    return render(
-        "pages/holidays.html.j2",
-        page="history",
-        previous_holidays=holidays.get_previous_holidays(),
+    return _cached_frame(
+        "history",
+        _settings.holiday_location,
+        lambda: render(
+            "pages/holidays.html.j2",
+            page="history",
+            cache_key=f"history:{_settings.holiday_location}:{date.today()}",
+            lazy_replacers=lambda: {"previous_holidays": holidays.get_previous_holidays()},
+        ),
     )
+
+
+def _cached_frame(page: str, location: str, render_page):
+    """
+    The holiday frames only change when the location or the date changes
+    so the browser revalidates them every time with an ETag of both and gets a 304 if neither has changed
+
+    Full page loads are not cached as they include the rest of the layout
+    """
+    import hashlib
+
+    from flask import make_response
+
+    block = request.args.get("block")
+    if not block:
+        return render_page()
+
+    etag = hashlib.sha1(f"{page}:{block}:{location}:{date.today()}".encode()).hexdigest()
+
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(render_page())
+
+    response.set_etag(etag)
+    # The location isn't in the URL, so the browser must not reuse the frame without asking
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
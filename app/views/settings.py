@@ -16,6 +16,9 @@ logger = get_logger(__name__)
 @login_required
 def general_settings():
     import pytz
+
+    from app.controllers.holidays import HOLIDAY_LOCATIONS
+
     if request.form:
         from flask import flash, redirect
 
@@ -27,7 +30,7 @@ def general_settings():
                 checks={
                     # TODO: Run this through arrow or pytz to validate
                     "timezone": v.Check(regex=r"\w+\/\w+"),
-                    "holiday_location": v.Check(options=["", "GB/ENG", "GB/NIR", "GB/WLS", "GB/SCT"]),
+                    "holiday_location": v.Check(options=["", *HOLIDAY_LOCATIONS]),
                     "week_start": v.Check(options=["0", "1", "2", "3", "4", "5", "6"]),
                     "theme": v.Check(options=["light", "dark"]),
                     "hours_per_day": v.Check(
@@ -42,7 +45,21 @@ def general_settings():
         flash("Settings saved.", "success")
         return redirect("/dash")
 
-    return render("pages/settings.html.j2", settings=settings.fetch(), page="general", timezone_options=pytz.common_timezones)
+    from app.controllers import data_version
+    from app.controllers.user.util import get_user
+    from app.lib.util.security import get_csrf_token
+
+    # The form has hundreds of time zones so is cached until the settings change
+    version, _ = data_version.get(get_user().id)
+
+    return render(
+        "pages/settings.html.j2",
+        settings=settings.fetch(),
+        page="general",
+        timezone_options=pytz.common_timezones,
+        holiday_locations=HOLIDAY_LOCATIONS,
+        cache_key=f"general:{get_user().id}:{version}:{get_csrf_token()}",
+    )
 
 
 @v.route("/settings/account", methods=["GET", "POST"])
@@ -68,19 +85,31 @@ def account_settings():
             flash("Your account has been deleted.", "success")
             return redirect("/login")
         elif submit == "export":
-            from flask import make_response
+            from flask import Response, stream_with_context
 
             from app.controllers.user import export_data
+            from app.lib.util.stream import gzip_stream
 
-            response = make_response(
-                export_data(user),
-            )
-            response.headers["Content-Type"] = "application/json"
-            return response
+            # The export is streamed as it is built, compressed if the browser supports it
+            export = export_data(user)
+            headers = {
+                "Content-Disposition": "attachment; filename=log-my-time-export.json",
+                "Vary": "Accept-Encoding",
+            }
+
+            if "gzip" in request.accept_encodings:
+                export = gzip_stream(export)
+                headers["Content-Encoding"] = "gzip"
+
+            return Response(stream_with_context(export), mimetype="application/json", headers=headers)
 
         if new_password := request.form.get("password"):
+            from flask import session as flask_session
+
+            from app.controllers.user import change_password
+
             has_changed = True
-            user.set_password(new_password)
+            change_password(user, new_password, keep_session=flask_session.get("login_session_key"))
             flash("Password changed.", "success")
 
         if new_email := request.form.get("email"):
@@ -169,6 +198,39 @@ def disconnect_slack():
     }
 
 
+@v.post("/settings/import")
+@login_required
+def import_data():
+    """
+    Imports time and leave records, see `app.controllers.data_import`
+
+    The body is streamed so can be any size, send it with a `Content-Type` of
+    - `application/x-ndjson`: one JSON record per line
+    - `text/csv`: a CSV with a header row
+
+    Browsers can't send these cross-site without a preflight so no CSRF token is needed
+    """
+    import dataclasses
+    import io
+
+    from flask import abort
+
+    from app.controllers import data_import
+    from app.controllers.user.util import get_user
+
+    match request.mimetype:
+        case "application/x-ndjson":
+            parse = data_import.parse_ndjson
+        case "text/csv":
+            parse = data_import.parse_csv
+        case _:
+            abort(415)
+
+    # Earlier chunks are already committed by the time a bad byte is read, so replace it and let the record fail
+    records = parse(io.TextIOWrapper(request.stream, encoding="utf-8", errors="replace"))
+    return dataclasses.asdict(data_import.import_data(get_user().id, records))
+
+
 @v.route("/settings/admin", methods=["GET", "POST"])
 @login_required
 @admin_only
@@ -198,5 +260,11 @@ def user_management():
     from app import db
     from app.models import User
 
-    users = db.session.scalars(sa.select(User)).all()
-    return render("pages/settings.html.j2", page="users", users=users)
+    # Slightly out of date stats are fine here, so the list is cached for a short time rather than versioned
+    return render(
+        "pages/settings.html.j2",
+        page="users",
+        cache_key="users",
+        cache_timeout=60,
+        lazy_replacers=lambda: {"users": db.session.scalars(sa.select(User)).all()},
+    )
@@ -1,6 +1,7 @@
 from flask import Blueprint, redirect, render_template, request
 
 from app.controllers import time
+from app.controllers.data_version import conditional_frame
 from app.controllers.user.util import login_required
 from app.lib.logger import get_logger
 
@@ -12,7 +13,6 @@ logger = get_logger(__name__)
 @login_required
 def add_time():
     if request.form:
-
         values = dict(request.form)
         clock = values.pop("clock")
 
@@ -41,6 +41,7 @@ def delete_time(row_id):
 # FRAMES
 @v.get("/frames/clock_in_form")
 @login_required
+@conditional_frame("frames/clock_in_form.html.j2")
 def clock_in_form():
     clocked_in = time.current() is not None
     on_break = time.current_break() is not None
@@ -59,13 +60,6 @@ def time_form(row_id: str = ""):
         from collections import defaultdict
 
         if row_id:
-            time.update(
-                row_id,
-                start=request.json["start"],
-                end=request.json["end"],
-                note=request.json["note"],
-            )
-
             breaks = defaultdict(dict)
 
             # Handle any edits to existing breaks
@@ -74,19 +68,22 @@ def time_form(row_id: str = ""):
                     _, field, break_id = key.split("-")
                     breaks[break_id][field] = value
 
+            # Each of the writes below commits, so check everything first rather than leave the edit half done
+            time.check_owner(row_id, breaks.keys())
+
+            time.update(
+                row_id,
+                start=request.json["start"],
+                end=request.json["end"],
+                note=request.json["note"],
+            )
+
             time.bulk_update(table="break", data=breaks)
 
             # Handle any new breaks
             new_breaks_starts = ensure_list(request.json.get("new-break-start", []))
             new_breaks_ends = ensure_list(request.json.get("new-break-end", []))
-            new_breaks = zip(new_breaks_starts, new_breaks_ends)
-
-            for new_break in new_breaks:
-                time.add_break(
-                    time_id=row_id,
-                    break_start=new_break[0],
-                    break_end=new_break[1],
-                )
+            time.add_breaks(time_id=row_id, breaks=list(zip(new_breaks_starts, new_breaks_ends)))
 
         else:
             time.create(
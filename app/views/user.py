@@ -123,6 +123,7 @@ def password_reset_form(token: str):
 
 @v.post("/password-reset/<token>")
 def password_reset_handler(token):
+    from app.controllers.user import change_password
     from app.controllers.user.token import parse_token
     from app.models import User
 
@@ -137,7 +138,7 @@ def password_reset_handler(token):
         return redirect("/login")
 
     user.verify()
-    user.set_password(request.form["password"])
+    change_password(user, request.form["password"])
 
     flash("Password successfully updated.", "success")
     return redirect("/login")
@@ -0,0 +1,9 @@
+SECRET_KEY = "dev"
+SENDGRID_API_KEY = ""
+CACHE_HOST = "localhost"
+HOST = "http://localhost:4000"
+FROM_EMAIL = ""
+ROLLBAR_SERVER_TOKEN = ""
+ROLLBAR_CLIENT_TOKEN = ""
+SLACK_CLIENT_ID = ""
+SLACK_CLIENT_SECRET = ""
@@ -13,5 +13,5 @@ else
     --capture-output \
     --enable-stdio-inheritance \
     --preload \
-    'app:create_app()'
+    'app:create_app(warm=True)'
 fi
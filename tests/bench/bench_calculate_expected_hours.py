@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+# Benchmark for `calculate_expected_hours`
+# Compares the closed form calculation against stepping through each day with arrow (the previous implementation)
+#
+# This is not collected by pytest, run it directly:
+#   python tests/bench/bench_calculate_expected_hours.py
+
+import os
+import sys
+import timeit
+
+import arrow
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.util.date import calculate_expected_hours, calculate_expected_hours_batch  # noqa: E402
+
+END = arrow.get("2024-12-31")
+HOURS_PER_DAY = 7.5
+DAYS_WORKED = "MTWTF--"
+
+
+def day_by_day(start: arrow.Arrow, end: arrow.Arrow, hours_per_day: float, days_worked: str) -> float:
+    """
+    The previous implementation, walks the range one day at a time
+    """
+    working_days = [day != "-" for day in days_worked]
+
+    work_days = 0
+    while start <= end:
+        if working_days[start.weekday()]:
+            work_days += 1
+        start = start.shift(days=1)
+
+    return work_days * hours_per_day
+
+
+def bench(label: str, func, number: int) -> float:
+    seconds = timeit.timeit(func, number=number) / number
+    print(f"  {label:<16} {seconds * 1_000_000:>12.1f} µs")
+    return seconds
+
+
+def main():
+    from datetime import date
+
+    # A public holiday on every work day in January, just to have something to search through
+    holidays = [date(year, 1, day) for year in range(2000, 2025) for day in range(1, 32)]
+
+    for years in (1, 5, 20):
+        start = END.shift(years=-years)
+
+        expected = day_by_day(start, END, HOURS_PER_DAY, DAYS_WORKED)
+        assert calculate_expected_hours(start, END, HOURS_PER_DAY, DAYS_WORKED) == expected
+
+        print(f"{years} year range:")
+        slow = bench("day by day", lambda start=start: day_by_day(start, END, HOURS_PER_DAY, DAYS_WORKED), number=5)
+        fast = bench(
+            "closed form",
+            lambda start=start: calculate_expected_hours(start, END, HOURS_PER_DAY, DAYS_WORKED),
+            number=5000,
+        )
+        bench(
+            "with holidays",
+            lambda start=start: calculate_expected_hours(start, END, HOURS_PER_DAY, DAYS_WORKED, holidays=holidays),
+            number=5000,
+        )
+        print(f"  speed up         {slow / fast:>12.0f}x")
+
+    # Every week of a 20 year range in a single call
+    ranges = []
+    week = END.shift(years=-20)
+    while week < END:
+        ranges.append((week, week.shift(days=6)))
+        week = week.shift(weeks=1)
+
+    print(f"Batch of {len(ranges)} weekly ranges:")
+    bench(
+        "batched",
+        lambda: calculate_expected_hours_batch(ranges, HOURS_PER_DAY, DAYS_WORKED, holidays=holidays),
+        number=50,
+    )
+
+
+if __name__ == "__main__":
+    main()
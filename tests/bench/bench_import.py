@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+# Benchmark for the bulk import in `app.controllers.data_import`
+# Imports a generated NDJSON file of time records (each with a break) and leave records into an empty database
+# and compares it with inserting a sample of the same records one at a time, like `time.create()` does
+#
+# This is not collected by pytest, run it directly:
+#   python tests/bench/bench_import.py [--rows 100000] [--sample 2000]
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def fixture(rows: int) -> str:
+    """
+    `rows` records, a working day of time with a lunch break for each day and a day of leave every 10 days
+    """
+    from datetime import datetime, timedelta
+
+    day = datetime(2000, 1, 3)
+    lines = []
+
+    for i in range(rows):
+        if i % 10 == 9:
+            lines.append({"type": "leave", "leave_type": "annual", "start": day.date().isoformat(), "duration": 1})
+        else:
+            lines.append(
+                {
+                    "type": "time",
+                    "start": day.replace(hour=9).isoformat(),
+                    "end": day.replace(hour=17).isoformat(),
+                    "note": f"Imported {i}",
+                    "breaks": [{"start": day.replace(hour=12).isoformat(), "end": day.replace(hour=13).isoformat()}],
+                }
+            )
+
+        day += timedelta(days=1)
+
+    return "\n".join(json.dumps(line) for line in lines)
+
+
+def one_at_a_time(user_id: int, records: list[dict]):
+    """
+    The previous way, an arrow parse, ORM add and commit per record
+    """
+    import arrow
+
+    from app import db
+    from app.models import Break, Leave, Time
+
+    for record in records:
+        if record["type"] == "leave":
+            db.session.add(
+                Leave(
+                    leave_type=record["leave_type"],
+                    start=arrow.get(record["start"], tzinfo="Europe/London").int_timestamp,
+                    duration=record["duration"],
+                    user_id=user_id,
+                )
+            )
+        else:
+            t = Time(
+                start=arrow.get(record["start"], tzinfo="Europe/London").int_timestamp,
+                end=arrow.get(record["end"], tzinfo="Europe/London").int_timestamp,
+                note=record["note"],
+                user_id=user_id,
+            )
+            db.session.add(t)
+            db.session.flush()
+
+            for brk in record["breaks"]:
+                db.session.add(
+                    Break(
+                        time_id=t.id,
+                        start=arrow.get(brk["start"], tzinfo="Europe/London").int_timestamp,
+                        end=arrow.get(brk["end"], tzinfo="Europe/London").int_timestamp,
+                    )
+                )
+
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=2000, help="How many records to insert one at a time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["TEST_DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+
+        from app import Model, create_app, db
+        from app.controllers.data_import import Importer, parse_ndjson
+        from app.models import Settings, User
+
+        app = create_app(test_mode=True)
+
+        with app.app_context():
+            Model.metadata.create_all(db.engine)
+
+            users = [User(email=f"user{i}@example.com") for i in range(2)]
+            db.session.add_all(users)
+            db.session.flush()
+            db.session.add_all(Settings.default(user.id) for user in users)
+            db.session.commit()
+            bulk_user, single_user = (user.id for user in users)
+
+            body = fixture(args.rows)
+            print(f"{args.rows} records, {len(body) / 1_000_000:.1f}MB of NDJSON")
+
+            started = time.perf_counter()
+            result = Importer(bulk_user).run(parse_ndjson(io.StringIO(body)))
+            bulk = time.perf_counter() - started
+
+            rows = result.time + result.breaks + result.leave
+            assert result.skipped == 0, result.errors
+            print(f"  bulk import      {bulk:>8.2f}s {rows / bulk:>10.0f} rows/s")
+
+            sample = [json.loads(line) for line in body.splitlines()[: args.sample]]
+            sample_rows = sum(1 + len(record.get("breaks", [])) for record in sample)
+
+            started = time.perf_counter()
+            one_at_a_time(single_user, sample)
+            single = time.perf_counter() - started
+
+            print(f"  one at a time    {single:>8.2f}s {sample_rows / single:>10.0f} rows/s ({args.sample} records)")
+            print(f"  speed up         {(rows / bulk) / (sample_rows / single):>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
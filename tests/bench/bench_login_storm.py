@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+# Benchmark for the password hashing pool in `app.lib.password`
+# Sends a burst of logins alongside steady dashboard requests to 4 threads, like a gthread worker,
+# once hashing directly on the request threads and once on the bounded pool, and reports the dashboard latency
+#
+# This is not collected by pytest, run it directly:
+#   python tests/bench/bench_login_storm.py [--logins 200] [--seconds 5] [--interval 0.005]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy as sa
+from argon2 import PasswordHasher
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app import Model  # noqa: E402
+from app.lib.password import Hasher, PasswordHasherBusy  # noqa: E402
+from app.lib.sqlite import apply_pragmas  # noqa: E402
+from app.models import Time  # noqa: E402
+
+REQUEST_THREADS = 4
+PASSWORD = "correct horse battery staple"
+
+
+def make_engine(path: str) -> sa.Engine:
+    engine = sa.create_engine(f"sqlite:///{path}", pool_size=REQUEST_THREADS)
+    apply_pragmas(engine)
+    Model.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            sa.insert(Time),
+            [{"user_id": 1, "start": i * 3600, "end": i * 3600 + 1800, "note": ""} for i in range(5000)],
+        )
+
+    return engine
+
+
+def dashboard(engine: sa.Engine):
+    """
+    Roughly the work of a stats frame, sum the time logged this week
+    """
+    with engine.connect() as conn:
+        conn.execute(
+            sa.select(sa.func.sum(Time.end - Time.start)).where(Time.user_id == 1, Time.start >= 4000 * 3600)
+        ).scalar()
+
+
+def run(engine: sa.Engine, verify, logins: int, seconds: float, interval: float) -> dict:
+    pool = ThreadPoolExecutor(max_workers=REQUEST_THREADS)
+    hash = PasswordHasher().hash(PASSWORD)
+
+    latencies: list[float] = []
+    counts = {"logins": 0, "busy": 0}
+    lock = threading.Lock()
+
+    def dashboard_request(queued: float):
+        dashboard(engine)
+        with lock:
+            latencies.append(time.perf_counter() - queued)
+
+    def login_request():
+        try:
+            verify(hash, PASSWORD)
+            key = "logins"
+        except PasswordHasherBusy:
+            key = "busy"
+
+        with lock:
+            counts[key] += 1
+
+    # The storm arrives all at once, then the dashboards keep polling
+    futures = [pool.submit(login_request) for _ in range(logins)]
+
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        futures.append(pool.submit(dashboard_request, time.perf_counter()))
+        time.sleep(interval)
+
+    for future in futures:
+        future.result()
+
+    pool.shutdown()
+
+    latencies.sort()
+    return {
+        **counts,
+        "dashboards": len(latencies),
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "max": latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"))
+
+        hasher = PasswordHasher()
+        pooled = Hasher()
+
+        profiles = {
+            "on request thread": hasher.verify,
+            "bounded pool": pooled.verify,
+        }
+
+        print(f"{args.logins} logins with a dashboard request every {args.interval * 1000:.0f}ms for {args.seconds}s")
+        print(f"{'':<20} {'logins':>8} {'busy':>6} {'dashboards':>11} {'p50':>9} {'p95':>9} {'max':>9}")
+
+        for label, verify in profiles.items():
+            result = run(engine, verify, args.logins, args.seconds, args.interval)
+            print(
+                f"{label:<20} {result['logins']:>8} {result['busy']:>6} {result['dashboards']:>11}"
+                f" {result['p50'] * 1000:>7.1f}ms {result['p95'] * 1000:>7.1f}ms {result['max'] * 1000:>7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
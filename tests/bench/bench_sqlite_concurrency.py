@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# Benchmark for the SQLite PRAGMAs in `app.lib.sqlite`
+# Runs readers and writers against the same database file at the same time, like our gunicorn threads,
+# once with SQLite's defaults and once with our PRAGMAs, and reports the throughput and lock errors
+#
+# This is not collected by pytest, run it directly:
+#   python tests/bench/bench_sqlite_concurrency.py [--readers 6] [--writers 2] [--seconds 5]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app import Model  # noqa: E402
+from app.lib.sqlite import apply_pragmas  # noqa: E402
+from app.models import Time  # noqa: E402
+
+USERS = 50
+ROWS_PER_USER = 2000
+
+
+def make_engine(path: str, tuned: bool) -> sa.Engine:
+    engine = sa.create_engine(f"sqlite:///{path}", pool_size=16)
+
+    if tuned:
+        apply_pragmas(engine)
+    else:
+        # SQLite defaults, but keep the busy timeout so both profiles wait for locks the same way
+        apply_pragmas(
+            engine, {key: None for key in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store")}
+        )
+
+    return engine
+
+
+def seed(engine: sa.Engine):
+    Model.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            sa.insert(Time),
+            [
+                {"user_id": user_id, "start": i * 3600, "end": i * 3600 + 1800, "note": ""}
+                for user_id in range(1, USERS + 1)
+                for i in range(ROWS_PER_USER)
+            ],
+        )
+
+
+def run(engine: sa.Engine, readers: int, writers: int, seconds: float) -> dict:
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(n: int):
+        user_id = n % USERS + 1
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        sa.select(sa.func.sum(Time.end - Time.start)).filter(
+                            Time.user_id == user_id, Time.start >= 0, Time.start < ROWS_PER_USER * 3600
+                        )
+                    ).scalar()
+                with lock:
+                    counts["reads"] += 1
+            except sa.exc.OperationalError:
+                with lock:
+                    counts["errors"] += 1
+
+    def writer(n: int):
+        user_id = n % USERS + 1
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(sa.insert(Time).values(user_id=user_id, start=0, end=60, note=""))
+                with lock:
+                    counts["writes"] += 1
+            except sa.exc.OperationalError:
+                with lock:
+                    counts["errors"] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+
+    for thread in threads:
+        thread.start()
+
+    time.sleep(seconds)
+    stop.set()
+
+    for thread in threads:
+        thread.join()
+
+    return {key: value / seconds if key != "errors" else value for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds}s, {USERS * ROWS_PER_USER} rows")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+
+    for label, tuned in (("default", False), ("tuned", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(os.path.join(tmp, "bench.db"), tuned)
+            seed(engine)
+            result = run(engine, args.readers, args.writers, args.seconds)
+            engine.dispose()
+
+        print(f"{label:<10} {result['reads']:>10.0f} {result['writes']:>10.0f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
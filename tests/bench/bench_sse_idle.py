@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Benchmark for the asyncio event stream server in `app.lib.events_server`
+# Connects lots of idle dashboards, then publishes a change for every user and times how long it takes to reach them all
+#
+# Needs a redis server, this is not collected by pytest, run it directly:
+#   python tests/bench/bench_sse_idle.py [--clients 1000] [--redis localhost]
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import redis.asyncio as aioredis  # noqa: E402
+
+from app.lib import events  # noqa: E402
+from app.lib.events_server import EventServer  # noqa: E402
+
+SECRET_KEY = "bench"
+PORT = 5099
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+async def connect(user_id: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    token = events.make_token(user_id, f"bench-{user_id}", SECRET_KEY)
+    writer.write(f"GET /events?token={token} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+
+    await reader.readuntil(b"\r\n\r\n")
+    await reader.readuntil(b"event: connected\ndata: \n\n")
+
+    # The writer has to be kept, the connection is closed when it is garbage collected
+    return reader, writer
+
+
+async def wait_for_change(reader: asyncio.StreamReader):
+    while True:
+        line = await reader.readline()
+        if line == b"event: changed\n":
+            return
+        if not line:
+            raise ConnectionError("Stream closed before the change arrived")
+
+
+async def main(clients: int, redis_host: str):
+    # Each connection needs a socket at both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, clients * 2 + 100)), hard))
+
+    cache = aioredis.Redis(redis_host, db=1)
+    session = aioredis.Redis(redis_host, db=0)
+    server = EventServer(
+        SECRET_KEY, cache, session, running_key=lambda user_id: f"data_version:{user_id}", origin="http://localhost"
+    )
+    server_task = asyncio.create_task(server.serve("127.0.0.1", PORT))
+    await asyncio.sleep(0.5)
+
+    before = rss_mb()
+    start = time.perf_counter()
+    connections = []
+    for batch in range(0, clients, 100):
+        connections += await asyncio.gather(*(connect(user_id) for user_id in range(batch, min(batch + 100, clients))))
+    connected = time.perf_counter() - start
+
+    print(f"{clients} clients connected in {connected:.2f}s, {server.connections} streams open")
+    memory = rss_mb() - before
+    print(f"Memory: {memory:.1f}MB for the server and clients ({memory * 1024 / clients:.1f}KB each)")
+
+    # Idle for a while, the server should barely use any CPU
+    cpu_before = time.process_time()
+    await asyncio.sleep(5)
+    print(f"CPU while idle for 5s: {(time.process_time() - cpu_before) * 1000:.0f}ms")
+
+    # Publish a change for every user and wait for all of them to arrive
+    publisher = aioredis.Redis(redis_host, db=1)
+    start = time.perf_counter()
+    waiting = [asyncio.create_task(wait_for_change(reader)) for reader, _ in connections]
+    for user_id in range(clients):
+        await publisher.publish(events.channel(user_id), json.dumps({"event": "changed", "running": False}))
+    await asyncio.gather(*waiting)
+    print(f"Fan out to {clients} clients: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    # The server should notice the disconnects straight away rather than on the next heartbeat
+    for _, writer in connections:
+        writer.close()
+    await asyncio.sleep(0.5)
+    print(f"{server.connections} streams open after disconnecting")
+
+    server_task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--redis", default="localhost")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.clients, args.redis))
@@ -2,24 +2,59 @@ import pytest
 
 
 @pytest.fixture
-def app():
+def app(tmp_path, monkeypatch):
     from app import Model, create_app, db
 
+    # Use a database just for this test, the shared test database is used by the e2e tests
+    monkeypatch.setenv("TEST_DATABASE_URL", f"sqlite:///{tmp_path}/time.test.db")
+
     app = create_app(test_mode=True)
 
-    with app.app_context(), app.test_request_context():
-        engine = db.engine
+    with app.app_context():
+        # Create tables
+        Model.metadata.create_all(db.engine)
 
-    # Create tables
-    Model.metadata.create_all(engine)
+        # Add any necessary test data
+        from app.models import Settings, User
 
-    # Add any necessary test data
-    from app.models import User
+        test_user = User(email="test@example.com")
+        db.session.add(test_user)
+
+        test_user.set_password("test")
+        test_user.verify()
+
+        db.session.add(Settings.default(test_user.id))
+        db.session.commit()
 
-    test_user = User(email="test@example.com")
-    db.session.add(test_user)
+        # The database is new so anything cached for the user is stale
+        from app.controllers import core, settings
 
-    test_user.set_password("test")
-    test_user.verify()
+        settings.clear_cache(test_user.id)
+        core.clear_first_record(test_user.id)
 
     yield app
+
+
+@pytest.fixture
+def client(app):
+    """
+    A test client logged in as the test user
+    """
+    client = app.test_client()
+    client.post("/login", data={"action": "login", "email": "test@example.com", "password": "test"})
+    return client
+
+
+@pytest.fixture
+def user_context(app):
+    """
+    A request context with the test user logged in, for calling the controllers directly
+    """
+    from flask import g
+
+    from app import db
+    from app.models import User
+
+    with app.test_request_context():
+        g.user, g.is_admin = db.session.get(User, 1), False
+        yield
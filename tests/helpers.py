@@ -36,3 +36,60 @@ def execute_sql(statements: list[str]):
         for statement in statements:
             conn.execute(sa.text(statement))
         conn.execute(sa.text("COMMIT"))
+
+
+def assert_no_full_scan(engine, statement):
+    """
+    Runs `EXPLAIN QUERY PLAN` for a SQLAlchemy statement and fails if SQLite would scan a whole table or index
+    Use this to make sure the hot queries keep using an index range scan as the tables grow
+    """
+    import re
+
+    compiled = statement.compile(dialect=engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or [])
+
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+
+    # Each row is (id, parent, notused, detail), eg. "SEARCH time USING INDEX ix_time_user_id_start_end (user_id=?)"
+    scans = [row[3] for row in plan if re.match(r"SCAN (?!CONSTANT ROW)", row[3])]
+    assert not scans, f"Full scan in query plan: {scans}\n{compiled}"
+
+
+class count_queries:
+    """
+    Context manager that counts the SQL statements run against the app database
+
+    ```python
+    with count_queries(app) as queries:
+        client.get("/frames/entries")
+    assert queries.count == 5
+    ```
+
+    The SQL of each statement is kept in `queries.statements`
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+        self.statements: list[str] = []
+
+    def _count(self, conn, cursor, statement, *args, **kwargs):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        import sqlalchemy as sa
+
+        from app import db
+
+        with self.app.app_context():
+            self.engine = db.engine
+
+        sa.event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *args):
+        import sqlalchemy as sa
+
+        sa.event.remove(self.engine, "before_cursor_execute", self._count)
@@ -0,0 +1,87 @@
+import sqlalchemy as sa
+
+from tests.helpers import count_queries
+
+
+def add_time_with_breaks(app, count: int, user_id: int = 1) -> int:
+    from app import db
+    from app.models import Break, Time
+
+    with app.app_context():
+        time = Time(start=1704099600, end=1704128400, note="", user_id=user_id)
+        db.session.add(time)
+        db.session.flush()
+
+        db.session.add_all(
+            Break(time_id=time.id, start=1704099600 + i * 600, end=1704099600 + i * 600 + 60) for i in range(count)
+        )
+        db.session.commit()
+
+        return time.id
+
+
+def edit(client, time_id: int, break_ids: list[int], new_breaks: int):
+    body = {"start": "2024-01-01 09:00", "end": "2024-01-01 17:00", "note": "Edited"}
+    for i, break_id in enumerate(break_ids):
+        body[f"break-start-{break_id}"] = f"2024-01-01 10:{i:02}"
+        body[f"break-end-{break_id}"] = f"2024-01-01 11:{i:02}"
+
+    body["new-break-start"] = ["2024-01-01 15:00"] * new_breaks
+    body["new-break-end"] = ["2024-01-01 15:30"] * new_breaks
+
+    return client.post(f"/frames/time_form/{time_id}", json=body)
+
+
+def break_ids(app, time_id: int) -> list[int]:
+    from app import db
+    from app.models import Break
+
+    with app.app_context():
+        return db.session.scalars(sa.select(Break.id).filter(Break.time_id == time_id).order_by(Break.id)).all()
+
+
+def test_statements_do_not_grow_with_breaks(app, client):
+    warm_up = add_time_with_breaks(app, 1)
+    few = add_time_with_breaks(app, 2)
+    many = add_time_with_breaks(app, 20)
+
+    # Anything only done once, eg. caching the settings
+    edit(client, warm_up, break_ids(app, warm_up), new_breaks=1)
+
+    with count_queries(app) as few_queries:
+        assert edit(client, few, break_ids(app, few), new_breaks=2).status_code == 200
+
+    with count_queries(app) as many_queries:
+        assert edit(client, many, break_ids(app, many), new_breaks=20).status_code == 200
+
+    assert many_queries.count == few_queries.count
+
+    from app import db
+    from app.models import Break
+
+    with app.app_context():
+        starts = db.session.scalars(sa.select(Break.start).filter(Break.time_id == many).order_by(Break.id)).all()
+
+    # 10:00 to 10:19 then the 20 new breaks at 15:00
+    assert starts == [1704103200 + i * 60 for i in range(20)] + [1704121200] * 20
+
+
+def test_cannot_edit_breaks_of_other_users(app, client):
+    from app import db
+    from app.models import Break, Time, User
+
+    with app.app_context():
+        db.session.add(User(email="other@example.com"))
+        db.session.commit()
+
+    mine = add_time_with_breaks(app, 1)
+    theirs = add_time_with_breaks(app, 1, user_id=2)
+    their_break = break_ids(app, theirs)[0]
+
+    assert edit(client, mine, break_ids(app, mine) + [their_break], new_breaks=0).status_code == 403
+
+    with app.app_context():
+        assert db.session.get(Break, their_break).start == 1704099600
+
+        # Nothing in the edit is written, not even the user's own time record
+        assert db.session.get(Time, mine).note == ""
@@ -124,3 +124,48 @@ def test_large_range_alt_schedule():
     )
 
     assert hours == 405  # 54 days
+
+
+# == TESTS FOR PUBLIC HOLIDAYS == #
+def test_holiday_on_work_day():
+    from datetime import date
+
+    hours = calculate_expected_hours(
+        start=arrow.get("2021-01-01"),  # Friday
+        end=arrow.get("2021-01-08"),  # Friday
+        hours_per_day=7.5,
+        days_worked="MTWTF--",
+        holidays=[date(2021, 1, 1), date(2021, 1, 2), date(2021, 1, 9)],  # Friday, Saturday, Saturday
+    )
+
+    assert hours == 37.5  # 6 work days, 1 holiday
+
+
+# == TESTS FOR BATCHES == #
+def test_batch_matches_single():
+    from app.lib.util.date import calculate_expected_hours_batch
+
+    ranges = [
+        (arrow.get("2021-01-01"), arrow.get("2021-01-01")),
+        (arrow.get("2021-01-02"), arrow.get("2021-01-03")),
+        (arrow.get("2021-01-12"), arrow.get("2021-03-28")),
+        (arrow.get("2021-03-28"), arrow.get("2021-01-12")),
+    ]
+
+    hours = calculate_expected_hours_batch(ranges, hours_per_day=7.5, days_worked="MTWTF--")
+
+    assert hours == [7.5, 0, 405, 0]
+
+
+def test_multi_year_range():
+    from datetime import timedelta
+
+    # Compare against counting each day individually
+    start = arrow.get("2001-02-03")
+    end = arrow.get("2021-11-30")
+    days = (end - start).days + 1
+    work_days = sum(1 for i in range(days) if (start.date() + timedelta(days=i)).weekday() in (0, 2, 3, 4, 6))
+
+    hours = calculate_expected_hours(start=start, end=end, hours_per_day=7.5, days_worked="M-WTF-S")
+
+    assert hours == work_days * 7.5
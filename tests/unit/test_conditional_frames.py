@@ -0,0 +1,35 @@
+import arrow
+import pytest
+
+from tests.helpers import count_queries
+
+FRAMES = ["/frames/stats", "/frames/entries", "/frames/clock_in_form"]
+
+
+@pytest.mark.parametrize("url", FRAMES)
+def test_frame_not_modified(app, client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+    with count_queries(app) as queries:
+        response = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+    # Only the login session is looked up
+    assert queries.count <= 1
+
+
+@pytest.mark.parametrize("url", FRAMES)
+def test_frame_modified_after_write(client, url):
+    etag = client.get(url).headers["ETag"]
+
+    now = arrow.now("Europe/London")
+    record = {"start": now.shift(hours=-1).format("YYYY-MM-DDTHH:mm"), "end": "", "note": ""}
+    assert client.post("/frames/time_form/", json=record).status_code == 200
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
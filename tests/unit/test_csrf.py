@@ -0,0 +1,51 @@
+import re
+
+import pytest
+
+from app.lib.util.security import InvalidCSRFToken, MissingCSRFToken, get_csrf_token, validate_csrf_token
+
+
+def _form_token(client) -> str:
+    html = client.get("/frames/time_form/").get_data(as_text=True)
+    return re.search(r'name="csrf_token" value="([^"]+)"', html).group(1)
+
+
+def test_form_post_with_token(client):
+    token = _form_token(client)
+
+    response = client.post("/time/add", data={"clock": "in", "time": "2024-01-01T09:00", "csrf_token": token})
+    assert response.status_code == 302
+
+    with pytest.raises(InvalidCSRFToken):
+        client.post("/time/add", data={"clock": "in", "time": "2024-01-01T09:00", "csrf_token": token[::-1]})
+
+
+def test_token_is_per_login_session(app):
+    from flask import session as flask_session
+
+    with app.test_request_context():
+        with pytest.raises(MissingCSRFToken):
+            get_csrf_token()
+
+        flask_session["login_session_key"] = "one"
+        token = get_csrf_token()
+        validate_csrf_token(token)
+
+        flask_session["login_session_key"] = "two"
+        assert get_csrf_token() != token
+        with pytest.raises(InvalidCSRFToken):
+            validate_csrf_token(token)
+
+        # Not a token we could have made but still just an invalid token rather than an error
+        with pytest.raises(InvalidCSRFToken):
+            validate_csrf_token("tökén")
+
+
+def test_no_redis_lookups(client, monkeypatch):
+    from app.lib import redis
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSRF tokens should not need redis")
+
+    monkeypatch.setattr(redis.session, "get", fail)
+    assert _form_token(client)
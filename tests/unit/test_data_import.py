@@ -0,0 +1,143 @@
+import json
+
+import pytest
+import sqlalchemy as sa
+
+
+def _ndjson(*records: dict) -> str:
+    return "\n".join(json.dumps(record) for record in records)
+
+
+def test_import_ndjson(app, client):
+    from app import db
+    from app.models import Break, Leave, Time
+
+    body = _ndjson(
+        {
+            "type": "time",
+            "start": "2024-01-01T09:00",
+            "end": "2024-01-01T17:00",
+            "note": "Imported",
+            "breaks": [{"start": "2024-01-01T12:00", "end": "2024-01-01T12:30"}],
+        },
+        {"type": "time", "start": "2024-01-01T16:00", "end": "2024-01-01T18:00"},
+        {"type": "time", "start": 1704186000, "end": 1704214800},
+        {"type": "leave", "leave_type": "annual", "start": "2024-01-03", "duration": 1},
+        {"type": "leave", "leave_type": "holiday", "start": "2024-01-04", "duration": 1},
+    )
+
+    result = client.post("/settings/import", data=body, content_type="application/x-ndjson").json
+    assert (result["time"], result["breaks"], result["leave"], result["skipped"]) == (2, 1, 1, 2)
+    assert "Line 2: overlaps another time record in the import" in result["errors"]
+
+    with app.app_context():
+        # Europe/London is UTC in January
+        assert db.session.scalars(sa.select(Time.start).order_by(Time.start)).all() == [1704099600, 1704186000]
+        assert db.session.scalar(sa.select(Break.end - Break.start)) == 1800
+        assert db.session.scalar(sa.select(Leave.leave_type)) == "annual"
+
+    # Importing again overlaps everything already there
+    result = client.post("/settings/import", data=body, content_type="application/x-ndjson").json
+    assert (result["time"], result["leave"]) == (0, 0)
+    assert "Line 1: overlaps an existing time record" in result["errors"]
+    assert "Line 4: leave already starts at this time" in result["errors"]
+
+
+def test_import_csv(app, client):
+    from app import db
+    from app.models import Break
+
+    body = "\n".join(
+        [
+            "type,start,end,note,leave_type,duration,public_holiday",
+            "time,2024-01-01T09:00,2024-01-01T17:00,Office,,,",
+            "break,2024-01-01T12:00,2024-01-01T12:30,Lunch,,,",
+            "break,2024-01-01T18:00,2024-01-01T18:30,,,,",
+            "leave,2024-01-02,,,sick,0.5,false",
+        ]
+    )
+
+    result = client.post("/settings/import", data=body, content_type="text/csv").json
+    assert (result["time"], result["breaks"], result["leave"], result["skipped"]) == (0, 0, 1, 1)
+    assert result["errors"] == ["Line 2: break outside of its time record"]
+
+    result = client.post("/settings/import", data="\n".join(body.splitlines()[:3]), content_type="text/csv").json
+    assert (result["time"], result["breaks"]) == (1, 1)
+
+    with app.app_context():
+        assert db.session.scalar(sa.select(Break.note)) == "Lunch"
+
+
+def test_import_needs_a_known_format(client):
+    assert client.post("/settings/import", data="{}", content_type="text/plain").status_code == 415
+
+
+def test_import_reports_bad_input(client):
+    body = b"\n".join([b"[1]", b'"x"', b"{not json", b'{"type": "time", "start": "\xff\xfe", "end": 1}'])
+
+    result = client.post("/settings/import", data=body, content_type="application/x-ndjson").json
+    assert result["skipped"] == 4
+    assert result["errors"][:3] == [
+        "Line 1: expected a JSON object",
+        "Line 2: expected a JSON object",
+        "Line 3: invalid JSON",
+    ]
+
+
+def test_caches_invalidated_when_a_chunk_fails(app, monkeypatch):
+    from app.controllers import data_import, data_version
+
+    monkeypatch.setattr(data_import, "CHUNK_SIZE", 1)
+
+    insert = data_import.Importer.insert
+
+    def fail_second_chunk(self, times, leave):
+        if self.earliest is not None:
+            raise RuntimeError("database is locked")
+        insert(self, times, leave)
+
+    monkeypatch.setattr(data_import.Importer, "insert", fail_second_chunk)
+
+    bumped = []
+    monkeypatch.setattr(data_version, "bump", lambda user_id=None: bumped.append(user_id))
+
+    records = [
+        (1, {"type": "time", "start": 1704099600, "end": 1704128400}),
+        (2, {"type": "time", "start": 1704186000, "end": 1704214800}),
+    ]
+
+    with app.app_context(), pytest.raises(RuntimeError):
+        data_import.import_data(1, records)
+
+    # The first chunk was committed, so its caches are invalidated
+    assert bumped == [1]
+
+
+def test_cli(app, tmp_path):
+    import re
+
+    runner = app.test_cli_runner()
+
+    # The format comes from the file extension
+    path = tmp_path / "records.csv"
+    path.write_text("type,start,end\ntime,2024-01-01T09:00,2024-01-01T17:00\nbreak,2024-01-01T12:00,2024-01-01T12:30\n")
+
+    result = runner.invoke(args=["data", "import", str(path), "--user", "test@example.com"])
+    assert result.exit_code == 0, result.output
+    assert re.fullmatch(r"Imported 1 time, 1 break and 0 leave records \(\d+ rows/s\), skipped 0\.\n", result.stdout)
+
+    # Anything else is newline delimited JSON unless given
+    leave = '{"type": "leave", "leave_type": "annual", "start": "2024-01-02", "duration": 1}'
+    result = runner.invoke(args=["data", "import", "-", "--user", "test@example.com"], input=leave)
+    assert "0 time, 0 break and 1 leave records" in result.stdout
+
+    result = runner.invoke(
+        args=["data", "import", "-", "--user", "test@example.com", "--format", "csv"],
+        input="type,start,leave_type,duration\nleave,2024-01-02,annual,1\n",
+    )
+    assert "skipped 1." in result.stdout
+    assert "Line 2: leave already starts at this time" in result.stderr
+
+    result = runner.invoke(args=["data", "import", str(path), "--user", "nobody@example.com"])
+    assert result.exit_code == 1
+    assert "No user with the email nobody@example.com" in result.output
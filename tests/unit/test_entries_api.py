@@ -0,0 +1,65 @@
+import pytest
+
+
+def add_entries(app):
+    """
+    Time and leave on the same days, so some entries start at the same time
+    """
+    from app import db
+    from app.models import Break, Leave, Time
+
+    with app.app_context():
+        for day in range(30):
+            start = 1704067200 + day * 86400
+            time = Time(start=start, end=start + 3600, note=f"Day {day}", user_id=1)
+            db.session.add(time)
+            db.session.flush()
+            db.session.add(Break(time_id=time.id, start=start + 60, end=start + 120))
+
+            if day % 3 == 0:
+                db.session.add(Leave(leave_type="annual", start=start, duration=0.5, user_id=1))
+
+        db.session.commit()
+
+
+def page_through(client, **params) -> list[tuple]:
+    seen = []
+    cursor = None
+
+    while True:
+        body = client.get("/api/v1/entries", query_string={**params, "cursor": cursor or ""}).json
+        seen += [(entry["start"], entry["type"], entry["id"]) for entry in body["entries"]]
+
+        if not (cursor := body["next"]):
+            return seen
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_through_everything_once(app, client, order):
+    add_entries(app)
+
+    seen = page_through(client, limit=7, order=order)
+
+    assert len(seen) == 40
+    assert seen == sorted(set(seen), reverse=order == "desc")
+
+
+def test_filters(app, client):
+    add_entries(app)
+
+    body = client.get("/api/v1/entries", query_string={"type": "time", "from": "2024-01-02", "to": "2024-01-04"}).json
+    assert [entry["note"] for entry in body["entries"]] == ["Day 1", "Day 2"]
+    assert body["entries"][0]["breaks"] == [{"start": 1704153660, "end": 1704153720, "note": None}]
+    assert body["next"] is None
+
+    assert len(page_through(client, type="leave", limit=1)) == 10
+
+
+def test_page_size_is_capped(app, client, monkeypatch):
+    from app.controllers import entries
+
+    add_entries(app)
+    monkeypatch.setattr(entries, "MAX_PAGE_SIZE", 5)
+
+    assert len(client.get("/api/v1/entries", query_string={"limit": 10_000}).json["entries"]) == 5
+    assert client.get("/api/v1/entries", query_string={"cursor": "nonsense"}).status_code == 400
@@ -0,0 +1,60 @@
+from app.lib import events
+
+
+def test_token():
+    token = events.make_token(42, "login session", "secret")
+
+    assert events.read_token(token, "secret") == (42, events.session_digest("login session"))
+    assert events.read_token(token, "other secret") is None
+    assert events.read_token("nonsense", "secret") is None
+    assert "login session" not in token
+
+
+def test_dash_polls_without_events_url(app, client):
+    assert "EventSource(" not in client.get("/dash").text
+
+    # The Flask view ties up a worker thread for each dashboard so is only for debug mode
+    token = events.make_token(1, "login session", app.config["SECRET_KEY"])
+    assert client.get(f"/events?token={token}").status_code == 404
+
+
+def test_logout_revokes_token(app, client):
+    with client.session_transaction() as flask_session:
+        key = flask_session["login_session_key"]
+
+    token = events.read_token(events.make_token(1, key, app.config["SECRET_KEY"]), app.config["SECRET_KEY"])
+    assert not events.is_revoked(token)
+
+    client.get("/logout")
+    assert events.is_revoked(token)
+
+
+def test_stream_stats_only_while_running():
+    stream = events.Stream(running=False, now=0)
+
+    # Only heartbeats while clocked out
+    assert stream.timeout(0) == events.HEARTBEAT_INTERVAL
+    assert stream.on_tick(events.HEARTBEAT_INTERVAL) == b": ping\n\n"
+    assert stream.on_tick(events.STATS_INTERVAL) == b": ping\n\n"
+
+    # Clocking in is passed on and starts the stats events
+    assert (
+        stream.on_message('{"event": "changed", "running": true}', 100)
+        == b'event: changed\ndata: {"running": true}\n\n'
+    )
+    assert stream.on_tick(100 + events.STATS_INTERVAL - 1) == b": ping\n\n"
+    assert stream.on_tick(100 + events.STATS_INTERVAL) == b"event: stats\ndata: \n\n"
+
+
+def test_flask_stream_ends_when_revoked(app):
+    import uuid
+
+    key = uuid.uuid4().hex
+    token = events.read_token(events.make_token(1, key, app.config["SECRET_KEY"]), app.config["SECRET_KEY"])
+
+    with app.app_context():
+        stream = events.stream(token)
+        assert next(stream) == events.Stream(running=False, now=0).start()
+
+        events.revoke(key)
+        assert list(stream) == []
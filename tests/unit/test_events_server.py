@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+import uuid
+from unittest.mock import Mock
+
+import pytest
+
+from app.lib import events
+from app.lib.events_server import Connection, EventServer
+
+
+@pytest.fixture
+def server(app):
+    """
+    Runs `EventServer` on a free port, yields a function to run a test coroutine against it
+    """
+    import redis.asyncio as aioredis
+
+    from app.controllers import data_version
+    from app.lib.redis import RedisDatabase
+
+    def run(test):
+        async def main():
+            cache = aioredis.Redis(app.config["CACHE_HOST"], db=RedisDatabase.CACHE.value)
+            session = aioredis.Redis(app.config["CACHE_HOST"], db=RedisDatabase.SESSION.value)
+            server = EventServer(
+                app.config["SECRET_KEY"], cache, session, running_key=data_version.cache_key, origin=app.config["HOST"]
+            )
+
+            dispatcher = asyncio.create_task(server.dispatch())
+            listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+
+            # Wait for the subscription so nothing published by the test is missed
+            await until(lambda: cache.pubsub_numsub(events.REVOKED_CHANNEL), lambda result: result[0][1])
+
+            try:
+                async with listener:
+                    await test(server, port)
+            finally:
+                dispatcher.cancel()
+                await cache.aclose()
+                await session.aclose()
+
+        with app.app_context():
+            asyncio.run(main())
+
+    return run
+
+
+async def until(fetch, check=bool, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while True:
+        result = fetch()
+        if asyncio.iscoroutine(result):
+            result = await result
+        if check(result):
+            return
+        assert time.monotonic() < deadline, "Timed out"
+        await asyncio.sleep(0.01)
+
+
+async def request(port: int, path: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+
+    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 2)
+    return reader, writer, head.split(b"\r\n", 1)[0]
+
+
+async def connect(app, port: int, user_id: int, login_session_key: str = ""):
+    token = events.make_token(user_id, login_session_key or uuid.uuid4().hex, app.config["SECRET_KEY"])
+    reader, writer, status = await request(port, f"/events?token={token}")
+    assert status == b"HTTP/1.1 200 OK"
+
+    await asyncio.wait_for(reader.readuntil(b"event: connected\ndata: \n\n"), 2)
+    return reader, writer
+
+
+def test_rejects_bad_requests(app, server):
+    async def test(server, port):
+        assert (await request(port, "/other"))[2] == b"HTTP/1.1 404 Not Found"
+        assert (await request(port, "/events?token=nonsense"))[2] == b"HTTP/1.1 401 Unauthorized"
+
+        key = uuid.uuid4().hex
+        events.revoke(key)
+        token = events.make_token(1, key, app.config["SECRET_KEY"])
+        assert (await request(port, f"/events?token={token}"))[2] == b"HTTP/1.1 401 Unauthorized"
+
+        # Nothing is left behind by the rejected connections
+        assert server.connections == 0
+
+    server(test)
+
+
+def test_fan_out_and_disconnect(app, server):
+    async def test(server, port):
+        first, second, other = [await connect(app, port, user_id) for user_id in (1, 1, 2)]
+        assert server.connections == 3
+
+        events.publish(1, "changed", {"running": True})
+        for reader, _ in (first, second):
+            line = await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)
+            assert line == b'event: changed\ndata: {"running": true}\n\n'
+
+        # Closing the connection is noticed straight away
+        first[1].close()
+        await until(lambda: server.connections == 2)
+
+        for _, writer in (second, other):
+            writer.close()
+        await until(lambda: server.connections == 0)
+        assert not server.subscribers
+
+    server(test)
+
+
+def test_revoke_closes_streams(app, server):
+    async def test(server, port):
+        key = uuid.uuid4().hex
+        (revoked, _), (kept, kept_writer) = [
+            await connect(app, port, 1, login_session_key) for login_session_key in (key, "")
+        ]
+
+        events.revoke(key)
+        assert await asyncio.wait_for(revoked.read(), 2) == b""
+        await until(lambda: server.connections == 1)
+
+        # The other login session carries on
+        events.publish(1, "changed", {})
+        assert await asyncio.wait_for(kept.readuntil(b"\n\n"), 2) == b"event: changed\ndata: {}\n\n"
+        kept_writer.close()
+
+    server(test)
+
+
+def test_slow_clients_are_closed(app, server):
+    async def test(server, port):
+        # A connection whose queue is full because it is not being read
+        queue = asyncio.Queue(maxsize=1)
+        queue.put_nowait(b"{}")
+        writer = Mock()
+        server.subscribers[3].add(Connection(events.session_digest("slow"), queue, writer))
+
+        events.publish(3, "changed", {})
+        await until(lambda: writer.close.called)
+
+    server(test)
@@ -0,0 +1,28 @@
+import gzip
+import json
+
+
+def test_export_is_gzipped(app, client):
+    from app import db
+    from app.models import Break, Time
+
+    with app.app_context():
+        time = Time(start=1704099600, end=1704128400, note="Exported", user_id=1)
+        db.session.add(time)
+        db.session.flush()
+        db.session.add(Break(time_id=time.id, start=1704110400, end=1704112200))
+        db.session.commit()
+
+    response = client.post("/settings/account", data={"submit": "export"}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    export = json.loads(gzip.decompress(response.data))
+    assert [t["note"] for t in export["time"]] == ["Exported"]
+    assert export["time"][0]["breaks"][0]["end"] == 1704112200
+    assert export["leave"] == []
+
+    # Without gzip support it is plain JSON
+    response = client.post("/settings/account", data={"submit": "export"})
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.data) == export
@@ -0,0 +1,53 @@
+import uuid
+
+from app.lib.blocks import FragmentCache, fragment_cache, fragment_cache_hit, fragment_cache_miss, render_block
+
+
+def test_render_block_is_cached(app):
+    hits, misses, calls = [], [], []
+
+    # Redis isn't cleared between test runs, so use keys that can't be cached already
+    run = uuid.uuid4().hex
+
+    def holidays():
+        calls.append(1)
+        return {"upcoming_holidays": {"2024-12-25": "Christmas Day"}}
+
+    def render(cache_key: str) -> str:
+        return render_block(
+            "pages/holidays.html.j2", "frame", page="upcoming", cache_key=f"{run}:{cache_key}", lazy_replacers=holidays
+        )
+
+    with (
+        app.test_request_context(),
+        fragment_cache_hit.connected_to(lambda sender, **kw: hits.append(kw["source"])),
+        fragment_cache_miss.connected_to(lambda sender, **kw: misses.append(1)),
+    ):
+        fragment_cache.clear()
+
+        first = render("test")
+        assert "Christmas Day" in first
+        assert render("test") == first
+        assert hits == ["local"] and len(misses) == 1
+
+        # Another process would find it in redis
+        fragment_cache.clear()
+        assert render("test") == first
+        assert hits == ["local", "redis"]
+
+        # A new key renders again
+        render("other")
+        assert len(misses) == 2
+        assert len(calls) == 2
+
+
+def test_local_cache_evicts_least_recently_used(app):
+    cache = FragmentCache(maxsize=2)
+
+    with app.app_context():
+        cache.set("fragment:test:a", "a", 60)
+        cache.set("fragment:test:b", "b", 60)
+        cache.get("fragment:test:a")
+        cache.set("fragment:test:c", "c", 60)
+
+        assert list(cache._local) == ["fragment:test:a", "fragment:test:c"]
@@ -0,0 +1,69 @@
+from datetime import date
+
+import holidays
+
+from app.controllers.holidays import calendar, holidays_between, next_holiday
+
+
+def test_calendar_is_sorted_and_cached():
+    dates, names = calendar("GB", "SCT", 2024)
+
+    assert list(dates) == sorted(holidays.country_holidays("GB", subdiv="SCT", years=[2024]))
+    assert len(dates) == len(names)
+    assert calendar("GB", "SCT", 2024) is calendar("GB", "SCT", 2024)
+
+
+def test_next_holiday():
+    assert next_holiday("GB", "ENG", date(2024, 12, 24)) == {"name": "Christmas Day", "date": date(2024, 12, 25)}
+
+    # Not on the day itself
+    assert next_holiday("GB", "ENG", date(2024, 12, 25))["date"] == date(2024, 12, 26)
+
+    # Rolls over into the next year
+    assert next_holiday("GB", "ENG", date(2024, 12, 27))["date"] == date(2025, 1, 1)
+
+
+def test_holidays_between():
+    expected = {
+        dt: name
+        for dt, name in holidays.country_holidays("GB", subdiv="ENG", years=[2023, 2024]).items()
+        if date(2023, 6, 1) <= dt <= date(2024, 5, 6)
+    }
+
+    found = holidays_between("GB", "ENG", date(2023, 6, 1), date(2024, 5, 6))
+    assert found == expected
+    assert list(found) == sorted(expected)
+    assert date(2024, 5, 6) in found
+
+    assert date(2024, 5, 6) not in holidays_between("GB", "ENG", date(2023, 6, 1), date(2024, 5, 6), include_end=False)
+
+
+def test_frame_changes_with_location(app, client):
+    import sqlalchemy as sa
+
+    from app import db
+    from app.controllers import settings
+    from app.models import Settings
+
+    def set_location(location: str):
+        with app.app_context():
+            db.session.execute(sa.update(Settings).where(Settings.user_id == 1).values(holiday_location=location))
+            db.session.commit()
+            settings.clear_cache(1)
+
+    set_location("GB/ENG")
+    england = client.get("/holidays/upcoming?block=frame")
+    assert england.status_code == 200
+    assert "no-cache" in england.headers["Cache-Control"]
+    assert "max-age" not in england.headers["Cache-Control"]
+
+    # Unchanged so the browser can use its copy
+    assert (
+        client.get("/holidays/upcoming?block=frame", headers={"If-None-Match": england.headers["ETag"]}).status_code
+        == 304
+    )
+
+    set_location("GB/SCT")
+    scotland = client.get("/holidays/upcoming?block=frame", headers={"If-None-Match": england.headers["ETag"]})
+    assert scotland.status_code == 200
+    assert scotland.text != england.text
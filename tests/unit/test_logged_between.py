@@ -0,0 +1,85 @@
+import arrow
+import pytest
+import sqlalchemy as sa
+
+# Monday 1st January 2024 to Monday 8th January 2024
+START, END = 1704067200, 1704672000
+NOW = END + 3600
+
+
+@pytest.fixture
+def records(user_context, monkeypatch):
+    """
+    Time, breaks and leave around the window, with the clock stopped at `NOW`
+    """
+    from app import db
+    from app.models import Break, Leave, Time
+
+    monkeypatch.setattr(arrow, "utcnow", lambda: arrow.get(NOW))
+
+    def add_time(start: int, end: int | None, breaks=()) -> Time:
+        time = Time(start=start, end=end, note="", user_id=1)
+        db.session.add(time)
+        db.session.flush()
+        db.session.add_all(Break(time_id=time.id, start=s, end=e) for s, e in breaks)
+        return time
+
+    # On the edges, the start is included and the end isn't
+    add_time(START, START + 3600)
+    add_time(END, END + 600)
+    add_time(START - 3600, START - 1800)
+
+    # Breaks including one that hasn't finished
+    add_time(START + 86400, START + 86400 + 8 * 3600, breaks=[(START + 86400 + 3600, START + 86400 + 5400)])
+    add_time(END - 7200, None, breaks=[(END - 3600, None)])
+
+    # Full and partial days of leave
+    db.session.add_all(
+        [
+            Leave(leave_type="annual", start=START + 2 * 86400, duration=1, user_id=1),
+            Leave(leave_type="sick", start=START + 3 * 86400, duration=0.5, user_id=1),
+            Leave(leave_type="annual", start=END, duration=1, user_id=1),
+        ]
+    )
+    db.session.commit()
+
+
+def python_sum(start: int, end: int | None) -> int:
+    """
+    The total the way it was worked out before the SQL aggregate, with `Time.logged()` and `Leave.logged()`
+    """
+    from app import db
+    from app.models import Leave, Time
+
+    def in_range(model):
+        return model.start >= start if end is None else sa.and_(model.start >= start, model.start < end)
+
+    times = db.session.scalars(sa.select(Time).filter(Time.user_id == 1, in_range(Time))).all()
+    leave = db.session.scalars(
+        sa.select(Leave).options(*Leave.eager_load()).filter(Leave.user_id == 1, in_range(Leave))
+    ).all()
+
+    return sum(t.logged() for t in times) + sum(lv.logged() for lv in leave)
+
+
+@pytest.mark.parametrize("start, end", [(START, END), (START, None), (0, START), (END, END + 86400)])
+@pytest.mark.parametrize("hours_per_day", [7.5, 8])
+def test_matches_python_sum(records, start, end, hours_per_day):
+    from app import db
+    from app.controllers import settings
+    from app.controllers.core import logged_between
+    from app.models import Settings
+
+    db.session.execute(sa.update(Settings).where(Settings.user_id == 1).values(hours_per_day=hours_per_day))
+    db.session.commit()
+    settings.clear_cache(1)
+
+    assert logged_between(start, end, now=NOW) == python_sum(start, end)
+
+
+def test_window(records):
+    from app.controllers.core import logged_between
+
+    # 1 hour at the start, 8 hours less a 30 minute break, 3 hours still open less 2 hours of a break still open
+    # and a day and a half of leave at 7.5 hours a day
+    assert logged_between(START, END, now=NOW) == 3600 + 27000 + 3600 + int(1.5 * 7.5 * 3600)
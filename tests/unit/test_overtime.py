@@ -0,0 +1,82 @@
+import sqlalchemy as sa
+
+# Monday 4th March 2024, the checkpoint is always here in these tests
+UNTIL = 1709510400
+
+
+def full_recalculation() -> int:
+    """
+    The total logged before `UNTIL` worked out from every record, like before there was a checkpoint
+    """
+    from app import db
+    from app.models import Leave, Time
+
+    times = db.session.scalars(sa.select(Time).filter(Time.user_id == 1, Time.start < UNTIL)).all()
+    leave = db.session.scalars(
+        sa.select(Leave).options(*Leave.eager_load()).filter(Leave.user_id == 1, Leave.start < UNTIL)
+    ).all()
+
+    return sum(t.logged() for t in times) + sum(lv.logged() for lv in leave)
+
+
+def checkpoint() -> tuple[int, int]:
+    from app import db
+    from app.controllers import overtime
+
+    # Like the start of a new request, so nothing is left over from the writes
+    db.session.expire_all()
+    return overtime.logged_before(UNTIL)
+
+
+def test_checkpoint_matches_full_recalculation(user_context):
+    from app.controllers import leave, settings, time
+
+    first = time.create("2024-01-01T09:00", "2024-01-01T17:00")
+    time.add_break(first.id, "2024-01-01T12:00", "2024-01-01T12:30")
+    time.create("2024-02-01T09:00", "2024-02-01T10:00")
+    annual = leave.create("annual", "2024-02-05", 1)
+
+    assert checkpoint() == (UNTIL, full_recalculation())
+
+    # After the checkpoint, so it is kept
+    time.create("2024-03-05T09:00", "2024-03-05T17:00")
+    assert checkpoint() == (UNTIL, full_recalculation())
+
+    time.update(first.id, "2024-01-01T08:00", "2024-01-01T17:00")
+    assert checkpoint() == (UNTIL, full_recalculation())
+
+    leave.update(annual.id, "annual", "2024-02-06", 0.5)
+    assert checkpoint() == (UNTIL, full_recalculation())
+
+    settings.update(hours_per_day="8")
+    assert checkpoint() == (UNTIL, full_recalculation())
+
+    leave.delete(annual.id)
+    time.delete(first.id)
+    assert checkpoint() == (UNTIL, full_recalculation())
+    assert checkpoint()[1] == 3600
+
+
+def test_checkpoint_stops_at_open_record(user_context):
+    from app.controllers import time
+
+    open_record = time.create("2024-02-01T09:00")
+    assert checkpoint() == (open_record.start, 0)
+
+
+def test_stale_checkpoint_is_not_saved(user_context):
+    from app import db
+    from app.controllers import overtime, time
+    from app.models import OvertimeCheckpoint
+
+    time.create("2024-01-01T09:00", "2024-01-01T10:00")
+    assert checkpoint() == (UNTIL, 3600)
+
+    # A total worked out before the checkpoint was read again and saved, eg. by another request
+    read_version = db.session.scalar(sa.select(OvertimeCheckpoint.version))
+    overtime.invalidate()
+    db.session.commit()
+
+    overtime._save(1, UNTIL, 1234, read_version=read_version)
+    assert db.session.scalar(sa.select(OvertimeCheckpoint.logged)) == 0
+    assert checkpoint() == (UNTIL, 3600)
@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+import sqlalchemy as sa
+
+from app.lib import password
+from app.lib.password import Hasher, PasswordHasherBusy
+
+
+def test_rehash_on_login(app, monkeypatch):
+    from app import db
+    from app.models import User
+
+    with app.app_context():
+        old_hash = db.session.scalars(sa.select(User.password).filter_by(id=1)).one()
+
+    # Change the parameters, the next login should upgrade the stored hash
+    monkeypatch.setattr(password, "_hasher", Hasher(params={"time_cost": 1, "memory_cost": 8192, "parallelism": 1}))
+
+    response = app.test_client().post(
+        "/login", data={"action": "login", "email": "test@example.com", "password": "test"}
+    )
+    assert response.headers["Location"] == "/dash"
+
+    with app.app_context():
+        new_hash = db.session.scalars(sa.select(User.password).filter_by(id=1)).one()
+
+    assert new_hash != old_hash
+    assert "m=8192,t=1,p=1" in new_hash
+    assert password.get_hasher().verify(new_hash, "test")
+
+
+def test_busy_rehash_does_not_fail_login(app, monkeypatch):
+    from app import db
+    from app.models import User
+
+    with app.app_context():
+        old_hash = db.session.scalars(sa.select(User.password).filter_by(id=1)).one()
+
+    # The parameters have changed but there is no room on the pool for the rehash
+    hasher = Hasher(params={"time_cost": 1, "memory_cost": 8192, "parallelism": 1})
+    monkeypatch.setattr(password, "_hasher", hasher)
+    monkeypatch.setattr(hasher, "hash", Mock(side_effect=PasswordHasherBusy()))
+
+    response = app.test_client().post(
+        "/login", data={"action": "login", "email": "test@example.com", "password": "test"}
+    )
+    assert response.headers["Location"] == "/dash"
+
+    with app.app_context():
+        assert db.session.scalars(sa.select(User.password).filter_by(id=1)).one() == old_hash
+
+
+def test_busy_when_pool_full():
+    hasher = Hasher(workers=1, max_pending=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    thread = threading.Thread(target=hasher.run, args=(block,))
+    thread.start()
+    started.wait()
+
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("test")
+    finally:
+        release.set()
+        thread.join()
+
+    assert hasher.verify(hasher.hash("test"), "test")
+    assert not hasher.verify(hasher.hash("test"), "wrong")
@@ -0,0 +1,38 @@
+import sqlalchemy as sa
+
+
+def test_purge_expired_sessions_in_batches(app):
+    import arrow
+
+    from app import db
+    from app.controllers.user import purge_expired_sessions
+    from app.models import LoginSession
+
+    now = arrow.utcnow().int_timestamp
+
+    with app.app_context():
+        db.session.add_all(LoginSession(key=f"expired-{i}", expires=now - 60, user_id=1) for i in range(25))
+        db.session.add(LoginSession(key="current", expires=now + 60, user_id=1))
+        db.session.commit()
+
+        assert purge_expired_sessions(batch_size=10) == 25
+        assert db.session.scalars(sa.select(LoginSession.key)).all() == ["current"]
+
+
+def test_login_leaves_expired_sessions(app):
+    import arrow
+
+    from app import db
+    from app.models import LoginSession
+
+    with app.app_context():
+        db.session.add(LoginSession(key="expired", expires=arrow.utcnow().int_timestamp - 60, user_id=1))
+        db.session.commit()
+
+    app.test_client().post("/login", data={"action": "login", "email": "test@example.com", "password": "test"})
+
+    with app.app_context():
+        assert db.session.scalar(sa.select(sa.func.count()).select_from(LoginSession)) == 2
+
+    result = app.test_cli_runner().invoke(args=["sessions", "purge"])
+    assert "Purged 1 expired sessions." in result.output
@@ -0,0 +1,46 @@
+import pytest
+
+from tests.helpers import count_queries
+
+
+def add_entries(app, count: int):
+    """
+    Add `count` time records (each with 2 breaks) and `count` leave records to the current week
+    """
+    import arrow
+
+    from app import db
+    from app.models import Break, Leave, Time
+
+    # Midday on the Monday of this week, in UTC
+    monday = arrow.utcnow().floor("week").shift(hours=12)
+
+    with app.app_context():
+        for i in range(count):
+            start = monday.shift(minutes=i * 10).int_timestamp
+
+            time = Time(start=start, end=start + 300, note="", user_id=1)
+            db.session.add(time)
+            db.session.flush()
+
+            db.session.add(Break(time_id=time.id, start=start + 60, end=start + 90))
+            db.session.add(Break(time_id=time.id, start=start + 120, end=start + 150))
+            db.session.add(Leave(leave_type="annual", start=start, duration=0.5, user_id=1))
+
+        db.session.commit()
+
+
+@pytest.mark.parametrize("url", ["/dash", "/frames/entries", "/frames/stats", "/frames/clock_in_form"])
+def test_query_count_does_not_grow_with_entries(app, client, url):
+    add_entries(app, 1)
+    client.get(url)  # Warm up anything that is only done once, eg. the overtime checkpoint
+
+    with count_queries(app) as one_entry:
+        assert client.get(url).status_code == 200
+
+    add_entries(app, 29)
+
+    with count_queries(app) as many_entries:
+        assert client.get(url).status_code == 200
+
+    assert many_entries.count == one_entry.count
@@ -0,0 +1,49 @@
+import pytest
+import sqlalchemy as sa
+
+from app import Model
+from app.controllers import leave, overtime, settings, time
+from app.controllers.core import _logged_between_statement
+from app.controllers.entries import Cursor, _leave_statement, _times_statement
+from app.controllers.user import _purge_batch_statement
+from app.controllers.user.session_cache import _load_statement
+from app.models import Leave, Time
+from tests.helpers import assert_no_full_scan
+
+
+@pytest.fixture
+def engine():
+    engine = sa.create_engine("sqlite://")
+    Model.metadata.create_all(engine)
+    return engine
+
+
+# The hot queries, built the same way as the controllers build them
+STATEMENTS = {
+    "Time.between": Time._between_statement(user_id=1, start=0, end=100),
+    "Time.since": Time._since_statement(user_id=1, timestamp=0),
+    "time.all": time._all_statement(user_id=1),
+    "time.all_for_week": time._all_for_week_statement(user_id=1, start=0, end=100),
+    "time.current": time._current_statement(user_id=1),
+    "time.current_break": time._current_break_statement(user_id=1),
+    "time.break_end": time._break_end_statement(time_id=1),
+    "Leave.between": Leave._between_statement(user_id=1, start=0, end=100),
+    "leave.all_for_week": leave._all_for_week_statement(user_id=1, start=0, end=100),
+    "entries.page (time)": _times_statement(
+        user_id=1, after=Cursor(0, "time", 1), since=None, until=100, limit=101, descending=False
+    ),
+    "entries.page (leave, desc)": _leave_statement(
+        user_id=1, after=Cursor(100, "time", 1), since=None, until=None, limit=101, descending=True
+    ),
+    "overtime.first_open": overtime._first_open_statement(user_id=1),
+    "settings.fetch": settings._fetch_statement(user_id=1),
+    "session_cache._load": _load_statement("abc"),
+    "user.purge_expired_sessions": _purge_batch_statement(now=100, batch_size=500),
+    "core.logged_between": _logged_between_statement(user_id=1, start=0, end=100, now=50, hours_per_day=7.5),
+    "core.logged_between (no end)": _logged_between_statement(user_id=1, start=0, end=None, now=50, hours_per_day=7.5),
+}
+
+
+@pytest.mark.parametrize("name", STATEMENTS.keys())
+def test_uses_index(engine, name):
+    assert_no_full_scan(engine, STATEMENTS[name])
@@ -0,0 +1,88 @@
+from tests.helpers import count_queries
+
+
+def _login(app):
+    client = app.test_client()
+    client.post("/login", data={"action": "login", "email": "test@example.com", "password": "test"})
+    return client
+
+
+def _login_session_queries(queries) -> list[str]:
+    return [statement for statement in queries.statements if "login_session" in statement]
+
+
+def test_authentication_needs_no_query(app, client):
+    client.get("/frames/clock_in_form")
+
+    with count_queries(app) as queries:
+        assert client.get("/frames/clock_in_form").status_code == 200
+
+    assert not _login_session_queries(queries)
+
+
+def test_logout_revokes_session(app, client):
+    from app.lib.redis import session
+
+    with client.session_transaction() as flask_session:
+        key = flask_session["login_session_key"]
+
+    assert client.get("/frames/clock_in_form").status_code == 200
+    assert session.exists(f"login_session:{key}")
+
+    client.get("/logout")
+    assert not session.exists(f"login_session:{key}")
+
+    # Reusing the old cookie doesn't work
+    with client.session_transaction() as flask_session:
+        flask_session["login_session_key"] = key
+
+    assert client.get("/frames/clock_in_form").headers["Location"] == "/login"
+
+
+def test_password_change_revokes_other_sessions(app, client):
+    other = _login(app)
+    assert other.get("/frames/clock_in_form").status_code == 200
+
+    client.post("/settings/account", data={"password": "new password"})
+
+    assert client.get("/frames/clock_in_form").status_code == 200
+    assert other.get("/frames/clock_in_form").headers["Location"] == "/login"
+
+
+def test_revoked_in_another_worker(app, client):
+    import sqlalchemy as sa
+
+    from app import db
+    from app.lib.redis import session
+    from app.models import LoginSession
+
+    with client.session_transaction() as flask_session:
+        key = flask_session["login_session_key"]
+
+    assert client.get("/frames/clock_in_form").status_code == 200
+
+    # Another worker logs this session out, nothing in this worker is told about it
+    with app.app_context():
+        db.session.execute(sa.delete(LoginSession).where(LoginSession.key == key))
+        db.session.commit()
+    session.delete(f"login_session:{key}")
+
+    assert client.get("/frames/clock_in_form").headers["Location"] == "/login"
+
+
+def test_revoked_session_is_not_cached_again(app, client):
+    import time
+
+    from app.controllers.user import session_cache
+    from app.lib.redis import session
+
+    with client.session_transaction() as flask_session:
+        key = flask_session["login_session_key"]
+
+    # A request loads the login session from the database, then it is revoked before that request caches it
+    with app.app_context():
+        loaded = session_cache._load(key)
+    session_cache.invalidate(key)
+
+    session_cache._set_redis(key, loaded, time.time())
+    assert not session.exists(f"login_session:{key}")
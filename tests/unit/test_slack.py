@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+
+class FakeSession:
+    """
+    Stands in for the shared `requests.Session`, records the statuses sent
+    """
+
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+        self.sent = []
+
+    def post(self, url, headers, json, timeout):
+        from unittest.mock import Mock
+
+        self.sent.append((headers["Authorization"], json["profile"]["status_text"]))
+        return Mock(json=lambda: {"ok": self.ok}, text="")
+
+
+@pytest.fixture
+def slack(user_context, monkeypatch):
+    from app import db
+    from app.controllers import settings
+    from app.lib.redis import queue
+    from app.models import UserToSlackToken
+
+    settings.update(auto_update_slack_status=True)
+    db.session.add_all(
+        [
+            UserToSlackToken(user_id=1, slack_token="one", team_name="One"),
+            UserToSlackToken(user_id=1, slack_token="two", team_name="Two"),
+        ]
+    )
+    db.session.commit()
+
+    queue.delete("slack:queue", "slack:pending:1", "slack:status:1")
+
+    session = FakeSession()
+    monkeypatch.setattr("app.lib.http.get_session", lambda: session)
+    return session
+
+
+def test_updates_are_coalesced(slack):
+    from app.controllers.slack import process_queue, update_status
+
+    update_status(on_break=True)
+    update_status(on_break=False)
+    update_status(on_break=True)
+
+    # Queued once and only the latest status is sent, to every workspace
+    assert process_queue(timeout=1) == 1
+    assert process_queue(timeout=1) is None
+    assert slack.sent == [("Bearer one", "Away"), ("Bearer two", "Away")]
+
+    # Once sent the next update is queued again
+    update_status(on_break=False)
+    assert process_queue(timeout=1) == 1
+    assert slack.sent[2:] == [("Bearer one", ""), ("Bearer two", "")]
+
+
+def test_pending_mark_expires(slack):
+    from app.controllers.slack import PENDING_TTL, update_status
+    from app.lib.redis import queue
+
+    update_status(on_break=True)
+    assert 0 < queue.ttl("slack:pending:1") <= PENDING_TTL
+
+    # A worker took the user off the queue then died before clearing the mark, once it expires updates are queued again
+    queue.rpop("slack:queue")
+    queue.delete("slack:pending:1")
+    update_status(on_break=False)
+    assert queue.lrange("slack:queue", 0, -1) == [b"1"]
+    assert json.loads(queue.get("slack:status:1")) == {"on_break": False}
+
+
+def test_send_status_carries_on_after_a_failure(slack):
+    from app.controllers.slack import send_status
+
+    slack.ok = False
+    send_status(1, on_break=True)
+    assert len(slack.sent) == 2
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from app.lib import startup
+
+# Generous so slow CI machines don't fail, it is here to catch a heavy import creeping back onto the startup path
+BUDGET = float(os.getenv("STARTUP_BUDGET", "2.0"))
+
+# Only needed by some requests or outside local development so should not be imported at startup
+LAZY_MODULES = ["rollbar", "sendgrid", "holidays"]
+
+
+@pytest.fixture(scope="module")
+def report(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("TEST_DATABASE_URL", f"sqlite:///{tmp_path_factory.mktemp('startup')}/time.test.db")
+        yield startup.measure(test_mode=True)
+
+
+def test_startup_within_budget(report):
+    assert report.total_seconds < BUDGET, [(i.module, i.cumulative_seconds) for i in report.slowest(10, max_depth=1)]
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_heavy_modules_not_imported(report, module):
+    assert module not in report.modules
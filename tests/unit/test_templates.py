@@ -0,0 +1,13 @@
+from app import precompile_templates
+
+
+def test_all_templates_compile(app):
+    app.jinja_env.cache.clear()
+    precompile_templates(app)
+
+    assert len(app.jinja_env.cache) == len(app.jinja_env.list_templates(extensions=["j2"]))
+
+
+def test_no_reloading_outside_debug(app):
+    assert not app.jinja_env.auto_reload
+    assert "jinja2.ext.DebugExtension" not in app.jinja_env.extensions
@@ -0,0 +1,46 @@
+import logging
+import re
+
+
+def _timings(response) -> dict[str, tuple[float, str]]:
+    """
+    Parses the Server-Timing header into {name: (duration, description)}
+    """
+    timings = {}
+    for metric in response.headers["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        timings[name] = (float(values["dur"]), values.get("desc", "").strip('"'))
+    return timings
+
+
+def test_server_timing_header(client):
+    response = client.get("/frames/stats")
+    timings = _timings(response)
+
+    assert set(timings) == {"db", "tpl", "redis", "total"}
+    assert int(re.match(r"\d+", timings["db"][1]).group()) > 0
+    assert int(re.match(r"\d+", timings["redis"][1]).group()) > 0
+    assert timings["tpl"][0] > 0
+    assert timings["total"][0] >= timings["db"][0]
+
+
+def test_query_budget(app, client, caplog):
+    client.get("/frames/stats")
+
+    with caplog.at_level(logging.WARNING, logger="app.lib.timing"):
+        app.config["QUERY_BUDGETS"] = {"core.stats": 0}
+        client.get("/frames/stats")
+
+        assert "GET core.stats ran" in caplog.text
+
+        caplog.clear()
+        app.config["QUERY_BUDGETS"] = {"core.stats": 1000}
+        client.get("/frames/stats")
+
+        assert "GET core.stats ran" not in caplog.text
+
+
+def test_header_can_be_turned_off(app, client):
+    app.config["SERVER_TIMING"] = False
+    assert "Server-Timing" not in client.get("/frames/stats").headers
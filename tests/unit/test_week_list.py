@@ -0,0 +1,66 @@
+import re
+
+import arrow
+
+from app.controllers.core import WEEK_WINDOW
+
+
+def add_entry(app, start: arrow.Arrow):
+    """
+    Add a time record directly to the database, skipping the controller and any cache invalidation
+    """
+    from app import db
+    from app.models import Time
+
+    with app.app_context():
+        db.session.add(Time(start=start.int_timestamp, end=start.shift(hours=1).int_timestamp, note="", user_id=1))
+        db.session.commit()
+
+
+def week_options(html: str) -> list[str]:
+    return re.findall(r'<option value="([^"]*)"', html)
+
+
+def expected_weeks(weeks_ago: range) -> list[str]:
+    now = arrow.now("Europe/London")
+    return [now.shift(weeks=-n).format("W").rsplit("-", 1)[0] for n in weeks_ago]
+
+
+def test_week_list_is_windowed(app, client):
+    add_entry(app, arrow.now().shift(weeks=-30))
+
+    # The latest window plus an option to load older weeks
+    assert week_options(client.get("/dash").text) == expected_weeks(range(WEEK_WINDOW)) + [""]
+
+    html = client.get(f"/frames/week_options?offset={WEEK_WINDOW}").text
+    assert week_options(html) == expected_weeks(range(WEEK_WINDOW, WEEK_WINDOW * 2)) + [""]
+    assert f"{WEEK_WINDOW} weeks ago" in html
+
+    # The last window stops at the week of the first record
+    assert week_options(client.get(f"/frames/week_options?offset={WEEK_WINDOW * 2}").text) == expected_weeks(
+        range(WEEK_WINDOW * 2, 31)
+    )
+
+
+def test_first_record_is_cached(app, client):
+    add_entry(app, arrow.now().shift(weeks=-2))
+    assert len(week_options(client.get("/dash").text)) == 3
+
+    # Not seen as the first record is cached
+    add_entry(app, arrow.now().shift(weeks=-3))
+    assert len(week_options(client.get("/dash").text)) == 3
+
+    # Writing a later record keeps the cache
+    now = arrow.now("Europe/London")
+    record = {
+        "start": now.shift(hours=-1).format("YYYY-MM-DDTHH:mm"),
+        "end": now.format("YYYY-MM-DDTHH:mm"),
+        "note": "",
+    }
+    client.post("/frames/time_form/", json=record)
+    assert len(week_options(client.get("/dash").text)) == 3
+
+    # Writing an earlier record clears it
+    record = {"start": now.shift(weeks=-5).format("YYYY-MM-DDTHH:mm"), "end": "", "note": ""}
+    assert client.post("/frames/time_form/", json=record).status_code == 200
+    assert len(week_options(client.get("/dash").text)) == 6